@@ -7,13 +7,20 @@ Este módulo implementa tres algoritmos principales:
 2. Forward Checking: Propagación de restricciones hacia adelante  
 3. AC3: Consistencia de arco para reducción de dominios
 
+Además incluye un motor de búsqueda FC/MAC (`_busqueda`) capaz de continuar
+tras cada solución, sobre el que se apoyan `forward_checking_stats`,
+`contar_soluciones` (comprobación de unicidad con parada temprana) y
+`generar_soluciones` (enumeración perezosa de todas las soluciones).
+`preprocesar_ac3` ejecuta AC3 una sola vez por tablero y dominios de entrada y
+devuelve una instantánea inmutable que pueden consumir varios resolutores.
+
 Autor: [Tu nombre]
 Curso: 2024-25
 Asignatura: Sistemas Inteligentes
 """
 
-import copy
-from sudoku_csp import SudokuCSP
+import time
+from sudoku_csp import SudokuCSP, EstadoDominios
 
 # Flags de traza (para entrega: dejar dominios de AC3 opcionalmente visibles)
 DEBUG_TRAZA_AC3_DOMINIOS = False
@@ -65,34 +72,47 @@ def backtracking(tablero, dominios=None):
     return False
 
 
-def backtracking_stats(tablero, max_nodos=None, dominios=None):
+def backtracking_stats(tablero, max_nodos=None, dominios=None, progreso=None, simetria=False):
     """
     Variante de Backtracking que devuelve métricas.
 
     Args:
         tablero (Tablero): Tablero inicial del Sudoku (no se modifica).
         max_nodos (int|None): Límite de nodos (llamadas recursivas). Si None, sin límite.
+        progreso (CanalProgreso|None): Canal al que publicar el avance; permite cancelar.
+        simetria (bool): Saltar los valores simétricos a uno que ya falló (ver simetria.py).
 
     Returns:
         dict: {
             'exito': bool,
             'nodos': int,
             'limite_excedido': bool,
+            'cancelado': bool,
+            'podados_simetria': int (valores saltados por simetría),
             'tablero': Tablero (copia resuelta si exito=True)
         }
     """
-    tablero_copia = copy.deepcopy(tablero)
+    tablero_copia = tablero.copia()
     csp = SudokuCSP(tablero_copia, dominios=dominios)
+    if simetria:
+        from simetria import MascarasSimetria
+        mascaras = MascarasSimetria(csp)
 
     nodos = 0
     limite_excedido = False
+    cancelado = False
+    podados_simetria = 0
 
-    def backtrack_recursivo():
-        nonlocal nodos, limite_excedido
+    def backtrack_recursivo(profundidad=0):
+        nonlocal nodos, limite_excedido, cancelado, podados_simetria
         nodos += 1
         if max_nodos is not None and nodos > max_nodos:
             limite_excedido = True
             return False
+        if progreso is not None:
+            if cancelado or (nodos % progreso.intervalo == 0 and progreso.notificar(nodos, profundidad, csp)):
+                cancelado = True
+                return False
 
         if csp.esta_completo():
             return True
@@ -104,12 +124,23 @@ def backtracking_stats(tablero, max_nodos=None, dominios=None):
         fila, columna = pos
         variable = csp.variables[fila][columna]
 
-        for valor in variable.obtener_dominio():
+        dominio = variable.obtener_dominio()
+        podados = ()
+        for i, valor in enumerate(dominio):
             if csp.es_consistente(fila, columna, valor):
+                if valor in podados:
+                    podados_simetria += 1
+                    continue
                 variable.asignar_valor(valor)
-                if backtrack_recursivo():
+                if simetria:
+                    mascaras.asignar(fila, columna, valor)
+                if backtrack_recursivo(profundidad + 1):
                     return True
                 variable.desasignar()
+                if simetria:
+                    mascaras.deshacer()
+                    if not (limite_excedido or cancelado):
+                        podados = set(podados) | mascaras.simetricos(fila, columna, valor, dominio[i + 1:])
         return False
 
     exito = backtrack_recursivo()
@@ -119,10 +150,58 @@ def backtracking_stats(tablero, max_nodos=None, dominios=None):
         'exito': exito,
         'nodos': nodos,
         'limite_excedido': limite_excedido,
+        'cancelado': cancelado,
+        'podados_simetria': podados_simetria,
         'tablero': tablero_copia if exito else None,
     }
 
 
+def propagar_restricciones(csp, fila, columna, valor):
+    """
+    Propaga las restricciones eliminando el valor de los dominios
+    de las variables relacionadas (paso de Forward Checking)
+    
+    Args:
+        csp (SudokuCSP): Problema sobre el que se propaga
+        fila (int): Fila de la variable recién asignada
+        columna (int): Columna de la variable recién asignada
+        valor (str): Valor asignado
+        
+    Returns:
+        list: Lista de cambios (fila, columna, valor) para poder revertirlos
+    """
+    cambios = []
+    relacionadas = csp.obtener_variables_relacionadas(fila, columna)
+    
+    for f, c in relacionadas:
+        variable_relacionada = csp.variables[f][c]
+        if not variable_relacionada.esta_asignada():
+            if variable_relacionada.eliminar_del_dominio(valor):
+                cambios.append((f, c, valor))
+    
+    return cambios
+
+
+def revertir_cambios(csp, cambios):
+    """
+    Revierte los cambios realizados en la propagación
+    """
+    for fila, columna, valor in cambios:
+        csp.variables[fila][columna].restaurar_en_dominio(valor)
+
+
+def verificar_dominios_vacios(csp):
+    """
+    Verifica si alguna variable no asignada tiene dominio vacío
+    """
+    for fila in range(9):
+        for columna in range(9):
+            variable = csp.variables[fila][columna]
+            if not variable.esta_asignada() and variable.dominio_vacio():
+                return True
+    return False
+
+
 def forward_checking(tablero, dominios=None):
     """
     Algoritmo de Forward Checking para resolver Sudoku
@@ -135,43 +214,6 @@ def forward_checking(tablero, dominios=None):
     """
     csp = SudokuCSP(tablero, dominios=dominios)
     
-    def propagar_restricciones(fila, columna, valor):
-        """
-        Propaga las restricciones eliminando el valor de los dominios
-        de las variables relacionadas
-        
-        Returns:
-            list: Lista de cambios realizados para poder revertirlos
-        """
-        cambios = []
-        relacionadas = csp.obtener_variables_relacionadas(fila, columna)
-        
-        for f, c in relacionadas:
-            variable_relacionada = csp.variables[f][c]
-            if not variable_relacionada.esta_asignada():
-                if variable_relacionada.eliminar_del_dominio(valor):
-                    cambios.append((f, c, valor))
-        
-        return cambios
-    
-    def revertir_cambios(cambios):
-        """
-        Revierte los cambios realizados en la propagación
-        """
-        for fila, columna, valor in cambios:
-            csp.variables[fila][columna].restaurar_en_dominio(valor)
-    
-    def verificar_dominios_vacios():
-        """
-        Verifica si alguna variable no asignada tiene dominio vacío
-        """
-        for fila in range(9):
-            for columna in range(9):
-                variable = csp.variables[fila][columna]
-                if not variable.esta_asignada() and variable.dominio_vacio():
-                    return True
-        return False
-    
     def forward_check_recursivo():
         # Si está completo, hemos encontrado la solución
         if csp.esta_completo():
@@ -192,17 +234,17 @@ def forward_checking(tablero, dominios=None):
                 variable.asignar_valor(valor)
                 
                 # Propagar restricciones (forward checking)
-                cambios = propagar_restricciones(fila, columna, valor)
+                cambios = propagar_restricciones(csp, fila, columna, valor)
                 
                 # Verificar si algún dominio se quedó vacío
-                if not verificar_dominios_vacios():
+                if not verificar_dominios_vacios(csp):
                     # Llamada recursiva
                     if forward_check_recursivo():
                         return True
                 
                 # Deshacer asignación y revertir cambios
                 variable.desasignar()
-                revertir_cambios(cambios)
+                revertir_cambios(csp, cambios)
         
         return False
     
@@ -213,175 +255,543 @@ def forward_checking(tablero, dominios=None):
     return False
 
 
-def forward_checking_stats(tablero, max_nodos=None, dominios=None):
+def propagar_fc(csp, fila, columna, valor):
+    """
+    Paso de Forward Checking que además detecta el vaciado de dominios sin
+    recorrer todo el tablero: solo pueden vaciarse dominios de los vecinos
+    afectados por la asignación actual.
+
+    Returns:
+        tuple: (cambios, consistente)
+    """
+    cambios = []
+    consistente = True
+    variables = csp.variables
+    for f, c in csp.vecinos(fila, columna):
+        variable_relacionada = variables[f][c]
+        if not variable_relacionada.esta_asignada():
+            if variable_relacionada.eliminar_del_dominio(valor):
+                cambios.append((f, c, valor))
+                if not variable_relacionada.dominio:
+                    consistente = False
+    return cambios, consistente
+
+
+def propagar_mac(csp, fila, columna, valor):
+    """
+    Mantenimiento de consistencia de arco (MAC) para las restricciones de
+    desigualdad: además del paso de FC, cada variable libre cuyo dominio queda
+    reducido a un único valor propaga ese valor a sus vecinos, en cadena.
+
+    Returns:
+        tuple: (cambios, consistente)
+    """
+    cambios = []
+    variables = csp.variables
+    pendientes = [(fila, columna, valor)]
+    while pendientes:
+        f0, c0, v0 = pendientes.pop()
+        for f, c in csp.vecinos(f0, c0):
+            variable_relacionada = variables[f][c]
+            if variable_relacionada.esta_asignada() or (f, c) == (fila, columna):
+                continue
+            if variable_relacionada.eliminar_del_dominio(v0):
+                cambios.append((f, c, v0))
+                restantes = len(variable_relacionada.dominio)
+                if restantes == 0:
+                    return cambios, False
+                if restantes == 1:
+                    pendientes.append((f, c, variable_relacionada.dominio[0]))
+    return cambios, True
+
+
+def _propagar_singletons_iniciales(csp):
+    """
+    Propaga (MAC) los dominios unitarios de las variables libres en la raíz.
+
+    Returns:
+        bool: False si algún dominio queda vacío
+    """
+    for f in range(9):
+        for c in range(9):
+            variable = csp.variables[f][c]
+            if variable.esta_asignada():
+                continue
+            if variable.dominio_vacio():
+                return False
+            if variable.tamano_dominio() == 1:
+                _, consistente = propagar_mac(csp, f, c, variable.dominio[0])
+                if not consistente:
+                    return False
+    return True
+
+
+def _busqueda(csp, metricas, max_nodos=None, mac=False, progreso=None, simetria=False,
+              heuristica='mrv', pesos=None, aleatorio=None, todos_distintos=False, reglas=None,
+              traza=None):
+    """
+    Motor de búsqueda FC/MAC en forma de generador.
+
+    Produce (None) cada vez que el CSP queda completamente asignado; en ese
+    momento la solución está en `csp.variables`. Si el consumidor pide el
+    siguiente elemento, la búsqueda continúa desde ahí, por lo que el mismo
+    motor sirve para la primera solución, para contarlas o para enumerarlas.
+
+    Args:
+        csp (SudokuCSP): Problema (se modifica durante la búsqueda).
+        metricas (dict): Se actualizan 'nodos' y 'limite_excedido'.
+        max_nodos (int|None): Límite de nodos. Si None, sin límite.
+        mac (bool): Si True, propaga con MAC; si False, con Forward Checking.
+        progreso (CanalProgreso|None): Canal al que publicar el avance. Si se
+            cancela, la búsqueda termina y se marca metricas['cancelado'].
+        simetria (bool): Tras un valor cuyo subárbol no dio ninguna solución,
+            saltar los valores simétricos a él (se cuentan en
+            metricas['podados_simetria']). No altera las soluciones producidas.
+        heuristica (str): Selección de variable: 'mrv' o 'domwdeg' (ver heuristicas.py).
+        pesos (list[int]|None): Con 'domwdeg', pesos de partida de las 27
+            unidades; se actualizan en el sitio. Los vaciados de dominio se
+            cuentan en metricas['fallos_wdeg'].
+        aleatorio (random.Random|None): Si se pasa, los empates de la
+            heurística se deciden al azar y los valores se prueban en orden
+            aleatorio (búsqueda con reinicios).
+        todos_distintos (bool): Propagar filtrando cada unidad como
+            restricción todos-distintos (ver todos_distintos.py), también en
+            la raíz; tiene prioridad sobre `mac`.
+        reglas (Iterable[str] | Inferencia | None): Reglas de inferencia (ver
+            reglas.py) que se aplican hasta el punto fijo en la raíz y tras
+            cada propagación; sus contadores quedan en metricas['reglas'].
+        traza (GrabadorTraza|None): Si se pasa, se graban las asignaciones,
+            podas, vaciados, retrocesos y soluciones (ver traza.py).
+    """
+    propagar = propagar_mac if mac else propagar_fc
+    if todos_distintos:
+        from todos_distintos import propagar_todos_distintos, propagar_unidades
+        propagar = propagar_todos_distintos
+        if not propagar_unidades(csp)[1]:
+            return (None for _ in ())  # Generador vacío: inconsistente en la raíz
+    if reglas is not None:
+        from reglas import Inferencia
+        # Por el método y no por la clase: con `python reglas.py`, la Inferencia es la de __main__
+        inferencia = reglas if hasattr(reglas, 'propagador') else Inferencia(reglas)
+        metricas['reglas'] = inferencia.contadores
+        propagar = inferencia.propagador(propagar)
+        if not inferencia.aplicar(csp)[1]:
+            return (None for _ in ())
+    metricas.setdefault('nodos', 0)
+    metricas.setdefault('limite_excedido', False)
+    metricas.setdefault('cancelado', False)
+    metricas.setdefault('podados_simetria', 0)
+    if simetria:
+        from simetria import MascarasSimetria
+        mascaras = MascarasSimetria(csp)
+    ordenacion = None
+    if heuristica not in ('mrv', 'domwdeg'):
+        raise ValueError(f"Heurística desconocida: {heuristica}")
+    if heuristica == 'domwdeg':
+        from heuristicas import DomWdeg
+        ordenacion = DomWdeg(csp, pesos, aleatorio)
+    elif aleatorio is not None:
+        from heuristicas import SeleccionIncremental
+        ordenacion = SeleccionIncremental(csp, aleatorio)
+    if ordenacion is not None:
+        metricas.setdefault('fallos_wdeg', 0)
+    seleccionar = csp.obtener_variable_no_asignada if ordenacion is None else ordenacion.seleccionar
+    # Soluciones producidas hasta ahora: un subárbol falló si no la incrementó
+    soluciones = [0]
+
+    def recursivo(profundidad=0):
+        metricas['nodos'] += 1
+        if max_nodos is not None and metricas['nodos'] > max_nodos:
+            metricas['limite_excedido'] = True
+            return
+        if progreso is not None:
+            if metricas['cancelado'] or (metricas['nodos'] % progreso.intervalo == 0
+                                         and progreso.notificar(metricas['nodos'], profundidad, csp)):
+                metricas['cancelado'] = True
+                return
+
+        # MRV (y dom/wdeg) devuelve None exactamente cuando todas las variables
+        # están asignadas, así que no hace falta recorrer el tablero otra vez
+        # con esta_completo()
+        pos = seleccionar()
+        if pos is None:
+            soluciones[0] += 1
+            if traza is not None:
+                traza.solucion(profundidad)
+            yield
+            return
+
+        fila, columna = pos
+        variable = csp.variables[fila][columna]
+
+        dominio = variable.obtener_dominio()
+        if aleatorio is not None:
+            aleatorio.shuffle(dominio)
+        podados = ()
+        for i, valor in enumerate(dominio):
+            if csp.es_consistente(fila, columna, valor):
+                if valor in podados:
+                    metricas['podados_simetria'] += 1
+                    continue
+                antes = soluciones[0]
+                variable.asignar_valor(valor)
+                cambios, consistente = propagar(csp, fila, columna, valor)
+                if traza is not None:
+                    traza.asignar(fila, columna, valor, profundidad)
+                    traza.podar(cambios, profundidad)
+                    if not consistente:
+                        traza.vacio(csp, fila, columna, valor, cambios, profundidad)
+                if simetria and consistente:
+                    mascaras.asignar(fila, columna, valor, cambios)
+                if ordenacion is None:
+                    if consistente:
+                        yield from recursivo(profundidad + 1)
+                else:
+                    if consistente:
+                        ordenacion.asignar(fila, columna)
+                        yield from recursivo(profundidad + 1)
+                        ordenacion.desasignar(fila, columna)
+                    else:
+                        ordenacion.registrar_fallo(fila, columna, valor, cambios)
+                        metricas['fallos_wdeg'] = ordenacion.fallos
+                variable.desasignar()
+                revertir_cambios(csp, cambios)
+                if traza is not None:
+                    traza.retroceder(fila, columna, valor, profundidad)
+                if simetria and consistente:
+                    mascaras.deshacer()
+                if (simetria and soluciones[0] == antes
+                        and not (metricas['limite_excedido'] or metricas['cancelado'])):
+                    podados = set(podados) | mascaras.simetricos(fila, columna, valor, dominio[i + 1:])
+
+    return recursivo()
+
+
+def forward_checking_stats(tablero, max_nodos=None, dominios=None, progreso=None, simetria=False,
+                           heuristica='mrv', pesos=None, todos_distintos=False, reglas=None, traza=None):
     """
     Variante de Forward Checking que devuelve métricas.
 
     Args:
         tablero (Tablero): Tablero inicial del Sudoku (no se modifica).
         max_nodos (int|None): Límite de nodos (llamadas recursivas). Si None, sin límite.
+        progreso (CanalProgreso|None): Canal al que publicar el avance; permite cancelar.
+        simetria (bool): Saltar los valores simétricos a uno que ya falló (ver simetria.py).
+        heuristica (str): Selección de variable: 'mrv' (por defecto) o 'domwdeg'.
+        pesos (list[int]|None): Con 'domwdeg', pesos de partida de las unidades
+            (se actualizan en el sitio).
+        todos_distintos (bool): Propagar con el filtrado todos-distintos de
+            las unidades en lugar de Forward Checking.
+        reglas (Iterable[str] | Inferencia | None): Reglas de inferencia
+            (reglas.py) a aplicar en la raíz y tras cada paso de Forward Checking.
+        traza (GrabadorTraza|None): Grabador de eventos de la búsqueda (traza.py).
 
     Returns:
         dict: {
             'exito': bool,
             'nodos': int,
             'limite_excedido': bool,
+            'cancelado': bool,
+            'podados_simetria': int (valores saltados por simetría),
             'tablero': Tablero (copia resuelta si exito=True)
         }
+        Con `reglas`, además 'reglas': contadores por regla (ver Inferencia).
     """
-    tablero_copia = copy.deepcopy(tablero)
+    tablero_copia = tablero.copia()
     csp = SudokuCSP(tablero_copia, dominios=dominios)
 
-    nodos = 0
-    limite_excedido = False
+    metricas = {'nodos': 0, 'limite_excedido': False, 'cancelado': False, 'podados_simetria': 0}
+    busqueda = _busqueda(csp, metricas, max_nodos=max_nodos, progreso=progreso, simetria=simetria,
+                         heuristica=heuristica, pesos=pesos, todos_distintos=todos_distintos, reglas=reglas,
+                         traza=traza)
+    exito = next(busqueda, False) is None
+    if exito:
+        csp.actualizar_tablero()
+    busqueda.close()
+    resultado = {
+        'exito': exito,
+        'nodos': metricas['nodos'],
+        'limite_excedido': metricas['limite_excedido'],
+        'cancelado': metricas['cancelado'],
+        'podados_simetria': metricas['podados_simetria'],
+        'tablero': tablero_copia if exito else None,
+    }
+    if 'reglas' in metricas:
+        resultado['reglas'] = metricas['reglas']
+    return resultado
 
-    def propagar_restricciones(fila, columna, valor):
-        cambios = []
-        relacionadas = csp.obtener_variables_relacionadas(fila, columna)
-        for f, c in relacionadas:
-            variable_relacionada = csp.variables[f][c]
-            if not variable_relacionada.esta_asignada():
-                if variable_relacionada.eliminar_del_dominio(valor):
-                    cambios.append((f, c, valor))
-        return cambios
-
-    def revertir_cambios(cambios):
-        for fila, columna, valor in cambios:
-            csp.variables[fila][columna].restaurar_en_dominio(valor)
-
-    def verificar_dominios_vacios():
-        for fila in range(9):
-            for columna in range(9):
-                variable = csp.variables[fila][columna]
-                if not variable.esta_asignada() and variable.dominio_vacio():
-                    return True
-        return False
 
-    def forward_check_recursivo():
-        nonlocal nodos, limite_excedido
-        nodos += 1
-        if max_nodos is not None and nodos > max_nodos:
-            limite_excedido = True
-            return False
+ESTRATEGIAS_REINICIO = ('luby', 'geometrica')
 
-        if csp.esta_completo():
-            return True
 
-        pos = csp.obtener_variable_no_asignada()
-        if pos is None:
-            return True
+def luby(i):
+    """Término i-ésimo (desde 1) de la secuencia de Luby: 1 1 2 1 1 2 4 1 1 2 1 1 2 4 8 ..."""
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    if i == (1 << k) - 1:
+        return 1 << (k - 1)
+    return luby(i - (1 << (k - 1)) + 1)
 
-        fila, columna = pos
-        variable = csp.variables[fila][columna]
 
-        for valor in variable.obtener_dominio()[:]:
-            if csp.es_consistente(fila, columna, valor):
-                variable.asignar_valor(valor)
-                cambios = propagar_restricciones(fila, columna, valor)
-                if not verificar_dominios_vacios():
-                    if forward_check_recursivo():
-                        return True
-                variable.desasignar()
-                revertir_cambios(cambios)
-        return False
+def forward_checking_reinicios(tablero, max_nodos=None, dominios=None, semilla=0, estrategia='luby',
+                               unidad=32, factor=1.5, heuristica='domwdeg', mac=False):
+    """
+    Forward Checking (o MAC) con reinicios aleatorizados.
+
+    Cada intento desempata la heurística al azar y prueba los valores en orden
+    aleatorio, con un límite de nodos que sigue la secuencia de Luby
+    (`unidad` * 1, 1, 2, 1, 1, 2, 4...) o una geométrica (`unidad` * factor^k).
+    Al agotarlo se reinicia desde la raíz. Con dom/wdeg los pesos de las
+    unidades se conservan entre intentos, de modo que cada reinicio empieza por
+    las zonas que más fallos dieron. Todo depende de `semilla`: la misma
+    semilla reproduce la misma ejecución.
+
+    Args:
+        tablero (Tablero): Tablero inicial del Sudoku (no se modifica).
+        max_nodos (int|None): Límite total de nodos (sumando los intentos). Si None, sin límite.
+        dominios (list[list[list[str]]] | None): Dominios iniciales opcionales.
+        semilla (int): Semilla del generador aleatorio.
+        estrategia (str): 'luby' o 'geometrica'.
+        unidad (int): Nodos del primer intento (y unidad de la secuencia de Luby).
+        factor (float): Razón de la secuencia geométrica.
+        heuristica (str): 'domwdeg' (por defecto, pesos compartidos) o 'mrv'.
+        mac (bool): Propagar con MAC en lugar de Forward Checking.
+
+    Returns:
+        dict: {
+            'exito': bool,
+            'nodos': int (de todos los intentos),
+            'limite_excedido': bool,
+            'cancelado': bool,
+            'reinicios': int,
+            'tablero': Tablero (copia resuelta si exito=True)
+        }
+    """
+    import random
+
+    if estrategia not in ESTRATEGIAS_REINICIO:
+        raise ValueError(f"Estrategia de reinicio desconocida: {estrategia}")
+    aleatorio = random.Random(semilla)
+    pesos = [1] * 27
+    nodos = 0
+    reinicios = 0
+    while True:
+        if estrategia == 'luby':
+            limite = unidad * luby(reinicios + 1)
+        else:
+            limite = max(1, int(unidad * factor ** reinicios))
+        if max_nodos is not None:
+            limite = min(limite, max_nodos - nodos)
+
+        tablero_copia = tablero.copia()
+        csp = SudokuCSP(tablero_copia, dominios=dominios)
+        metricas = {'nodos': 0, 'limite_excedido': False, 'cancelado': False}
+        if mac and not _propagar_singletons_iniciales(csp):
+            exito = False
+        else:
+            busqueda = _busqueda(csp, metricas, max_nodos=limite, mac=mac, heuristica=heuristica,
+                                 pesos=pesos, aleatorio=aleatorio)
+            exito = next(busqueda, False) is None
+            if exito:
+                csp.actualizar_tablero()
+            busqueda.close()
+        # El nodo que supera el límite no llega a expandirse
+        nodos += min(metricas['nodos'], limite)
+
+        # Solución, o búsqueda completa sin solución: no hay que reiniciar
+        if exito or not metricas['limite_excedido']:
+            break
+        if max_nodos is not None and nodos >= max_nodos:
+            break
+        reinicios += 1
 
-    exito = forward_check_recursivo()
-    if exito:
-        csp.actualizar_tablero()
     return {
         'exito': exito,
         'nodos': nodos,
-        'limite_excedido': limite_excedido,
+        'limite_excedido': not exito and metricas['limite_excedido'],
+        'cancelado': False,
+        'reinicios': reinicios,
         'tablero': tablero_copia if exito else None,
     }
 
 
-def ac3(tablero, dominios=None):
+def contar_soluciones(tablero, limite=2, max_nodos=None, dominios=None, mac=True, simetria=False,
+                      heuristica='mrv', todos_distintos=False, reglas=None):
     """
-    Algoritmo AC3 (Arc Consistency 3) para reducir dominios
-    
+    Cuenta las soluciones del Sudoku hasta `limite`, deteniéndose en cuanto se
+    alcanza. Con `limite=2` responde si el Sudoku tiene solución única.
+
     Args:
-        tablero (Tablero): Tablero inicial del Sudoku
-        
+        tablero (Tablero): Tablero inicial del Sudoku (no se modifica).
+        limite (int|None): Número de soluciones a partir del cual se detiene. Si None, las cuenta todas.
+        max_nodos (int|None): Límite de nodos (llamadas recursivas). Si None, sin límite.
+        dominios (list[list[list[str]]] | None): Dominios iniciales opcionales.
+        mac (bool): Propagar con MAC (por defecto) o con Forward Checking.
+        simetria (bool): Podar por simetrías (no cambia el recuento, solo los nodos).
+        heuristica (str): Selección de variable: 'mrv' (por defecto) o 'domwdeg'.
+        todos_distintos (bool): Propagar con el filtrado todos-distintos de las unidades.
+        reglas (Iterable[str] | None): Reglas de inferencia (reglas.py) añadidas a la propagación.
+
     Returns:
-        bool: True si el problema es consistente, False si es inconsistente
+        dict: {
+            'soluciones': int (soluciones encontradas, como mucho `limite`),
+            'unica': bool (exactamente una y búsqueda completa),
+            'limite_alcanzado': bool (se encontraron `limite` soluciones),
+            'nodos': int,
+            'limite_excedido': bool (presupuesto de nodos agotado: recuento incompleto),
+            'podados_simetria': int
+        }
+    """
+    csp = SudokuCSP(tablero, dominios=dominios)
+    metricas = {'nodos': 0, 'limite_excedido': False, 'podados_simetria': 0}
+    soluciones = 0
+
+    if csp.fijas_consistentes() and (not mac or _propagar_singletons_iniciales(csp)):
+        busqueda = _busqueda(csp, metricas, max_nodos=max_nodos, mac=mac, simetria=simetria,
+                             heuristica=heuristica, todos_distintos=todos_distintos, reglas=reglas)
+        for _ in busqueda:
+            soluciones += 1
+            if limite is not None and soluciones >= limite:
+                break
+        busqueda.close()
+
+    limite_alcanzado = limite is not None and soluciones >= limite
+    return {
+        'soluciones': soluciones,
+        'unica': soluciones == 1 and not metricas['limite_excedido'],
+        'limite_alcanzado': limite_alcanzado,
+        'nodos': metricas['nodos'],
+        'limite_excedido': metricas['limite_excedido'],
+        'podados_simetria': metricas['podados_simetria'],
+    }
+
+
+def generar_soluciones(tablero, max_nodos=None, dominios=None, mac=True, metricas=None, simetria=False,
+                       heuristica='mrv', todos_distintos=False, reglas=None, traza=None, progreso=None):
+    """
+    Generador perezoso de todas las soluciones del Sudoku.
+
+    Cada solución se produce como una cadena de 81 caracteres ('1'..'9', por
+    filas) en cuanto la búsqueda la encuentra; no se guardan las anteriores,
+    por lo que la memoria no crece con el número de soluciones.
+
+    Args:
+        tablero (Tablero): Tablero inicial del Sudoku (no se modifica).
+        max_nodos (int|None): Límite de nodos. Si None, sin límite.
+        dominios (list[list[list[str]]] | None): Dominios iniciales opcionales.
+        mac (bool): Propagar con MAC (por defecto) o con Forward Checking.
+        metricas (dict|None): Si se pasa, se actualizan 'nodos' y 'limite_excedido'
+            (y 'podados_simetria').
+        simetria (bool): Podar por simetrías (no cambia las soluciones producidas).
+        heuristica (str): Selección de variable: 'mrv' (por defecto) o 'domwdeg'.
+        todos_distintos (bool): Propagar con el filtrado todos-distintos de las unidades.
+        reglas (Iterable[str] | None): Reglas de inferencia (reglas.py) añadidas a la propagación.
+        traza (GrabadorTraza|None): Grabador de eventos de la búsqueda (traza.py).
+        progreso (CanalProgreso|None): Canal al que publicar el avance; si se
+            cancela, el generador termina y se marca metricas['cancelado'].
+
+    Yields:
+        str: Solución de 81 caracteres.
     """
     csp = SudokuCSP(tablero, dominios=dominios)
-    dominios_antes = csp.snapshot_dominios()
+    if metricas is None:
+        metricas = {}
+    metricas['nodos'] = 0
+    metricas['limite_excedido'] = False
+    metricas['podados_simetria'] = 0
+    if not csp.fijas_consistentes() or (mac and not _propagar_singletons_iniciales(csp)):
+        return
+    celdas = [variable for fila in csp.variables for variable in fila]
+    for _ in _busqueda(csp, metricas, max_nodos=max_nodos, mac=mac, progreso=progreso, simetria=simetria,
+                       heuristica=heuristica, todos_distintos=todos_distintos, reglas=reglas, traza=traza):
+        yield ''.join([variable.valor for variable in celdas])
+
+
+def _revisar_arco(csp, xi, xj):
+    """
+    Revisa si el arco (xi, xj) es consistente
     
-    def obtener_arcos():
-        """
-        Genera todos los arcos (restricciones binarias) del problema
-        
-        Returns:
-            list: Lista de arcos como tuplas ((fila1, col1), (fila2, col2))
-        """
-        arcos = []
-        
-        for fila in range(9):
-            for columna in range(9):
-                relacionadas = csp.obtener_variables_relacionadas(fila, columna)
-                for f_rel, c_rel in relacionadas:
-                    arcos.append(((fila, columna), (f_rel, c_rel)))
+    Args:
+        csp (SudokuCSP): Problema cuyos dominios se revisan
+        xi (tuple): Coordenadas de la primera variable
+        xj (tuple): Coordenadas de la segunda variable
         
-        return arcos
+    Returns:
+        bool: True si se modificó el dominio de xi
+    """
+    fi, ci = xi
+    fj, cj = xj
     
-    def revisar_arco(xi, xj):
-        """
-        Revisa si el arco (xi, xj) es consistente
-        
-        Args:
-            xi (tuple): Coordenadas de la primera variable
-            xj (tuple): Coordenadas de la segunda variable
-            
-        Returns:
-            bool: True si se modificó el dominio de xi
-        """
-        fi, ci = xi
-        fj, cj = xj
-        
-        variable_i = csp.variables[fi][ci]
-        variable_j = csp.variables[fj][cj]
-        
-        # Consistencia por desigualdad: para cada valor v en Di debe existir
-        # algún u en Dj tal que u != v. Si Dj == {v}, entonces v no está soportado.
-        cambiado = False
-        if not variable_i.es_fija:
-            di = variable_i.obtener_dominio()
-            dj = variable_j.obtener_dominio()
-            # Caso típico en Sudoku: si Dj es singleton y coincide con v, eliminar v de Di
-            if len(dj) == 1:
-                unico = dj[0]
-                if unico in di:
-                    cambiado = variable_i.eliminar_del_dominio(unico) or cambiado
-        return cambiado
-        
-        return False
+    variable_i = csp.variables[fi][ci]
+    variable_j = csp.variables[fj][cj]
     
-    # Algoritmo AC3
-    cola_arcos = obtener_arcos()
+    # Consistencia por desigualdad: para cada valor v en Di debe existir
+    # algún u en Dj tal que u != v. Si Dj == {v}, entonces v no está soportado.
+    cambiado = False
+    if not variable_i.es_fija:
+        di = variable_i.dominio
+        dj = variable_j.dominio
+        # Caso típico en Sudoku: si Dj es singleton y coincide con v, eliminar v de Di
+        if len(dj) == 1:
+            unico = dj[0]
+            if unico in di:
+                cambiado = variable_i.eliminar_del_dominio(unico) or cambiado
+    return cambiado
+
+
+def _propagar_arcos(csp, cola_arcos, traza=None):
+    """
+    Bucle principal de AC3: revisa los arcos de la cola y, cada vez que se
+    reduce el dominio de xi, encola los arcos (xk, xi) de sus vecinos.
     
+    Args:
+        csp (SudokuCSP): Problema cuyos dominios se reducen
+        cola_arcos (deque): Arcos pendientes ((fila1, col1), (fila2, col2))
+        traza (GrabadorTraza|None): Si se pasa, graba las revisiones que
+            eliminan un valor (y el vaciado, si lo hay)
+        
+    Returns:
+        bool: False si algún dominio queda vacío (inconsistencia)
+    """
     while cola_arcos:
-        xi, xj = cola_arcos.pop(0)
+        xi, xj = cola_arcos.popleft()
         
-        if revisar_arco(xi, xj):
+        if _revisar_arco(csp, xi, xj):
             # Si el dominio de xi está vacío, el problema es inconsistente
             fi, ci = xi
+            if traza is not None:
+                traza.revisar(xi, xj, csp.variables[xj[0]][xj[1]].dominio[0])
             if csp.variables[fi][ci].dominio_vacio() and not csp.variables[fi][ci].esta_asignada():
-                # Inconsistencia detectada
-                return {
-                    'consistente': False,
-                    'dominios_antes': dominios_antes,
-                    'dominios_despues': csp.snapshot_dominios(),
-                    'resueltas': 0,
-                }
+                if traza is not None:
+                    traza.vacio_ac3(xi)
+                return False
             
             # Añadir todos los arcos (xk, xi) donde xk es vecino de xi
-            relacionadas = csp.obtener_variables_relacionadas(fi, ci)
-            for fk, ck in relacionadas:
+            for fk, ck in csp.vecinos(fi, ci):
                 if (fk, ck) != xj:  # No añadir el arco que acabamos de revisar
                     cola_arcos.append(((fk, ck), xi))
-    
+    return True
+
+
+def _cerrar_ac3(csp, tablero, dominios_antes, consistente, verbose=False):
+    """
+    Construye el resultado de AC3. Si es consistente, asigna en el tablero las
+    variables cuyo dominio ha quedado reducido a un único valor. Solo con
+    verbose=True se imprime el resumen (nunca en bucles por lotes ni JSON).
+
+    'dominios_antes' y 'dominios_despues' son EstadoDominios (81 máscaras, sin
+    copiar listas); las diferencias entre ambos solo se calculan si se piden
+    con dominios_antes.diferencias(dominios_despues).
+    """
+    if not consistente:
+        return {
+            'consistente': False,
+            'dominios_antes': dominios_antes,
+            'dominios_despues': csp.estado_dominios(),
+            'resueltas': 0,
+        }
+
     # Actualizar el tablero con los dominios reducidos
     # Solo para variables con dominio de tamaño 1
     variables_resueltas = 0
@@ -393,18 +803,15 @@ def ac3(tablero, dominios=None):
                 variable.asignar_valor(nuevo_valor)
                 tablero.setCelda(fila, columna, nuevo_valor)
                 variables_resueltas += 1
-    dominios_despues = csp.snapshot_dominios()
+    dominios_despues = csp.estado_dominios()
 
     # Imprimir cambios de dominios (solo celdas que cambiaron) si está habilitado
     if DEBUG_TRAZA_AC3_DOMINIOS:
         print("Dominios antes y después de AC3 (solo cambios):")
-        for f in range(9):
-            for c in range(9):
-                antes = dominios_antes[f][c]
-                despues = dominios_despues[f][c]
-                if antes != despues:
-                    print(f"({f},{c}) {antes} -> {despues}")
-    print(f"AC3 completado: {variables_resueltas} variables resueltas mediante reducción de dominios")
+        for f, c, antes, despues in dominios_antes.diferencias(dominios_despues):
+            print(f"({f},{c}) {list(antes)} -> {list(despues)}")
+    if verbose:
+        print(f"AC3 completado: {variables_resueltas} variables resueltas mediante reducción de dominios")
 
     return {
         'consistente': True,
@@ -414,6 +821,149 @@ def ac3(tablero, dominios=None):
     }
 
 
+def ac3(tablero, dominios=None, verbose=False, traza=None):
+    """
+    Algoritmo AC3 (Arc Consistency 3) para reducir dominios
+    
+    Args:
+        tablero (Tablero): Tablero inicial del Sudoku
+        verbose (bool): Si True, imprime el resumen al terminar ("AC3 completado")
+        traza (GrabadorTraza|None): Grabador de las revisiones de arcos (traza.py)
+        
+    Returns:
+        dict: {'consistente', 'dominios_antes', 'dominios_despues' (EstadoDominios), 'resueltas'}
+    """
+    from collections import deque  # perezoso: importar el núcleo no debe cargar collections
+
+    csp = SudokuCSP(tablero, dominios=dominios)
+    dominios_antes = csp.estado_dominios()
+    
+    # Todos los arcos (restricciones binarias) del problema
+    cola_arcos = deque()
+    for fila in range(9):
+        for columna in range(9):
+            for f_rel, c_rel in csp.vecinos(fila, columna):
+                cola_arcos.append(((fila, columna), (f_rel, c_rel)))
+    
+    consistente = _propagar_arcos(csp, cola_arcos, traza)
+    return _cerrar_ac3(csp, tablero, dominios_antes, consistente, verbose)
+
+
+def ac3_incremental(tablero, dominios_previos, celdas_cambiadas, verbose=False):
+    """
+    Re-propaga AC3 solo desde las celdas modificadas desde la última ejecución.
+
+    Partiendo de los dominios ya reducidos (resultado 'dominios_despues' de ac3
+    o de una llamada anterior a esta función), solo se encolan los arcos que
+    apuntan a las celdas cambiadas. Esto es exacto cuando los cambios solo
+    restringen el problema (se fija un valor que estaba en el dominio previo);
+    si alguna celda se vacía o recibe un valor fuera de su dominio previo, las
+    reducciones anteriores dejan de ser válidas y se repite AC3 completo.
+
+    Args:
+        tablero (Tablero): Tablero actual, ya con las ediciones (se modifica como en ac3)
+        dominios_previos (EstadoDominios | list[list[list[str]]]): Dominios reducidos de la ejecución anterior
+        celdas_cambiadas (iterable): Coordenadas (fila, columna) editadas
+        verbose (bool): Si True, imprime el resumen al terminar
+
+    Returns:
+        dict: Igual que ac3, más 'incremental' (bool) indicando si se evitó AC3 completo.
+    """
+    celdas = set(celdas_cambiadas)
+    relaja = any(
+        tablero.getCelda(f, c) == '0' or tablero.getCelda(f, c) not in dominios_previos[f][c]
+        for f, c in celdas
+    )
+    if relaja:
+        resultado = ac3(tablero, verbose=verbose)
+        resultado['incremental'] = False
+        return resultado
+
+    from collections import deque
+
+    csp = SudokuCSP(tablero, dominios=dominios_previos)
+    dominios_antes = csp.estado_dominios()
+    cola_arcos = deque()
+    for fila, columna in celdas:
+        for fk, ck in csp.vecinos(fila, columna):
+            cola_arcos.append(((fk, ck), (fila, columna)))
+
+    consistente = _propagar_arcos(csp, cola_arcos)
+    resultado = _cerrar_ac3(csp, tablero, dominios_antes, consistente, verbose)
+    resultado['incremental'] = True
+    return resultado
+
+
+class PreprocesoAC3:
+    """
+    Resultado inmutable de AC3, compartido por varios resolutores.
+
+    Atributos:
+        consistente (bool): False si AC3 vació algún dominio
+        tablero (Tablero): Tablero con las celdas resueltas por AC3. Es
+            compartido: los resolutores trabajan sobre una copia y quien lo
+            quiera modificar debe usar `tablero.copia()`
+        dominios (EstadoDominios): Dominios reducidos (máscaras inmutables);
+            se pasan tal cual como `dominios=` a cualquier resolutor
+        resueltas (int): Celdas asignadas por AC3
+        tiempo_ms (float): Lo que costó AC3 la única vez que se ejecutó
+    """
+
+    __slots__ = ('consistente', 'tablero', 'dominios', 'resueltas', 'tiempo_ms')
+
+    def __init__(self, consistente, tablero, dominios, resueltas, tiempo_ms):
+        for nombre, valor in zip(self.__slots__, (consistente, tablero, dominios, resueltas, tiempo_ms)):
+            object.__setattr__(self, nombre, valor)
+
+    def __setattr__(self, nombre, valor):
+        raise AttributeError("PreprocesoAC3 es inmutable")
+
+
+# Memo de preprocesar_ac3: (celdas, dominios de entrada) -> PreprocesoAC3
+_CACHE_AC3 = {}
+MAX_CACHE_AC3 = 256
+
+
+def _clave_ac3(tablero, dominios):
+    celdas = ''.join(''.join(fila) for fila in tablero.getTablero())
+    if dominios is None:
+        return celdas, None
+    if isinstance(dominios, EstadoDominios):
+        return celdas, dominios.mascaras
+    return celdas, tuple(tuple(tuple(d) if d is not None else None for d in fila) for fila in dominios)
+
+
+def preprocesar_ac3(tablero, dominios=None):
+    """
+    AC3 como etapa de preprocesado memoizada: la primera llamada con un tablero
+    y unos dominios de entrada ejecuta AC3 sobre una copia (el tablero recibido
+    no se modifica); las siguientes con los mismos datos devuelven el mismo
+    resultado sin recalcularlo ni copiarlo.
+
+    Args:
+        tablero (Tablero): Tablero de partida
+        dominios (list[list[list[str]]] | None): Dominios iniciales opcionales
+
+    Returns:
+        PreprocesoAC3: Instantánea inmutable (incluye el tiempo de la ejecución real)
+    """
+    clave = _clave_ac3(tablero, dominios)
+    preproceso = _CACHE_AC3.get(clave)
+    if preproceso is not None:
+        return preproceso
+
+    inicio = time.perf_counter()
+    tablero_ac3 = tablero.copia()
+    res = ac3(tablero_ac3, dominios=dominios, verbose=False)
+    tiempo_ms = (time.perf_counter() - inicio) * 1000
+    preproceso = PreprocesoAC3(res['consistente'], tablero_ac3, res['dominios_despues'], res['resueltas'], tiempo_ms)
+
+    if len(_CACHE_AC3) >= MAX_CACHE_AC3:
+        del _CACHE_AC3[next(iter(_CACHE_AC3))]
+    _CACHE_AC3[clave] = preproceso
+    return preproceso
+
+
 def resolver_con_ac3_y_backtracking(tablero):
     """
     Aplica AC3 primero y luego Backtracking
@@ -425,7 +975,7 @@ def resolver_con_ac3_y_backtracking(tablero):
         bool: True si encuentra solución, False en caso contrario
     """
     # Crear copia del tablero para AC3
-    tablero_copia = copy.deepcopy(tablero)
+    tablero_copia = tablero.copia()
     
     # Aplicar AC3
     res_ac3 = ac3(tablero_copia)
@@ -448,7 +998,7 @@ def resolver_con_ac3_y_forward_checking(tablero):
         bool: True si encuentra solución, False en caso contrario
     """
     # Crear copia del tablero para AC3
-    tablero_copia = copy.deepcopy(tablero)
+    tablero_copia = tablero.copia()
     
     # Aplicar AC3
     res_ac3 = ac3(tablero_copia)
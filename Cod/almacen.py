@@ -0,0 +1,246 @@
+"""
+Almacén incremental de resultados de experimentos (SQLite)
+==========================================================
+
+Cada fila de `experimentos.py` se guarda en cuanto se calcula (una transacción
+por fila), con clave (hash del Sudoku, algoritmo, pre_reduccion, heurísticas,
+max_nodos, versión del código, huella de la máquina, aislamiento). Así, si un barrido se interrumpe no se pierde
+lo calculado, y al repetirlo se saltan las configuraciones ya almacenadas. La
+versión del código es un hash del contenido de los módulos del resolutor:
+cualquier cambio en ellos invalida los resultados anteriores sin borrarlos.
+
+`resultados.csv` pasa a ser una vista: `exportar_csv` vuelca las filas de la
+versión actual del código con las mismas columnas que `guardar_csv`.
+
+Uso:
+    python almacen.py exportar resultados.csv [--db resultados.sqlite] [--todas-versiones] [--esta-maquina]
+    python almacen.py resumen [--db resultados.sqlite]
+"""
+
+from __future__ import annotations
+import argparse
+import csv
+import hashlib
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional, Sequence
+
+RESULTADOS_DB = "resultados.sqlite"
+
+# Módulos cuyo contenido determina la versión del código de los resultados: el
+# núcleo y cada motor que experimentos.py mide (SAT, TD, REGLAS, domwdeg/FC+R,
+# simetría). Un motor nuevo en experimentos.py debe añadir aquí su módulo.
+FICHEROS_RESOLUTOR = ("algoritmos.py", "sudoku_csp.py", "variable.py", "tablero.py",
+                      "sat.py", "todos_distintos.py", "reglas.py", "heuristicas.py", "simetria.py")
+
+# Heurísticas de la búsqueda actual (selección de variable y orden de valores)
+HEURISTICAS_POR_DEFECTO = "mrv"
+
+# Columnas del CSV (las mismas que experimentos.guardar_csv)
+CAMPOS_CSV = [
+    'nombre', 'algoritmo', 'tiempo_ms', 'tiempo_total_ms', 'nodos',
+    'exito', 'solucion_valida', 'limite_excedido', 'ac3_aplicado', 'tiempo_ac3_ms', 'pre_reduccion',
+    'huella_maquina', 'aislado', 'cpu_mhz'
+]
+
+# Columnas opcionales de memoria (experimentos.py --memoria)
+CAMPOS_MEMORIA = ['mem_pico_kb', 'mem_retenida_kb', 'bloques_netos', 'rss_delta_kb', 'bytes_pico_por_nodo']
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS resultados (
+    hash_sudoku      TEXT    NOT NULL,
+    algoritmo        TEXT    NOT NULL,
+    pre_reduccion    INTEGER NOT NULL,
+    heuristicas      TEXT    NOT NULL,
+    max_nodos        INTEGER NOT NULL,
+    version_codigo   TEXT    NOT NULL,
+    huella_maquina   TEXT    NOT NULL,
+    aislado          INTEGER NOT NULL,
+    cpu_mhz          REAL,
+    nombre           TEXT    NOT NULL,
+    tiempo_ms        REAL,
+    tiempo_total_ms  REAL,
+    tiempo_ac3_ms    REAL,
+    nodos            INTEGER,
+    exito            INTEGER,
+    solucion_valida  INTEGER,
+    limite_excedido  INTEGER,
+    ac3_aplicado     INTEGER,
+    mem_pico_kb      REAL,
+    mem_retenida_kb  REAL,
+    bloques_netos    INTEGER,
+    rss_delta_kb     INTEGER,
+    bytes_pico_por_nodo REAL,
+    fecha            TEXT    NOT NULL,
+    PRIMARY KEY (hash_sudoku, algoritmo, pre_reduccion, heuristicas, max_nodos, version_codigo,
+                 huella_maquina, aislado)
+)
+"""
+
+
+def hash_sudoku(tablero) -> str:
+    """Hash (SHA-1) de las 81 celdas iniciales del tablero."""
+    celdas = ''.join(''.join(fila) for fila in tablero.getTablero())
+    return hashlib.sha1(celdas.encode('ascii')).hexdigest()
+
+
+def version_codigo(ficheros: Sequence[str] = FICHEROS_RESOLUTOR) -> str:
+    """Hash corto del contenido de los módulos del resolutor."""
+    carpeta = os.path.dirname(os.path.abspath(__file__))
+    h = hashlib.sha1()
+    for nombre in ficheros:
+        ruta = os.path.join(carpeta, nombre)
+        h.update(nombre.encode('utf-8'))
+        if os.path.exists(ruta):
+            with open(ruta, 'rb') as f:
+                h.update(f.read())
+    return h.hexdigest()[:12]
+
+
+class AlmacenResultados:
+    """
+    Resultados de experimentos en SQLite, escritos fila a fila.
+    """
+
+    def __init__(self, ruta: str = RESULTADOS_DB, version: Optional[str] = None):
+        """
+        Args:
+            ruta (str): Fichero de la base de datos (se crea si no existe)
+            version (str | None): Versión del código; por defecto `version_codigo()`
+        """
+        self.ruta = ruta
+        self.version = version or version_codigo()
+        self._conexion = sqlite3.connect(ruta)
+        self._conexion.row_factory = sqlite3.Row
+        self._conexion.execute(_ESQUEMA)
+        self._migrar()
+        self._conexion.commit()
+
+    def _columnas(self) -> List[str]:
+        return [fila[1] for fila in self._conexion.execute("PRAGMA table_info(resultados)")]
+
+    def _migrar(self) -> None:
+        """Adapta bases de datos creadas por versiones anteriores de este módulo."""
+        existentes = self._columnas()
+        for campo in CAMPOS_MEMORIA:
+            if campo not in existentes:
+                self._conexion.execute(f"ALTER TABLE resultados ADD COLUMN {campo} REAL")
+        existentes = self._columnas()
+        if 'huella_maquina' not in existentes:
+            # La huella y el aislamiento forman parte de la clave: hay que
+            # reconstruir la tabla (las filas antiguas quedan con huella '')
+            columnas = ', '.join(existentes)
+            self._conexion.executescript(
+                "ALTER TABLE resultados RENAME TO resultados_anterior;"
+                + _ESQUEMA + ";"
+                f"INSERT INTO resultados ({columnas}, huella_maquina, aislado) "
+                f"SELECT {columnas}, '', 0 FROM resultados_anterior;"
+                "DROP TABLE resultados_anterior;")
+
+    def buscar(self, hash_tab: str, algoritmo: str, pre_reduccion: bool, max_nodos: int,
+               heuristicas: str = HEURISTICAS_POR_DEFECTO, con_memoria: bool = False,
+               huella: str = '', aislado: bool = False) -> Optional[Dict]:
+        """
+        Fila almacenada para esa configuración, la versión actual del código y
+        la misma máquina (huella) y modo de aislamiento, o None. Con
+        `con_memoria`, las filas sin columnas de memoria cuentan como ausentes.
+        """
+        fila = self._conexion.execute(
+            "SELECT * FROM resultados WHERE hash_sudoku=? AND algoritmo=? AND pre_reduccion=? "
+            "AND heuristicas=? AND max_nodos=? AND version_codigo=? AND huella_maquina=? AND aislado=?",
+            (hash_tab, algoritmo, int(pre_reduccion), heuristicas, max_nodos, self.version,
+             huella, int(aislado))).fetchone()
+        if fila is None or (con_memoria and fila['mem_pico_kb'] is None):
+            return None
+        resultado = {campo: fila[campo] for campo in CAMPOS_CSV}
+        if fila['mem_pico_kb'] is not None:
+            resultado.update({campo: fila[campo] for campo in CAMPOS_MEMORIA})
+        return resultado
+
+    def guardar(self, hash_tab: str, fila: Dict, max_nodos: int,
+                heuristicas: str = HEURISTICAS_POR_DEFECTO) -> None:
+        """Inserta (o reemplaza) una fila y la confirma en disco inmediatamente."""
+        valores = {campo: fila[campo] for campo in CAMPOS_CSV}
+        valores.update({campo: fila.get(campo) for campo in CAMPOS_MEMORIA})
+        valores.update({'hash_sudoku': hash_tab, 'heuristicas': heuristicas, 'max_nodos': max_nodos,
+                        'version_codigo': self.version, 'fecha': time.strftime('%Y-%m-%d %H:%M:%S')})
+        columnas = ', '.join(valores)
+        marcas = ', '.join('?' for _ in valores)
+        with self._conexion:
+            self._conexion.execute(f"INSERT OR REPLACE INTO resultados ({columnas}) VALUES ({marcas})",
+                                   tuple(valores.values()))
+
+    def filas(self, todas_versiones: bool = False, huella: Optional[str] = None) -> List[Dict]:
+        """
+        Filas almacenadas (de la versión actual salvo `todas_versiones`; solo
+        de la máquina `huella` si se indica).
+        """
+        condiciones, parametros = [], []
+        if not todas_versiones:
+            condiciones.append("version_codigo=?")
+            parametros.append(self.version)
+        if huella is not None:
+            condiciones.append("huella_maquina=?")
+            parametros.append(huella)
+        consulta = "SELECT * FROM resultados"
+        if condiciones:
+            consulta += " WHERE " + " AND ".join(condiciones)
+        consulta += " ORDER BY pre_reduccion DESC, nombre, algoritmo, fecha"
+        return [dict(fila) for fila in self._conexion.execute(consulta, tuple(parametros))]
+
+    def exportar_csv(self, csv_file: str, todas_versiones: bool = False, huella: Optional[str] = None) -> int:
+        """
+        Vuelca las filas al formato de `resultados.csv`.
+
+        Returns:
+            int: Número de filas escritas
+        """
+        filas = self.filas(todas_versiones, huella)
+        campos = CAMPOS_CSV + (CAMPOS_MEMORIA if any(f['mem_pico_kb'] is not None for f in filas) else [])
+        with open(csv_file, 'w', newline='', encoding='utf-8') as f:
+            w = csv.DictWriter(f, fieldnames=campos, extrasaction='ignore')
+            w.writeheader()
+            w.writerows(filas)
+        return len(filas)
+
+    def versiones(self) -> List[tuple]:
+        """[(version_codigo, filas, fecha de la última)] ordenadas por fecha."""
+        return [tuple(f) for f in self._conexion.execute(
+            "SELECT version_codigo, COUNT(*), MAX(fecha) FROM resultados GROUP BY version_codigo ORDER BY 3")]
+
+    def cerrar(self) -> None:
+        self._conexion.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Almacén SQLite de resultados de experimentos')
+    parser.add_argument('--db', default=RESULTADOS_DB, help='Base de datos de resultados')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    p_exp = sub.add_parser('exportar', help='Exportar las filas a CSV (formato de resultados.csv)')
+    p_exp.add_argument('csv', nargs='?', default='resultados.csv')
+    p_exp.add_argument('--todas-versiones', action='store_true', help='Incluir filas de versiones anteriores del código')
+    p_exp.add_argument('--esta-maquina', action='store_true', help='Solo filas medidas en esta máquina (misma huella)')
+    sub.add_parser('resumen', help='Filas almacenadas por versión del código')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        raise SystemExit(f"No existe la base de datos {args.db}")
+    almacen = AlmacenResultados(args.db)
+    if args.comando == 'exportar':
+        huella = None
+        if args.esta_maquina:
+            from info_sistema import huella_maquina
+            huella = huella_maquina()['huella']
+        n = almacen.exportar_csv(args.csv, todas_versiones=args.todas_versiones, huella=huella)
+        print(f"{n} filas exportadas a {args.csv} (versión {almacen.version})")
+    else:
+        print(f"Versión actual del código: {almacen.version}")
+        for version, n, ultima in almacen.versiones():
+            marca = ' (actual)' if version == almacen.version else ''
+            print(f"  {version}: {n} filas, última {ultima}{marca}")
+    almacen.cerrar()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""
+Auditoría del tiempo de arranque (importación) de los módulos
+=============================================================
+
+Importa cada módulo en un intérprete nuevo con `python -X importtime`, toma la
+mediana del tiempo acumulado de su importación y lo compara con un
+presupuesto. También comprueba que el núcleo del resolutor no arrastre
+dependencias pesadas u opcionales (pygame, matplotlib, argparse, json...):
+esas deben importarse de forma perezosa, dentro de la función que las usa.
+
+Sale con código 1 si algún módulo supera su presupuesto o importa un módulo
+prohibido, de modo que sirve como comprobación de regresiones de arranque.
+
+Uso:
+    python arranque.py
+    python arranque.py --modulos algoritmos resolver --repeticiones 15 --top 5
+    python arranque.py --factor 1.5 --presupuesto algoritmos=2.5 --json arranque.json
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Presupuesto (ms) del tiempo acumulado de importación de cada módulo.
+# Unas 3 veces la mediana medida en un árbol limpio (variable/tablero ~0.2,
+# sudoku_csp ~1.0, algoritmos ~1.5, resolver ~2.0 ms): el ruido entre máquinas
+# y ejecuciones no debe hacer fallar la auditoría, pero sí una importación no
+# perezosa (json o argparse solos cuestan ~8-10 ms).
+PRESUPUESTOS_MS: Dict[str, float] = {
+    'variable': 1.5,
+    'tablero': 1.5,
+    'sudoku_csp': 3.0,
+    'algoritmos': 5.0,
+    'resolver': 7.0,
+}
+
+# Módulos que el núcleo no debe importar al cargarse
+PROHIBIDOS = ('pygame', 'matplotlib', 'numpy', 'psutil', 'argparse', 'json',
+              'subprocess', 'threading', 're', 'copy', 'collections')
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+
+def _entorno():
+    """Entorno del subproceso: con caché de bytecode para medir el arranque real."""
+    entorno = dict(os.environ)
+    entorno.pop('PYTHONDONTWRITEBYTECODE', None)
+    entorno['PYTHONPATH'] = DIRECTORIO + os.pathsep + entorno.get('PYTHONPATH', '')
+    return entorno
+
+
+def analizar_importtime(salida: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Interpreta la salida de `-X importtime`.
+
+    Returns:
+        list: [(modulo, profundidad, propio_us, acumulado_us)] en el orden del informe
+    """
+    filas = []
+    for linea in salida.splitlines():
+        if not linea.startswith('import time:'):
+            continue
+        partes = linea[len('import time:'):].split('|')
+        if len(partes) != 3 or not partes[0].strip().isdigit():
+            continue  # cabecera
+        nombre = partes[2].rstrip()
+        sangria = len(nombre) - len(nombre.lstrip())
+        filas.append((nombre.strip(), (sangria - 1) // 2, int(partes[0]), int(partes[1])))
+    return filas
+
+
+def subarbol(filas: List[Tuple[str, int, int, int]], modulo: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Filas de la importación de `modulo` (la suya y las de los módulos que
+    carga), sin las del arranque del intérprete. En el informe de importtime
+    los hijos aparecen justo antes que su padre y con más sangría.
+    """
+    for i, (nombre, prof, _, _) in enumerate(filas):
+        if nombre == modulo and prof == 0:
+            inicio = i
+            while inicio > 0 and filas[inicio - 1][1] > 0:
+                inicio -= 1
+            return filas[inicio:i + 1]
+    raise RuntimeError(f"{modulo} no aparece en la salida de -X importtime")
+
+
+def medir_importacion(modulo: str, repeticiones: int = 9) -> Dict:
+    """
+    Mide la importación de `modulo` en `repeticiones` intérpretes nuevos (tras
+    uno de calentamiento que genera los .pyc).
+
+    Returns:
+        dict: {'modulo', 'mediana_ms', 'min_ms', 'max_ms', 'importados', 'mas_costosos'}
+    """
+    comando = [sys.executable, '-X', 'importtime', '-c', f'import {modulo}']
+    entorno = _entorno()
+    subprocess.run(comando, capture_output=True, env=entorno, cwd=DIRECTORIO)
+
+    acumulados = []
+    propios: Dict[str, List[int]] = {}
+    importados = set()
+    for _ in range(repeticiones):
+        proc = subprocess.run(comando, capture_output=True, text=True, env=entorno, cwd=DIRECTORIO)
+        if proc.returncode != 0:
+            raise RuntimeError(f"No se pudo importar {modulo}:\n{proc.stderr.strip()}")
+        filas = subarbol(analizar_importtime(proc.stderr), modulo)
+        acumulados.append(filas[-1][3])
+        for nombre, _, propio, _ in filas:
+            importados.add(nombre)
+            propios.setdefault(nombre, []).append(propio)
+
+    acumulados.sort()
+    mas_costosos = sorted(((sorted(v)[len(v) // 2] / 1000, k) for k, v in propios.items()), reverse=True)
+    return {
+        'modulo': modulo,
+        'mediana_ms': acumulados[len(acumulados) // 2] / 1000,
+        'min_ms': acumulados[0] / 1000,
+        'max_ms': acumulados[-1] / 1000,
+        'importados': sorted(importados),
+        'mas_costosos': [(nombre, round(ms, 3)) for ms, nombre in mas_costosos],
+    }
+
+
+def auditar(modulos: Sequence[str], presupuestos: Dict[str, float], factor: float = 1.0,
+            repeticiones: int = 9) -> List[Dict]:
+    """
+    Mide cada módulo y lo compara con su presupuesto (multiplicado por
+    `factor`) y con la lista de módulos prohibidos.
+
+    Returns:
+        list[dict]: Una fila por módulo con 'presupuesto_ms', 'prohibidos' y 'ok'
+    """
+    filas = []
+    for modulo in modulos:
+        r = medir_importacion(modulo, repeticiones)
+        presupuesto = presupuestos.get(modulo)
+        limite = presupuesto * factor if presupuesto is not None else None
+        r['presupuesto_ms'] = limite
+        r['prohibidos'] = []
+        if presupuesto is not None:
+            r['prohibidos'] = [m for m in r['importados'] if m.split('.')[0] in PROHIBIDOS]
+        r['ok'] = (limite is None or r['mediana_ms'] <= limite) and not r['prohibidos']
+        filas.append(r)
+    return filas
+
+
+def _leer_presupuestos(pares: Optional[Sequence[str]]) -> Dict[str, float]:
+    presupuestos = dict(PRESUPUESTOS_MS)
+    for par in pares or []:
+        modulo, _, valor = par.partition('=')
+        try:
+            presupuestos[modulo] = float(valor)
+        except ValueError:
+            raise SystemExit(f"Presupuesto no válido: {par} (formato modulo=ms)")
+    return presupuestos
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Auditoría del tiempo de importación con presupuesto por módulo')
+    parser.add_argument('--modulos', nargs='*', help='Módulos a auditar (por defecto los que tienen presupuesto)')
+    parser.add_argument('--repeticiones', type=int, default=9, help='Intérpretes medidos por módulo')
+    parser.add_argument('--presupuesto', nargs='*', metavar='MODULO=MS', help='Sobrescribir presupuestos')
+    parser.add_argument('--factor', type=float, default=1.0, help='Tolerancia multiplicativa sobre los presupuestos')
+    parser.add_argument('--top', type=int, default=0, help='Mostrar los N submódulos con más tiempo propio')
+    parser.add_argument('--json', help='Guardar el resultado en este fichero JSON')
+    args = parser.parse_args(argv)
+
+    presupuestos = _leer_presupuestos(args.presupuesto)
+    modulos = args.modulos or list(presupuestos)
+    filas = auditar(modulos, presupuestos, factor=args.factor, repeticiones=args.repeticiones)
+
+    print(f"{'modulo':14} {'mediana ms':>10} {'min ms':>8} {'max ms':>8} {'presupuesto':>11}  estado")
+    for r in filas:
+        presupuesto = f"{r['presupuesto_ms']:.2f}" if r['presupuesto_ms'] is not None else '-'
+        estado = 'OK' if r['ok'] else 'EXCEDIDO'
+        if r['prohibidos']:
+            estado = f"PROHIBIDO: {', '.join(r['prohibidos'])}"
+        print(f"{r['modulo']:14} {r['mediana_ms']:10.3f} {r['min_ms']:8.3f} {r['max_ms']:8.3f} {presupuesto:>11}  {estado}")
+        for nombre, ms in r['mas_costosos'][:args.top]:
+            print(f"    {nombre:30} {ms:8.3f} ms propios")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(filas, f, indent=1)
+        print(f"\nResultados guardados en: {args.json}")
+
+    fallos = [r['modulo'] for r in filas if not r['ok']]
+    if fallos:
+        print(f"\nRegresión de arranque en: {', '.join(fallos)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
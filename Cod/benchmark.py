@@ -0,0 +1,286 @@
+"""
+Utilidades de medición para benchmarks
+======================================
+
+Mide funciones de forma repetida (con calentamiento previo y control del
+recolector de basura) y resume las muestras con estadísticos robustos:
+mediana, rango intercuartílico (IQR), mínimo e intervalo de confianza de la
+mediana. Una medición se marca como inestable cuando su dispersión relativa
+(IQR / mediana) supera un umbral.
+
+`medir_memoria` mide una ejecución con tracemalloc (pico de memoria, bloques
+netos y variación de RSS) para `experimentos.py --memoria`.
+
+Lo usa `experimentos.py --benchmark`; las muestras en bruto se guardan junto
+a los resúmenes para poder comparar versiones del código con rigor.
+"""
+
+from __future__ import annotations
+import csv
+import gc
+import json
+import math
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Dispersión relativa (IQR / mediana) a partir de la cual se avisa de inestabilidad
+UMBRAL_INESTABLE = 0.10
+# Con menos muestras no tiene sentido hablar de estabilidad
+MIN_MUESTRAS_ESTABLES = 5
+
+
+class GCControlado:
+    """
+    Gestor de contexto que fuerza una recolección completa y desactiva el GC
+    durante la región cronometrada, restaurando después el estado original.
+
+    Con `congelar=True` el GC sigue activo pero los objetos existentes se
+    mueven a la generación permanente (gc.freeze), de modo que las
+    recolecciones que ocurran durante la medición solo recorren los objetos
+    creados en ella.
+    """
+
+    def __init__(self, activo: bool = True, congelar: bool = False):
+        self.activo = activo
+        self.congelar = congelar
+        self._estaba_activo = False
+
+    def __enter__(self):
+        if self.activo:
+            self._estaba_activo = gc.isenabled()
+            gc.collect()
+            if self.congelar:
+                gc.freeze()
+            else:
+                gc.disable()
+        return self
+
+    def __exit__(self, *exc):
+        if self.activo:
+            if self.congelar:
+                gc.unfreeze()
+            elif self._estaba_activo:
+                gc.enable()
+        return False
+
+
+# Modos de GC en las regiones cronometradas
+MODOS_GC = ('desactivar', 'congelar')
+
+
+def control_gc(modo: Optional[str]) -> GCControlado:
+    """GCControlado para un modo de MODOS_GC (None = no tocar el GC)."""
+    if modo is not None and modo not in MODOS_GC:
+        raise ValueError(f"Modo de GC desconocido: {modo}")
+    return GCControlado(activo=modo is not None, congelar=modo == 'congelar')
+
+
+class EntornoAislado:
+    """
+    Aísla el proceso durante un experimento: lo fija a unos núcleos
+    (os.sched_setaffinity, donde exista) y fija el modo de GC de las regiones
+    cronometradas. Al salir restaura la afinidad original.
+    """
+
+    def __init__(self, nucleos: Optional[Sequence[int]] = None, modo_gc: str = 'desactivar'):
+        """
+        Args:
+            nucleos: Núcleos a usar. Por defecto, el último de los disponibles
+                (suele ser el menos cargado por el sistema)
+            modo_gc (str): 'desactivar' o 'congelar'
+        """
+        if modo_gc not in MODOS_GC:
+            raise ValueError(f"Modo de GC desconocido: {modo_gc}")
+        self.modo_gc = modo_gc
+        self._pedidos = list(nucleos) if nucleos else None
+        self._afinidad_original = None
+        self.nucleos: Optional[List[int]] = None
+
+    def __enter__(self):
+        if hasattr(os, 'sched_setaffinity'):
+            self._afinidad_original = os.sched_getaffinity(0)
+            nucleos = self._pedidos or [max(self._afinidad_original)]
+            os.sched_setaffinity(0, nucleos)
+            self.nucleos = sorted(os.sched_getaffinity(0))
+        else:
+            print("Aviso: este sistema no permite fijar la afinidad de CPU; solo se controla el GC.")
+        return self
+
+    def __exit__(self, *exc):
+        if self._afinidad_original is not None:
+            os.sched_setaffinity(0, self._afinidad_original)
+        return False
+
+    def descripcion(self) -> Dict[str, Any]:
+        return {'nucleos': self.nucleos, 'modo_gc': self.modo_gc}
+
+
+def rss_kb() -> Optional[int]:
+    """
+    Memoria residente (RSS) actual del proceso en KB: /proc/self/statm en
+    Linux o psutil si está instalado; None si no hay forma de obtenerla.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, AttributeError, IndexError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss // 1024
+
+
+def medir_memoria(funcion: Callable[[], Any]) -> Tuple[Dict[str, Any], Any]:
+    """
+    Ejecuta `funcion` una vez con tracemalloc activo. Es mucho más lento que
+    una ejecución normal, así que no debe cronometrarse a la vez.
+
+    Returns:
+        tuple: (dict con 'mem_pico_kb' (pico de memoria trazada durante la
+        ejecución), 'mem_retenida_kb' (lo que sigue vivo al terminar tras
+        recolectar los ciclos, p.ej. el resultado), 'bloques_netos' (variación de sys.getallocatedblocks) y
+        'rss_delta_kb' (variación de RSS, None si no se puede medir);
+        resultado de la función)
+    """
+    import tracemalloc
+
+    gc.collect()
+    rss_antes = rss_kb()
+    bloques_antes = sys.getallocatedblocks()
+    tracemalloc.start()
+    try:
+        resultado = funcion()
+        gc.collect()  # la basura en ciclos no cuenta como memoria retenida
+        retenida, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    bloques = sys.getallocatedblocks() - bloques_antes
+    rss_despues = rss_kb()
+    return {
+        'mem_pico_kb': round(pico / 1024, 1),
+        'mem_retenida_kb': round(retenida / 1024, 1),
+        'bloques_netos': bloques,
+        'rss_delta_kb': rss_despues - rss_antes if rss_antes is not None and rss_despues is not None else None,
+    }, resultado
+
+
+def medir(funcion: Callable[[], Any], repeticiones: int = 10, warmup: int = 1,
+          controlar_gc: bool = True, modo_gc: str = 'desactivar') -> Tuple[List[float], Any]:
+    """
+    Ejecuta `funcion` `warmup` veces sin medir y después `repeticiones` veces
+    midiendo cada ejecución con `time.perf_counter`.
+
+    Args:
+        funcion: Callable sin argumentos a medir.
+        repeticiones (int): Número de muestras cronometradas (>= 1).
+        warmup (int): Ejecuciones previas descartadas.
+        controlar_gc (bool): Si True, recolecta y controla el GC en cada muestra.
+        modo_gc (str): 'desactivar' (por defecto) o 'congelar' (ver GCControlado).
+
+    Returns:
+        tuple: (lista de tiempos en ms, resultado de la última ejecución)
+    """
+    if repeticiones < 1:
+        raise ValueError("repeticiones debe ser >= 1")
+    resultado = None
+    for _ in range(max(0, warmup)):
+        resultado = funcion()
+    muestras: List[float] = []
+    for _ in range(repeticiones):
+        with control_gc(modo_gc if controlar_gc else None):
+            t0 = time.perf_counter()
+            resultado = funcion()
+            t1 = time.perf_counter()
+        muestras.append((t1 - t0) * 1000)
+    return muestras, resultado
+
+
+def percentil(ordenadas: Sequence[float], p: float) -> float:
+    """Percentil `p` (0..100) con interpolación lineal sobre una secuencia ordenada."""
+    if not ordenadas:
+        raise ValueError("secuencia vacía")
+    if len(ordenadas) == 1:
+        return float(ordenadas[0])
+    pos = (len(ordenadas) - 1) * p / 100.0
+    i = int(math.floor(pos))
+    j = min(i + 1, len(ordenadas) - 1)
+    frac = pos - i
+    return ordenadas[i] + (ordenadas[j] - ordenadas[i]) * frac
+
+
+def intervalo_mediana(ordenadas: Sequence[float], z: float = 1.96) -> Tuple[float, float]:
+    """
+    Intervalo de confianza no paramétrico de la mediana basado en estadísticos
+    de orden (aproximación normal de la binomial). Con `z=1.96` es el IC al 95%.
+    Con pocas muestras el intervalo degenera en [mínimo, máximo].
+    """
+    n = len(ordenadas)
+    if n == 0:
+        raise ValueError("secuencia vacía")
+    semiancho = z * math.sqrt(n) / 2.0
+    inf = int(math.floor(n / 2.0 - semiancho))
+    sup = int(math.ceil(n / 2.0 + semiancho))
+    inf = max(0, inf)
+    sup = min(n - 1, sup)
+    return float(ordenadas[inf]), float(ordenadas[sup])
+
+
+def resumir(muestras: Sequence[float], umbral_inestable: float = UMBRAL_INESTABLE) -> Dict[str, Any]:
+    """
+    Resume una lista de tiempos (ms).
+
+    Returns:
+        dict: {
+            'repeticiones', 'mediana_ms', 'min_ms', 'max_ms', 'q1_ms', 'q3_ms',
+            'iqr_ms', 'iqr_rel', 'ic95_inf_ms', 'ic95_sup_ms', 'inestable'
+        }
+    """
+    ordenadas = sorted(muestras)
+    mediana = percentil(ordenadas, 50)
+    q1 = percentil(ordenadas, 25)
+    q3 = percentil(ordenadas, 75)
+    iqr = q3 - q1
+    iqr_rel = iqr / mediana if mediana > 0 else 0.0
+    ic_inf, ic_sup = intervalo_mediana(ordenadas)
+    inestable = len(ordenadas) < MIN_MUESTRAS_ESTABLES or iqr_rel > umbral_inestable
+    return {
+        'repeticiones': len(ordenadas),
+        'mediana_ms': round(mediana, 4),
+        'min_ms': round(ordenadas[0], 4),
+        'max_ms': round(ordenadas[-1], 4),
+        'q1_ms': round(q1, 4),
+        'q3_ms': round(q3, 4),
+        'iqr_ms': round(iqr, 4),
+        'iqr_rel': round(iqr_rel, 4),
+        'ic95_inf_ms': round(ic_inf, 4),
+        'ic95_sup_ms': round(ic_sup, 4),
+        'inestable': int(inestable),
+    }
+
+
+CAMPOS_RESUMEN = [
+    'nombre', 'algoritmo', 'pre_reduccion', 'nodos', 'exito', 'limite_excedido',
+    'repeticiones', 'warmup', 'mediana_ms', 'min_ms', 'max_ms', 'q1_ms', 'q3_ms',
+    'iqr_ms', 'iqr_rel', 'ic95_inf_ms', 'ic95_sup_ms', 'inestable',
+    'huella_maquina', 'aislado', 'cpu_mhz',
+]
+
+
+def guardar_benchmark(filas: List[Dict[str, Any]], csv_file: str, json_file: str,
+                      metadatos: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Guarda los resúmenes en CSV y los resúmenes junto con las muestras en bruto
+    ('muestras_ms') en JSON.
+    """
+    with open(csv_file, 'w', newline='', encoding='utf-8') as f:
+        w = csv.DictWriter(f, fieldnames=CAMPOS_RESUMEN, extrasaction='ignore')
+        w.writeheader()
+        for fila in filas:
+            w.writerow(fila)
+    with open(json_file, 'w', encoding='utf-8') as f:
+        json.dump({'metadatos': metadatos or {}, 'resultados': filas}, f, indent=1, ensure_ascii=False)
+    print(f"\nBenchmark guardado en: {csv_file} (resúmenes) y {json_file} (con muestras)")
@@ -0,0 +1,235 @@
+"""
+Búsqueda local por mínimos conflictos
+=====================================
+
+Los demás motores (BT, FC, MAC) recorren un árbol y pueden demostrar que no
+hay solución. Este es incompleto: parte de un tablero lleno y lo va
+reparando. Cada bloque 3x3 se mantiene siempre como una permutación de 1..9
+(sus celdas fijas no se mueven), así que solo puede haber conflictos en filas
+y columnas, y un movimiento es intercambiar dos celdas libres del mismo
+bloque. Solo se admiten intercambios que dejan cada valor dentro del dominio
+inicial de su celda (reducido por los valores fijos).
+
+El coste es el número de repeticiones en filas y columnas (0 = solución). Se
+mantienen, de forma incremental, cuántas veces aparece cada dígito en cada
+fila y columna, de modo que evaluar un intercambio cuesta O(1). En cada paso
+se elige al azar una celda en conflicto y:
+- con probabilidad `prob_paseo`, se intercambia con otra celda libre de su
+  bloque al azar (paseo aleatorio, para salir de mínimos locales);
+- si no, se hace el mejor intercambio de esa celda dentro de su bloque que no
+  sea tabú (las parejas intercambiadas hace menos de `tenencia` pasos), salvo
+  que mejore el mejor coste visto (aspiración). Empates al azar.
+
+Si el mejor coste no mejora en `paciencia` pasos, se rellenan de nuevo los
+bloques al azar (reinicio). Un paso cuenta como un nodo en las estadísticas.
+"""
+
+from sudoku_csp import SudokuCSP
+
+
+def _celdas_bloque(b):
+    f0, c0 = b // 3 * 3, b % 3 * 3
+    return [(f, c) for f in range(f0, f0 + 3) for c in range(c0, c0 + 3)]
+
+
+def _rellenar_bloque(libres, dominios, faltan, aleatorio):
+    """
+    Asigna a las celdas `libres` de un bloque los dígitos `faltan` (uno por
+    celda) respetando sus dominios, en orden aleatorio.
+
+    Returns:
+        list[int] | None: Dígito de cada celda libre, o None si es imposible
+    """
+    orden = list(faltan)
+    aleatorio.shuffle(orden)
+    asignados = [0] * len(libres)
+    usados = set()
+
+    def colocar(i):
+        if i == len(libres):
+            return True
+        for d in orden:
+            if d not in usados and d in dominios[i]:
+                usados.add(d)
+                asignados[i] = d
+                if colocar(i + 1):
+                    return True
+                usados.discard(d)
+        return False
+
+    return asignados if colocar(0) else None
+
+
+def min_conflictos(tablero, max_pasos=None, dominios=None, semilla=0, prob_paseo=0.1, tenencia=10,
+                   paciencia=200, progreso=None):
+    """
+    Busca una solución por mínimos conflictos con lista tabú y paseo aleatorio.
+
+    Args:
+        tablero (Tablero): Tablero inicial del Sudoku (no se modifica).
+        max_pasos (int|None): Límite de pasos (cada paso cuenta como un nodo). Si None, sin límite.
+        dominios (list[list[list[str]]] | None): Dominios iniciales opcionales (p. ej. tras AC3).
+        semilla (int): Semilla del generador aleatorio (la misma semilla repite la ejecución).
+        prob_paseo (float): Probabilidad de hacer un intercambio al azar en un paso.
+        tenencia (int): Pasos durante los que una pareja intercambiada es tabú.
+        paciencia (int): Pasos sin mejorar el mejor coste antes de rellenar de nuevo.
+        progreso (CanalProgreso|None): Canal al que publicar el avance (la
+            profundidad publicada es el coste actual); permite cancelar.
+
+    Returns:
+        dict: {
+            'exito': bool,
+            'nodos': int (pasos dados),
+            'limite_excedido': bool,
+            'cancelado': bool,
+            'reinicios': int,
+            'conflictos': int (coste final; 0 si exito=True),
+            'tablero': Tablero (copia resuelta si exito=True)
+        }
+
+    Una búsqueda local no puede demostrar que no hay solución: si ningún
+    bloque admite una permutación compatible con los dominios se devuelve
+    exito=False sin pasos; en otro caso, sin límite de pasos no termina.
+    """
+    import random
+
+    aleatorio = random.Random(semilla)
+    tablero_copia = tablero.copia()
+    csp = SudokuCSP(tablero_copia, dominios=dominios)
+    resultado = {'exito': False, 'nodos': 0, 'limite_excedido': False, 'cancelado': False,
+                 'reinicios': 0, 'conflictos': 0, 'tablero': None}
+    if not csp.fijas_consistentes():
+        return resultado
+
+    variables = csp.variables
+    valores = [[int(variables[f][c].valor) for c in range(9)] for f in range(9)]
+    dominio = [[{int(d) for d in variables[f][c].dominio} for c in range(9)] for f in range(9)]
+    # Celdas libres de cada bloque y, para cada celda libre, su bloque
+    libres_bloque = []
+    bloque_de = {}
+    for b in range(9):
+        celdas = [(f, c) for f, c in _celdas_bloque(b) if not variables[f][c].es_fija]
+        libres_bloque.append(celdas)
+        for celda in celdas:
+            bloque_de[celda] = b
+    libres = list(bloque_de)
+
+    def rellenar():
+        for b, celdas in enumerate(libres_bloque):
+            fijos = {valores[f][c] for f, c in _celdas_bloque(b) if variables[f][c].es_fija}
+            faltan = [d for d in range(1, 10) if d not in fijos]
+            asignados = _rellenar_bloque(celdas, [dominio[f][c] for f, c in celdas], faltan, aleatorio)
+            if asignados is None:
+                return False
+            for (f, c), d in zip(celdas, asignados):
+                valores[f][c] = d
+        return True
+
+    def recontar():
+        cuenta_fila = [[0] * 10 for _ in range(9)]
+        cuenta_columna = [[0] * 10 for _ in range(9)]
+        for f in range(9):
+            for c in range(9):
+                cuenta_fila[f][valores[f][c]] += 1
+                cuenta_columna[c][valores[f][c]] += 1
+        coste = sum(n - 1 for cuenta in cuenta_fila + cuenta_columna for n in cuenta if n > 1)
+        return cuenta_fila, cuenta_columna, coste
+
+    def delta(cuenta, i, j, a, b):
+        """Cambio de coste en las líneas i y j (filas o columnas) al mover a de i a j y b de j a i."""
+        if i == j:
+            return 0
+        ci, cj = cuenta[i], cuenta[j]
+        # Quitar a de i y ponerlo en j; quitar b de j y ponerlo en i (a != b)
+        return ((ci[a] <= 1) - 1) + (cj[a] >= 1) + ((cj[b] <= 1) - 1) + (ci[b] >= 1)
+
+    if not rellenar():
+        return resultado
+    cuenta_fila, cuenta_columna, coste = recontar()
+    mejor_coste = coste
+    sin_mejora = 0
+    tabu = {}
+    pasos = 0
+
+    while coste > 0:
+        if max_pasos is not None and pasos >= max_pasos:
+            resultado['limite_excedido'] = True
+            break
+        pasos += 1
+        if progreso is not None and pasos % progreso.intervalo == 0:
+            for f, c in libres:
+                variables[f][c].valor = str(valores[f][c])
+            if progreso.notificar(pasos, coste, csp):
+                resultado['cancelado'] = True
+                break
+
+        en_conflicto = [(f, c) for f, c in libres
+                        if cuenta_fila[f][valores[f][c]] > 1 or cuenta_columna[c][valores[f][c]] > 1]
+        f1, c1 = aleatorio.choice(en_conflicto)
+        v1 = valores[f1][c1]
+        candidatos = []
+        for f2, c2 in libres_bloque[bloque_de[(f1, c1)]]:
+            v2 = valores[f2][c2]
+            if (f2, c2) != (f1, c1) and v2 in dominio[f1][c1] and v1 in dominio[f2][c2]:
+                candidatos.append((f2, c2, v2))
+        movimiento = None
+        if candidatos and aleatorio.random() < prob_paseo:
+            f2, c2, v2 = aleatorio.choice(candidatos)
+            movimiento = (f2, c2, v2, delta(cuenta_fila, f1, f2, v1, v2) + delta(cuenta_columna, c1, c2, v1, v2))
+        elif candidatos:
+            elegidos, mejor_cambio = [], None
+            for f2, c2, v2 in candidatos:
+                cambio = delta(cuenta_fila, f1, f2, v1, v2) + delta(cuenta_columna, c1, c2, v1, v2)
+                pareja = (f1 * 9 + c1, f2 * 9 + c2) if f1 * 9 + c1 < f2 * 9 + c2 else (f2 * 9 + c2, f1 * 9 + c1)
+                if tabu.get(pareja, 0) > pasos and coste + cambio >= mejor_coste:
+                    continue
+                if mejor_cambio is None or cambio < mejor_cambio:
+                    elegidos, mejor_cambio = [(f2, c2, v2)], cambio
+                elif cambio == mejor_cambio:
+                    elegidos.append((f2, c2, v2))
+            if elegidos:
+                movimiento = aleatorio.choice(elegidos) + (mejor_cambio,)
+
+        if movimiento is not None:
+            # Aplicar el intercambio
+            f2, c2, v2, cambio = movimiento
+            cuenta_fila[f1][v1] -= 1
+            cuenta_fila[f2][v2] -= 1
+            cuenta_fila[f1][v2] += 1
+            cuenta_fila[f2][v1] += 1
+            cuenta_columna[c1][v1] -= 1
+            cuenta_columna[c2][v2] -= 1
+            cuenta_columna[c1][v2] += 1
+            cuenta_columna[c2][v1] += 1
+            valores[f1][c1], valores[f2][c2] = v2, v1
+            coste += cambio
+            a, b = sorted((f1 * 9 + c1, f2 * 9 + c2))
+            tabu[(a, b)] = pasos + tenencia
+
+        # Un paso sin movimiento posible (celda sin intercambios válidos o
+        # todos tabú) también cuenta para la paciencia
+        if coste < mejor_coste:
+            mejor_coste, sin_mejora = coste, 0
+        else:
+            sin_mejora += 1
+            if sin_mejora >= paciencia:
+                rellenar()
+                cuenta_fila, cuenta_columna, coste = recontar()
+                mejor_coste, sin_mejora = coste, 0
+                tabu.clear()
+                resultado['reinicios'] += 1
+
+    resultado['nodos'] = pasos
+    resultado['conflictos'] = coste
+    if coste == 0:
+        for f, c in libres:
+            variables[f][c].valor = str(valores[f][c])
+        csp.actualizar_tablero()
+        resultado['exito'] = True
+        resultado['limite_excedido'] = False
+        resultado['tablero'] = tablero_copia
+    elif progreso is not None:
+        # No dejar en el CSP (compartido con la GUI) un tablero con conflictos
+        for f, c in libres:
+            variables[f][c].valor = '0'
+    return resultado
@@ -0,0 +1,128 @@
+"""
+Almacenamiento compacto de soluciones
+=====================================
+
+Empaqueta cada solución de 81 celdas en 41 bytes (4 bits por celda, dos
+celdas por byte, la primera en el nibble alto; el último nibble queda a 0) y
+permite escribir en disco la salida de `generar_soluciones` sin mantener las
+soluciones en memoria.
+
+Uso:
+    python empaquetado.py generar m1.txt soluciones.bin [--max-soluciones N] [--max-nodos N] [--fc]
+    python empaquetado.py leer soluciones.bin [--max N]
+"""
+
+from __future__ import annotations
+import argparse
+import time
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+BYTES_POR_SOLUCION = 41
+_TAM_BUFFER = 1 << 16
+
+# Tablas de conversión precalculadas: par de dígitos <-> byte
+_PAR_A_BYTE = {a + b: (int(a) << 4) | int(b) for a in '0123456789' for b in '0123456789'}
+_BYTE_A_PAR = {(int(a) << 4) | int(b): a + b for a in '0123456789' for b in '0123456789'}
+
+
+def empaquetar_solucion(solucion: str) -> bytes:
+    """
+    Empaqueta una cadena de 81 dígitos en 41 bytes.
+
+    Args:
+        solucion (str): 81 caracteres '0'..'9' (por filas).
+
+    Returns:
+        bytes: 41 bytes.
+    """
+    if len(solucion) != 81:
+        raise ValueError("La solución debe tener 81 celdas")
+    relleno = solucion + '0'
+    return bytes([_PAR_A_BYTE[relleno[i:i + 2]] for i in range(0, 82, 2)])
+
+
+def desempaquetar_solucion(datos: bytes) -> str:
+    """Operación inversa de `empaquetar_solucion`: 41 bytes -> 81 dígitos."""
+    if len(datos) != BYTES_POR_SOLUCION:
+        raise ValueError(f"Se esperaban {BYTES_POR_SOLUCION} bytes")
+    return ''.join([_BYTE_A_PAR[b] for b in datos])[:81]
+
+
+def escribir_soluciones(soluciones: Iterable[str], destino: BinaryIO,
+                        max_soluciones: Optional[int] = None) -> int:
+    """
+    Consume un iterable de soluciones (p.ej. `generar_soluciones`) y las escribe
+    empaquetadas en `destino`, vaciando el buffer por bloques para que la
+    memoria no dependa del número de soluciones.
+
+    Returns:
+        int: Número de soluciones escritas.
+    """
+    buffer = bytearray()
+    escritas = 0
+    for solucion in soluciones:
+        buffer += empaquetar_solucion(solucion)
+        escritas += 1
+        if len(buffer) >= _TAM_BUFFER:
+            destino.write(buffer)
+            buffer.clear()
+        if max_soluciones is not None and escritas >= max_soluciones:
+            break
+    if buffer:
+        destino.write(buffer)
+    return escritas
+
+
+def leer_soluciones(origen: BinaryIO) -> Iterator[str]:
+    """Lee perezosamente las soluciones empaquetadas de un fichero binario."""
+    while True:
+        bloque = origen.read(BYTES_POR_SOLUCION * 1024)
+        if not bloque:
+            return
+        if len(bloque) % BYTES_POR_SOLUCION:
+            raise ValueError("Fichero truncado: tamaño no múltiplo de 41 bytes")
+        for i in range(0, len(bloque), BYTES_POR_SOLUCION):
+            yield desempaquetar_solucion(bloque[i:i + BYTES_POR_SOLUCION])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Enumeración de soluciones en formato empaquetado (41 bytes/solución)')
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p_gen = sub.add_parser('generar', help='Enumera las soluciones de un Sudoku y las guarda empaquetadas')
+    p_gen.add_argument('sudoku', help='Fichero de Sudoku (formato m*.txt)')
+    p_gen.add_argument('salida', help='Fichero binario de salida')
+    p_gen.add_argument('--max-soluciones', type=int, help='Detenerse tras N soluciones')
+    p_gen.add_argument('--max-nodos', type=int, help='Límite de nodos de la búsqueda')
+    p_gen.add_argument('--fc', action='store_true', help='Propagar con Forward Checking en lugar de MAC')
+
+    p_leer = sub.add_parser('leer', help='Muestra las soluciones de un fichero empaquetado')
+    p_leer.add_argument('fichero')
+    p_leer.add_argument('--max', type=int, default=10, help='Número máximo de soluciones a mostrar')
+    args = parser.parse_args()
+
+    if args.comando == 'generar':
+        from tablero import Tablero
+        from algoritmos import generar_soluciones
+
+        metricas = {}
+        t0 = time.perf_counter()
+        with open(args.salida, 'wb') as f:
+            soluciones = generar_soluciones(Tablero(args.sudoku), max_nodos=args.max_nodos,
+                                            mac=not args.fc, metricas=metricas)
+            escritas = escribir_soluciones(soluciones, f, max_soluciones=args.max_soluciones)
+        segundos = time.perf_counter() - t0
+        ritmo = escritas / segundos if segundos > 0 else 0.0
+        print(f"{escritas} soluciones escritas en {args.salida} ({escritas * BYTES_POR_SOLUCION} bytes)")
+        print(f"Nodos: {metricas.get('nodos', 0)} | tiempo: {segundos:.3f} s | {ritmo:.0f} soluciones/s"
+              + (" | límite de nodos excedido" if metricas.get('limite_excedido') else ""))
+    else:
+        with open(args.fichero, 'rb') as f:
+            for i, solucion in enumerate(leer_soluciones(f)):
+                if i >= args.max:
+                    break
+                print(solucion)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,27 +6,56 @@ Script de experimentos (Sesión 7)
 - Dos modos de partida: con pre-reducción de dominios por valores fijos (por defecto del CSP)
   y sin pre-reducción (todos los no fijos comienzan con 1..9).
 - Mide tiempos (ms), tiempos de AC3, nodos y éxito.
+- Guarda cada fila en cuanto se calcula en resultados.sqlite (almacen.py) y reutiliza
+  las configuraciones ya calculadas con la misma versión del código (--forzar para repetir).
 - Guarda resultados en resultados.csv y genera gráficas comparativas (si matplotlib está disponible).
+- Modo benchmark (--benchmark): calentamiento, repeticiones, mediana/IQR/mínimo y aviso
+  de mediciones inestables; guarda benchmark.csv y benchmark.json (con muestras en bruto).
 
 Uso:
     python experimentos.py
 
 Opcional:
     python experimentos.py --max-nodos 2000000 --sin-pre --ambos --sin-graficas --subset m1 m2
+    python experimentos.py --benchmark --warmup 2 --repeticiones 15 --subset m1.txt m2.txt
+    python experimentos.py --benchmark --registrar --etiqueta antes-de-optimizar
+    python experimentos.py --forzar            # recalcular aunque esté en resultados.sqlite
+    python experimentos.py --memoria           # añade pico de memoria, bloques y RSS por ejecución
+    python experimentos.py --informe-memoria   # ranking de bytes por nodo de resultados.csv
+    python experimentos.py --benchmark --aislar --nucleos 3 --modo-gc congelar
+    python experimentos.py --reinicios luby --semilla 7   # añade FC+R (FC con reinicios) frente a FC
+    python experimentos.py --sat               # añade SAT (CNF + resolutor CDCL de sat.py)
+    python experimentos.py --todos-distintos   # añade TD y TD+FC (filtrado todos-distintos por unidad)
+    python experimentos.py --reglas            # añade REGLAS (reglas de inferencia de reglas.py y FC si no bastan)
 """
 
 from __future__ import annotations
 import argparse
+import contextlib
+import copy
 import csv
+import functools
 import os
 import time
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
 
 from tablero import Tablero
+from almacen import (AlmacenResultados, hash_sudoku, RESULTADOS_DB, CAMPOS_CSV, CAMPOS_MEMORIA,
+                     HEURISTICAS_POR_DEFECTO)
+from benchmark import (medir, medir_memoria, resumir, guardar_benchmark, percentil, control_gc,
+                       EntornoAislado, MODOS_GC, UMBRAL_INESTABLE)
+from info_sistema import huella_maquina, frecuencias_cpu_mhz
+from heuristicas import HEURISTICAS
+from sat import resolver_sat
+from todos_distintos import filtrar_todos_distintos
+from reglas import REGLAS, resolver_con_reglas
 from algoritmos import (
     backtracking_stats,
     forward_checking_stats,
+    forward_checking_reinicios,
     ac3,
+    preprocesar_ac3,
+    ESTRATEGIAS_REINICIO,
 )
 
 SUDOKUS = [
@@ -39,7 +68,11 @@ SUDOKUS = [
     "m6.txt",
 ]
 
+ALGORITMOS = ['BT', 'FC', 'AC3+BT', 'AC3+FC']
+
 CSV_FILE = "resultados.csv"
+BENCH_CSV_FILE = "benchmark.csv"
+BENCH_JSON_FILE = "benchmark.json"
 
 
 def verificar_solucion(tablero: Tablero) -> bool:
@@ -88,8 +121,156 @@ def dominios_completos(tablero: Tablero) -> List[List[List[str]]]:
     return full
 
 
-def ejecutar_experimentos(max_nodos: int, pre_reduccion: bool, subset: Optional[List[str]] = None) -> List[Dict]:
+def datos_entorno(huella: str, entorno: Optional[EntornoAislado] = None) -> Dict:
+    """
+    Columnas de entorno de cada fila: huella de la máquina, si se ejecutó
+    aislado y la frecuencia actual (MHz) de los núcleos usados, si se conoce.
+    """
+    frecuencias = frecuencias_cpu_mhz(entorno.nucleos if entorno is not None else None)
+    return {
+        'huella_maquina': huella,
+        'aislado': int(entorno is not None),
+        'cpu_mhz': round(sum(frecuencias.values()) / len(frecuencias), 1) if frecuencias else None,
+    }
+
+
+def _ejecutar_configuracion(tab: Tablero, algoritmo: str, dominios, max_nodos: int,
+                            pre_reduccion: bool, etiqueta: str, memoria: bool = False,
+                            modo_gc: Optional[str] = None,
+                            heuristica: str = 'mrv', reinicios: Optional[Dict] = None,
+                            reglas: Optional[Tuple[str, ...]] = None) -> Dict:
+    """
+    Ejecuta una configuración (BT, FC, AC3+BT o AC3+FC) y devuelve su fila de
+    resultados. Con `memoria`, el resolutor se repite una vez más con
+    tracemalloc (fuera de la medición de tiempo) y se añaden las columnas de
+    CAMPOS_MEMORIA; como `tiempo_ms`, se refieren a la etapa de búsqueda.
+    Con `modo_gc` ('desactivar' o 'congelar') se controla el GC en las
+    regiones cronometradas.
+    `heuristica` ('mrv' o 'domwdeg') es la selección de variable de FC (BT usa
+    siempre MRV). 'FC+R' es FC con reinicios: `reinicios` lleva los argumentos
+    de forward_checking_reinicios (estrategia, semilla, heurística). 'SAT' es
+    el resolutor CDCL de sat.py (nodos = decisiones; sin heurística).
+    'TD' es FC propagando cada unidad como todos-distintos y 'TD+FC' usa ese
+    filtrado como preprocesado (su tiempo va en `tiempo_ac3_ms`, como el de AC3).
+    'REGLAS' aplica la cadena de reglas `reglas` (reglas.resolver_con_reglas) y
+    solo busca con FC si no basta; se muestran sus contadores por regla.
+    """
+    opciones = {}
+    if algoritmo == 'SAT':
+        resolutor = resolver_sat
+        opciones = {}
+    elif algoritmo == 'FC+R':
+        resolutor = forward_checking_reinicios
+        opciones = dict(reinicios or {})
+    elif algoritmo.endswith('BT'):
+        resolutor = backtracking_stats
+    else:
+        resolutor = forward_checking_stats
+        if heuristica != 'mrv':
+            opciones['heuristica'] = heuristica
+        if algoritmo == 'TD':
+            opciones['todos_distintos'] = True
+        elif algoritmo == 'REGLAS':
+            resolutor = resolver_con_reglas
+            opciones['reglas'] = reglas or REGLAS
+    solver = functools.partial(resolutor, **opciones) if opciones else resolutor
+    tiempo_ac3_ms = 0.0
+    tab_solver, dominios_solver = tab, dominios
+    consistente = True
+    if algoritmo.startswith('AC3'):
+        # AC3+BT y AC3+FC comparten una única pasada de AC3 (memoizada); cada
+        # fila informa del tiempo de esa pasada, medido una sola vez
+        with control_gc(modo_gc):
+            preproceso = preprocesar_ac3(tab, dominios)
+        tiempo_ac3_ms = preproceso.tiempo_ms
+        consistente = preproceso.consistente
+        tab_solver, dominios_solver = preproceso.tablero, preproceso.dominios
+    elif algoritmo == 'TD+FC':
+        tab_solver = tab.copia()
+        with control_gc(modo_gc):
+            t0 = time.perf_counter()
+            preproceso = filtrar_todos_distintos(tab_solver, dominios)
+            tiempo_ac3_ms = (time.perf_counter() - t0) * 1000
+        consistente = preproceso['consistente']
+        dominios_solver = preproceso['dominios_despues']
+
+    if consistente:
+        with control_gc(modo_gc):
+            t0 = time.perf_counter()
+            r = solver(tab_solver, max_nodos=max_nodos, dominios=dominios_solver)
+            t1 = time.perf_counter()
+        tiempo_ms = (t1 - t0) * 1000
+        solucion_valida = r['exito'] and verificar_solucion(r['tablero'])
+    else:
+        r = {'exito': False, 'nodos': 0, 'limite_excedido': False}
+        tiempo_ms = 0.0
+        solucion_valida = False
+    fila = {
+        'nombre': etiqueta,
+        'algoritmo': algoritmo,
+        'tiempo_ms': round(tiempo_ms, 3),
+        'tiempo_total_ms': round(tiempo_ms + tiempo_ac3_ms, 3),
+        'tiempo_ac3_ms': round(tiempo_ac3_ms, 3),
+        'nodos': r['nodos'],
+        'exito': int(r['exito']),
+        'solucion_valida': int(solucion_valida),
+        'limite_excedido': int(r['limite_excedido']),
+        'ac3_aplicado': int(algoritmo.startswith('AC3')),
+        'pre_reduccion': int(pre_reduccion),
+    }
+    if memoria:
+        if consistente:
+            mem, _ = medir_memoria(lambda: solver(tab_solver, max_nodos=max_nodos, dominios=dominios_solver))
+        else:
+            mem = {'mem_pico_kb': 0.0, 'mem_retenida_kb': 0.0, 'bloques_netos': 0, 'rss_delta_kb': 0}
+        mem['bytes_pico_por_nodo'] = round(mem['mem_pico_kb'] * 1024 / max(r['nodos'], 1), 1)
+        fila.update(mem)
+    if algoritmo == 'FC+R':
+        print(f"  {algoritmo}: {r['nodos']} nodos, {r.get('reinicios', 0)} reinicios")
+    if algoritmo == 'REGLAS' and 'reglas' in r:
+        print(f"  {algoritmo}: {r['nodos']} nodos")
+        for regla, c in r['reglas'].items():
+            print(f"    {regla:22} aplicaciones={c['aplicaciones']:5} eliminados={c['eliminados']:6} "
+                  f"tiempo_ms={c['tiempo_ms']:.1f}")
+    return fila
+
+
+def ejecutar_experimentos(max_nodos: int, pre_reduccion: bool, subset: Optional[List[str]] = None,
+                          almacen: Optional[AlmacenResultados] = None, forzar: bool = False,
+                          memoria: bool = False, entorno: Optional[EntornoAislado] = None,
+                          heuristica: str = 'mrv',
+                          reinicios: Optional[Dict] = None, sat: bool = False,
+                          todos_distintos: bool = False,
+                          reglas: Optional[Tuple[str, ...]] = None) -> List[Dict]:
+    """
+    Ejecuta BT, FC, AC3+BT y AC3+FC sobre cada Sudoku. Con `almacen`, cada fila
+    se guarda en cuanto se calcula y las configuraciones ya almacenadas para la
+    versión actual del código se reutilizan (salvo `forzar`). Con `memoria` se
+    añaden las columnas de memoria (y solo se reutilizan filas que las tengan).
+    Cada fila lleva la huella de la máquina; con `entorno` se mide aislado
+    (ver EntornoAislado) y solo se reutilizan filas medidas también aisladas.
+    `heuristica` elige la selección de variable de FC ('mrv' o 'domwdeg') y
+    forma parte de la clave del almacén. Con `reinicios`
+    ({'estrategia', 'semilla', 'heuristica'}) se añade la configuración FC+R,
+    guardada con la estrategia y la semilla en la clave (p. ej.
+    'domwdeg+reinicios:luby:7'). Con `sat` se añade la configuración SAT y con
+    `todos_distintos`, TD y TD+FC. Con `reglas` (nombres de reglas.REGLAS) se
+    añade REGLAS, guardada con las reglas en la clave (p. ej.
+    'mrv+reglas:singles_desnudos,singles_ocultos').
+    """
     resultados: List[Dict] = []
+    huella = huella_maquina()['huella']
+    modo_gc = entorno.modo_gc if entorno is not None else None
+    heuristicas = heuristica
+    algoritmos = ALGORITMOS + (['FC+R'] if reinicios else []) + (['SAT'] if sat else [])
+    if todos_distintos:
+        algoritmos += ['TD', 'TD+FC']
+    if reglas:
+        algoritmos += ['REGLAS']
+        heuristicas_reglas = f"{heuristicas}+reglas:{','.join(reglas)}"
+    if reinicios:
+        heuristicas_reinicios = (f"{reinicios['heuristica']}+reinicios:"
+                                 f"{reinicios['estrategia']}:{reinicios['semilla']}")
 
     lista = SUDOKUS if not subset else subset
     for nombre in lista:
@@ -101,146 +282,162 @@ def ejecutar_experimentos(max_nodos: int, pre_reduccion: bool, subset: Optional[
         tab = Tablero(nombre)
         dominios = None if pre_reduccion else dominios_completos(tab)
         etiqueta = os.path.splitext(nombre)[0].upper()
+        clave = hash_sudoku(tab)
+
+        for algoritmo in algoritmos:
+            etiqueta_heuristicas = heuristicas
+            if algoritmo == 'FC+R':
+                etiqueta_heuristicas = heuristicas_reinicios
+            elif algoritmo == 'REGLAS':
+                etiqueta_heuristicas = heuristicas_reglas
+            fila = None
+            if almacen is not None and not forzar:
+                fila = almacen.buscar(clave, algoritmo, pre_reduccion, max_nodos, etiqueta_heuristicas,
+                                      con_memoria=memoria, huella=huella, aislado=entorno is not None)
+                if fila is not None:
+                    fila['nombre'] = etiqueta
+                    print(f"  {algoritmo}: almacenado ({fila['nodos']} nodos, {fila['tiempo_total_ms']} ms)")
+            if fila is None:
+                fila = _ejecutar_configuracion(tab, algoritmo, dominios, max_nodos, pre_reduccion, etiqueta,
+                                               memoria=memoria, modo_gc=modo_gc, heuristica=heuristica,
+                                               reinicios=reinicios, reglas=reglas)
+                fila.update(datos_entorno(huella, entorno))
+                if almacen is not None:
+                    almacen.guardar(clave, fila, max_nodos, etiqueta_heuristicas)
+            resultados.append(fila)
 
-        # BT sin AC3
-        t0 = time.perf_counter()
-        r_bk = backtracking_stats(tab, max_nodos=max_nodos, dominios=dominios)
-        t1 = time.perf_counter()
-        tiempo_bk_ms = (t1 - t0) * 1000
-        solucion_valida_bk = r_bk['exito'] and verificar_solucion(r_bk['tablero'])
-        resultados.append({
-            'nombre': etiqueta,
-            'algoritmo': 'BT',
-            'tiempo_ms': round(tiempo_bk_ms, 3),
-            'tiempo_total_ms': round(tiempo_bk_ms, 3),
-            'tiempo_ac3_ms': 0.0,
-            'nodos': r_bk['nodos'],
-            'exito': int(r_bk['exito']),
-            'solucion_valida': int(solucion_valida_bk),
-            'limite_excedido': int(r_bk['limite_excedido']),
-            'ac3_aplicado': 0,
-            'pre_reduccion': int(pre_reduccion),
-        })
-
-        # FC sin AC3
-        t0 = time.perf_counter()
-        r_fc = forward_checking_stats(tab, max_nodos=max_nodos, dominios=dominios)
-        t1 = time.perf_counter()
-        tiempo_fc_ms = (t1 - t0) * 1000
-        solucion_valida_fc = r_fc['exito'] and verificar_solucion(r_fc['tablero'])
-        resultados.append({
-            'nombre': etiqueta,
-            'algoritmo': 'FC',
-            'tiempo_ms': round(tiempo_fc_ms, 3),
-            'tiempo_total_ms': round(tiempo_fc_ms, 3),
-            'tiempo_ac3_ms': 0.0,
-            'nodos': r_fc['nodos'],
-            'exito': int(r_fc['exito']),
-            'solucion_valida': int(solucion_valida_fc),
-            'limite_excedido': int(r_fc['limite_excedido']),
-            'ac3_aplicado': 0,
-            'pre_reduccion': int(pre_reduccion),
-        })
+    return resultados
 
-        # AC3 + BT
-        import copy
-        t_ac3_0 = time.perf_counter()
-        tab_ac3 = copy.deepcopy(tab)
-        res_ac3 = ac3(tab_ac3, dominios=dominios)
-        t_ac3_1 = time.perf_counter()
-        tiempo_ac3_ms = (t_ac3_1 - t_ac3_0) * 1000
 
-        if res_ac3['consistente']:
-            t0 = time.perf_counter()
-            r_bk2 = backtracking_stats(tab_ac3, max_nodos=max_nodos, dominios=res_ac3['dominios_despues'])
-            t1 = time.perf_counter()
-            tiempo_bk2_ms = (t1 - t0) * 1000
-            solucion_valida_bk2 = r_bk2['exito'] and verificar_solucion(r_bk2['tablero'])
-            resultados.append({
-                'nombre': etiqueta,
-                'algoritmo': 'AC3+BT',
-                'tiempo_ms': round(tiempo_bk2_ms, 3),
-                'tiempo_total_ms': round(tiempo_bk2_ms + tiempo_ac3_ms, 3),
-                'tiempo_ac3_ms': round(tiempo_ac3_ms, 3),
-                'nodos': r_bk2['nodos'],
-                'exito': int(r_bk2['exito']),
-                'solucion_valida': int(solucion_valida_bk2),
-                'limite_excedido': int(r_bk2['limite_excedido']),
-                'ac3_aplicado': 1,
-                'pre_reduccion': int(pre_reduccion),
-            })
-        else:
-            resultados.append({
-                'nombre': etiqueta,
-                'algoritmo': 'AC3+BT',
-                'tiempo_ms': 0.0,
-                'tiempo_total_ms': round(tiempo_ac3_ms, 3),
-                'tiempo_ac3_ms': round(tiempo_ac3_ms, 3),
-                'nodos': 0,
-                'exito': 0,
-                'solucion_valida': 0,
-                'limite_excedido': 0,
-                'ac3_aplicado': 1,
-                'pre_reduccion': int(pre_reduccion),
-            })
+def comparar_reinicios(resultados: List[Dict]) -> None:
+    """Muestra, por Sudoku y modo, los nodos y el tiempo de FC frente a FC+R."""
+    filas = {(f['nombre'], f['pre_reduccion'], f['algoritmo']): f for f in resultados}
+    print("\nFC frente a FC con reinicios (FC+R):")
+    print(f"  {'sudoku':8} {'pre':>3} {'nodos FC':>10} {'nodos FC+R':>11} {'ms FC':>9} {'ms FC+R':>9}")
+    for (nombre, pre, algoritmo), fila_r in filas.items():
+        fila_fc = filas.get((nombre, pre, 'FC'))
+        if algoritmo != 'FC+R' or fila_fc is None:
+            continue
+        print(f"  {nombre:8} {int(pre):>3} {fila_fc['nodos']:>10} {fila_r['nodos']:>11} "
+              f"{float(fila_fc['tiempo_ms']):>9.1f} {float(fila_r['tiempo_ms']):>9.1f}")
+
+
+def configuraciones(tab: Tablero, dominios, max_nodos: int) -> List[Tuple[str, Callable[[], Dict]]]:
+    """
+    Devuelve las cuatro configuraciones (BT, FC, AC3+BT, AC3+FC) como funciones sin
+    argumentos que resuelven el tablero desde cero. En las variantes con AC3 la
+    función incluye la copia del tablero y el propio AC3, de modo que su tiempo es
+    el tiempo total de la configuración.
+    """
+    def con_ac3(solver):
+        def ejecutar():
+            tab_ac3 = copy.deepcopy(tab)
+            res_ac3 = ac3(tab_ac3, dominios=dominios)
+            if not res_ac3['consistente']:
+                return {'exito': False, 'nodos': 0, 'limite_excedido': False, 'tablero': None}
+            return solver(tab_ac3, max_nodos=max_nodos, dominios=res_ac3['dominios_despues'])
+        return ejecutar
+
+    return [
+        ('BT', lambda: backtracking_stats(tab, max_nodos=max_nodos, dominios=dominios)),
+        ('FC', lambda: forward_checking_stats(tab, max_nodos=max_nodos, dominios=dominios)),
+        ('AC3+BT', con_ac3(backtracking_stats)),
+        ('AC3+FC', con_ac3(forward_checking_stats)),
+    ]
 
-        # AC3 + FC
-        t_ac3_0 = time.perf_counter()
-        tab_ac3 = copy.deepcopy(tab)
-        res_ac3 = ac3(tab_ac3, dominios=dominios)
-        t_ac3_1 = time.perf_counter()
-        tiempo_ac3_ms = (t_ac3_1 - t_ac3_0) * 1000
 
-        if res_ac3['consistente']:
-            t0 = time.perf_counter()
-            r_fc2 = forward_checking_stats(tab_ac3, max_nodos=max_nodos, dominios=res_ac3['dominios_despues'])
-            t1 = time.perf_counter()
-            tiempo_fc2_ms = (t1 - t0) * 1000
-            solucion_valida_fc2 = r_fc2['exito'] and verificar_solucion(r_fc2['tablero'])
-            resultados.append({
-                'nombre': etiqueta,
-                'algoritmo': 'AC3+FC',
-                'tiempo_ms': round(tiempo_fc2_ms, 3),
-                'tiempo_total_ms': round(tiempo_fc2_ms + tiempo_ac3_ms, 3),
-                'tiempo_ac3_ms': round(tiempo_ac3_ms, 3),
-                'nodos': r_fc2['nodos'],
-                'exito': int(r_fc2['exito']),
-                'solucion_valida': int(solucion_valida_fc2),
-                'limite_excedido': int(r_fc2['limite_excedido']),
-                'ac3_aplicado': 1,
-                'pre_reduccion': int(pre_reduccion),
-            })
-        else:
-            resultados.append({
+def ejecutar_benchmark(max_nodos: int, pre_reduccion: bool, subset: Optional[List[str]] = None,
+                       warmup: int = 1, repeticiones: int = 10,
+                       umbral_inestable: float = UMBRAL_INESTABLE,
+                       entorno: Optional[EntornoAislado] = None) -> List[Dict]:
+    """
+    Mide cada configuración con calentamiento y repeticiones (GC controlado en la
+    región cronometrada). Cada fila incluye el resumen estadístico y las muestras
+    en bruto ('muestras_ms').
+    """
+    filas: List[Dict] = []
+    huella = huella_maquina()['huella']
+    lista = SUDOKUS if not subset else subset
+    for nombre in lista:
+        if not os.path.exists(nombre):
+            print(f"Aviso: {nombre} no existe, se omite.")
+            continue
+        tab = Tablero(nombre)
+        dominios = None if pre_reduccion else dominios_completos(tab)
+        etiqueta = os.path.splitext(nombre)[0].upper()
+        for algoritmo, funcion in configuraciones(tab, dominios, max_nodos):
+            print(f"Benchmark {etiqueta} {algoritmo} | warmup={warmup} repeticiones={repeticiones} ...")
+            muestras, r = medir(funcion, repeticiones=repeticiones, warmup=warmup,
+                                modo_gc=entorno.modo_gc if entorno is not None else 'desactivar')
+            resumen = resumir(muestras, umbral_inestable=umbral_inestable)
+            fila = {
                 'nombre': etiqueta,
-                'algoritmo': 'AC3+FC',
-                'tiempo_ms': 0.0,
-                'tiempo_total_ms': round(tiempo_ac3_ms, 3),
-                'tiempo_ac3_ms': round(tiempo_ac3_ms, 3),
-                'nodos': 0,
-                'exito': 0,
-                'solucion_valida': 0,
-                'limite_excedido': 0,
-                'ac3_aplicado': 1,
+                'algoritmo': algoritmo,
                 'pre_reduccion': int(pre_reduccion),
-            })
-
-    return resultados
+                'nodos': r['nodos'],
+                'exito': int(r['exito']),
+                'limite_excedido': int(r['limite_excedido']),
+                'warmup': warmup,
+            }
+            fila.update(datos_entorno(huella, entorno))
+            fila.update(resumen)
+            fila['muestras_ms'] = [round(m, 4) for m in muestras]
+            if resumen['inestable']:
+                print(f"  AVISO: medición inestable (IQR/mediana={resumen['iqr_rel']:.3f})")
+            print(f"  mediana={resumen['mediana_ms']:.3f} ms  IQR={resumen['iqr_ms']:.3f} ms  min={resumen['min_ms']:.3f} ms")
+            filas.append(fila)
+    return filas
 
 
 def guardar_csv(resultados: List[Dict], csv_file: str = CSV_FILE) -> None:
-    campos = [
-        'nombre', 'algoritmo', 'tiempo_ms', 'tiempo_total_ms', 'nodos',
-        'exito', 'solucion_valida', 'limite_excedido', 'ac3_aplicado', 'tiempo_ac3_ms', 'pre_reduccion'
-    ]
+    campos = list(CAMPOS_CSV)
+    if any('mem_pico_kb' in r for r in resultados):
+        campos += CAMPOS_MEMORIA
     with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-        w = csv.DictWriter(f, fieldnames=campos)
+        w = csv.DictWriter(f, fieldnames=campos, extrasaction='ignore')
         w.writeheader()
         for r in resultados:
             w.writerow(r)
     print(f"\nCSV generado: {csv_file}")
 
 
+def informe_memoria(filas: List[Dict]) -> List[Dict]:
+    """
+    Ordena las configuraciones por bytes de pico por nodo (mediana entre
+    Sudokus) e imprime la tabla.
+
+    Returns:
+        list[dict]: Una fila por (algoritmo, pre_reduccion), de menor a mayor
+    """
+    grupos: Dict[Tuple[str, int], List[Dict]] = {}
+    for r in filas:
+        if r.get('mem_pico_kb') in (None, ''):
+            continue
+        grupos.setdefault((r['algoritmo'], int(r['pre_reduccion'])), []).append(r)
+    ranking = []
+    for (algoritmo, pre), rs in grupos.items():
+        por_nodo = sorted(float(r['bytes_pico_por_nodo']) for r in rs)
+        picos = sorted(float(r['mem_pico_kb']) for r in rs)
+        ranking.append({
+            'algoritmo': algoritmo,
+            'pre_reduccion': pre,
+            'sudokus': len(rs),
+            'bytes_por_nodo_mediana': round(percentil(por_nodo, 50), 1),
+            'mem_pico_kb_mediana': round(percentil(picos, 50), 1),
+            'mem_pico_kb_max': picos[-1],
+            'nodos_total': sum(int(r['nodos']) for r in rs),
+        })
+    ranking.sort(key=lambda x: x['bytes_por_nodo_mediana'])
+    if not ranking:
+        print("No hay columnas de memoria (ejecute con --memoria).")
+        return ranking
+    print(f"\n{'algoritmo':8} {'pre':>3} {'sudokus':>7} {'bytes/nodo':>11} {'pico KB (med)':>13} {'pico KB (max)':>13} {'nodos':>9}")
+    for x in ranking:
+        print(f"{x['algoritmo']:8} {x['pre_reduccion']:3d} {x['sudokus']:7d} {x['bytes_por_nodo_mediana']:11.1f} "
+              f"{x['mem_pico_kb_mediana']:13.1f} {x['mem_pico_kb_max']:13.1f} {x['nodos_total']:9d}")
+    return ranking
+
+
 def generar_graficas(csv_file: str = CSV_FILE, pre_reduccion: Optional[bool] = True) -> None:
     try:
         import csv
@@ -317,16 +514,111 @@ def main():
     parser.add_argument('--ambos', action='store_true', help='Ejecutar ambos modos (con y sin pre-reducción)')
     parser.add_argument('--sin-graficas', action='store_true', help='No generar gráficas')
     parser.add_argument('--subset', nargs='*', help='Lista de ficheros de sudoku a ejecutar (p.ej. m1.txt m2.txt)')
+    parser.add_argument('--benchmark', action='store_true', help='Modo benchmark: repeticiones con calentamiento y estadísticos robustos')
+    parser.add_argument('--warmup', type=int, default=1, help='Ejecuciones de calentamiento por configuración (modo benchmark)')
+    parser.add_argument('--repeticiones', type=int, default=10, help='Repeticiones cronometradas por configuración (modo benchmark)')
+    parser.add_argument('--umbral-inestable', type=float, default=UMBRAL_INESTABLE,
+                        help='IQR/mediana a partir del cual la medición se marca como inestable')
+    parser.add_argument('--registrar', action='store_true',
+                        help='Añadir el benchmark al historial (historial.py) con commit y datos de la máquina')
+    parser.add_argument('--etiqueta', help='Etiqueta de la ejecución en el historial')
+    parser.add_argument('--db', default=RESULTADOS_DB, help='Base de datos SQLite de resultados (incremental)')
+    parser.add_argument('--sin-db', action='store_true', help='No leer ni guardar resultados en la base de datos')
+    parser.add_argument('--heuristica', choices=HEURISTICAS, default=HEURISTICAS_POR_DEFECTO,
+                        help='Selección de variable de FC: mrv o domwdeg (pesos por conflictos)')
+    parser.add_argument('--reinicios', choices=ESTRATEGIAS_REINICIO,
+                        help='Añadir FC+R: FC con reinicios aleatorizados según esta secuencia de límites')
+    parser.add_argument('--semilla', type=int, default=0, help='Semilla de FC+R (--reinicios)')
+    parser.add_argument('--heuristica-reinicios', choices=HEURISTICAS, default='domwdeg',
+                        help='Selección de variable de FC+R (con domwdeg los pesos pasan de un reinicio al siguiente)')
+    parser.add_argument('--sat', action='store_true',
+                        help='Añadir SAT: codificación CNF y resolutor CDCL (sat.py)')
+    parser.add_argument('--todos-distintos', action='store_true',
+                        help='Añadir TD y TD+FC: cada unidad filtrada como todos-distintos (Régin) en la '
+                             'búsqueda o como preprocesado')
+    parser.add_argument('--reglas', nargs='*', choices=REGLAS,
+                        help='Añadir REGLAS: FC con estas reglas de inferencia hasta el punto fijo '
+                             '(sin nombres, todas, en el orden de reglas.REGLAS)')
+    parser.add_argument('--memoria', action='store_true',
+                        help='Medir también memoria (pico tracemalloc, bloques, RSS) en una ejecución aparte')
+    parser.add_argument('--informe-memoria', nargs='?', const=CSV_FILE, metavar='CSV',
+                        help='Mostrar el ranking de bytes por nodo de un CSV existente y salir')
+    parser.add_argument('--aislar', '--isolate', action='store_true',
+                        help='Fijar el proceso a unos núcleos y controlar el GC en las regiones cronometradas')
+    parser.add_argument('--nucleos', nargs='*', type=int,
+                        help='Núcleos a usar con --aislar (por defecto, el último disponible)')
+    parser.add_argument('--modo-gc', choices=MODOS_GC, default='desactivar',
+                        help='GC en las regiones cronometradas con --aislar: desactivar o congelar (gc.freeze)')
+    parser.add_argument('--forzar', '--force', action='store_true',
+                        help='Recalcular las configuraciones aunque ya estén almacenadas')
     args = parser.parse_args()
 
+    if args.informe_memoria:
+        with open(args.informe_memoria, 'r', encoding='utf-8') as f:
+            informe_memoria(list(csv.DictReader(f)))
+        return
+
+    entorno = EntornoAislado(args.nucleos, args.modo_gc) if args.aislar else None
+    with entorno if entorno is not None else contextlib.nullcontext():
+        if entorno is not None:
+            print(f"Aislado en los núcleos {entorno.nucleos} | GC: {entorno.modo_gc}")
+        _ejecutar(args, entorno)
+
+
+def _reglas_elegidas(nombres: Optional[List[str]]) -> Optional[Tuple[str, ...]]:
+    """--reglas sin nombres equivale a todas las reglas; sin la opción, None."""
+    if nombres is None:
+        return None
+    return tuple(nombres) if nombres else REGLAS
+
+
+def _ejecutar(args, entorno: Optional[EntornoAislado]) -> None:
+    if args.benchmark:
+        modos = [True, False] if args.ambos else [not args.sin_pre]
+        filas = []
+        for pre in modos:
+            filas.extend(ejecutar_benchmark(args.max_nodos, pre_reduccion=pre, subset=args.subset,
+                                            warmup=args.warmup, repeticiones=args.repeticiones,
+                                            umbral_inestable=args.umbral_inestable, entorno=entorno))
+        metadatos = {
+            'max_nodos': args.max_nodos,
+            'warmup': args.warmup,
+            'repeticiones': args.repeticiones,
+            'umbral_inestable': args.umbral_inestable,
+            'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'maquina': huella_maquina(),
+            'entorno': entorno.descripcion() if entorno is not None else None,
+        }
+        guardar_benchmark(filas, BENCH_CSV_FILE, BENCH_JSON_FILE, metadatos)
+        if args.registrar:
+            from historial import registrar_ejecucion, HISTORIAL_FILE
+            registro = registrar_ejecucion({'metadatos': metadatos, 'resultados': filas},
+                                           HISTORIAL_FILE, etiqueta=args.etiqueta)
+            print(f"Registrado en {HISTORIAL_FILE} con id {registro['id']}")
+        return
+
+    almacen = None if args.sin_db else AlmacenResultados(args.db)
+    modos = [True, False] if args.ambos else [not args.sin_pre]
+    reinicios = None
+    if args.reinicios:
+        reinicios = {'estrategia': args.reinicios, 'semilla': args.semilla,
+                     'heuristica': args.heuristica_reinicios}
     resultados = []
-    if args.ambos:
-        resultados.extend(ejecutar_experimentos(args.max_nodos, pre_reduccion=True, subset=args.subset))
-        resultados.extend(ejecutar_experimentos(args.max_nodos, pre_reduccion=False, subset=args.subset))
-    else:
-        resultados.extend(ejecutar_experimentos(args.max_nodos, pre_reduccion=not args.sin_pre, subset=args.subset))
+    for pre in modos:
+        resultados.extend(ejecutar_experimentos(args.max_nodos, pre_reduccion=pre, subset=args.subset,
+                                                almacen=almacen, forzar=args.forzar, memoria=args.memoria,
+                                                entorno=entorno, heuristica=args.heuristica, reinicios=reinicios, sat=args.sat,
+                                                todos_distintos=args.todos_distintos,
+                                                reglas=_reglas_elegidas(args.reglas)))
+    if reinicios:
+        comparar_reinicios(resultados)
+    if almacen is not None:
+        print(f"\nResultados almacenados en: {args.db} (versión del código {almacen.version})")
+        almacen.cerrar()
 
     guardar_csv(resultados)
+    if args.memoria:
+        informe_memoria(resultados)
     if not args.sin_graficas:
         # Por defecto graficamos el modo con pre-reducción (más cercano a clase)
         generar_graficas(CSV_FILE, pre_reduccion=True)
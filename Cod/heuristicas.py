@@ -0,0 +1,149 @@
+"""
+Heurísticas de selección de variable para la búsqueda FC/MAC
+============================================================
+
+`obtener_variable_no_asignada` (MRV) elige la celda con menos valores y
+desempata por orden de recorrido. Aquí se añade dom/wdeg: cada una de las 27
+restricciones (filas, columnas y bloques) tiene un peso que empieza en 1 y
+aumenta cada vez que esa restricción vacía un dominio durante la propagación.
+Se elige la celda libre con menor |dominio| / wdeg, donde wdeg es la suma de
+los pesos de sus unidades que aún tienen otra celda libre. Así la búsqueda se
+concentra pronto en las zonas del tablero que más fallos provocan.
+
+El estado se mantiene de forma incremental: el conjunto de celdas libres y el
+número de celdas libres por unidad se actualizan en cada asignación, así que
+la selección solo recorre las celdas libres, no las 81.
+"""
+
+HEURISTICAS = ('mrv', 'domwdeg')
+
+
+def unidades_de_celda(fila, columna):
+    """Índices en SudokuCSP.restricciones de la fila, la columna y el bloque de la celda."""
+    return (fila, 9 + columna, 18 + fila // 3 * 3 + columna // 3)
+
+
+class SeleccionIncremental:
+    """
+    MRV sobre el conjunto de celdas libres, mantenido de forma incremental.
+    Es la base de DomWdeg y, con `aleatorio`, da MRV con desempates al azar
+    (para los reinicios); sin él desempata por fila y columna, como
+    `obtener_variable_no_asignada`.
+
+    Atributos:
+        fallos (int): Vaciados de dominio registrados
+    """
+
+    def __init__(self, csp, aleatorio=None):
+        """
+        Args:
+            csp (SudokuCSP): Problema sobre el que se busca
+            aleatorio (random.Random | None): Generador para desempatar al azar
+        """
+        self.csp = csp
+        self.aleatorio = aleatorio
+        self.fallos = 0
+        self._unidades = [unidades_de_celda(i // 9, i % 9) for i in range(81)]
+        self.libres = set()
+        self.libres_unidad = [0] * 27
+        for f in range(9):
+            for c in range(9):
+                if not csp.variables[f][c].esta_asignada():
+                    self.desasignar(f, c)
+
+    def asignar(self, fila, columna):
+        i = fila * 9 + columna
+        self.libres.discard(i)
+        for u in self._unidades[i]:
+            self.libres_unidad[u] -= 1
+
+    def desasignar(self, fila, columna):
+        i = fila * 9 + columna
+        self.libres.add(i)
+        for u in self._unidades[i]:
+            self.libres_unidad[u] += 1
+
+    def prioridad(self, i):
+        """Criterio a minimizar para la celda libre i (aquí, |dominio|)."""
+        return len(self.csp.variables[i // 9][i % 9].dominio)
+
+    def seleccionar(self):
+        """
+        Celda libre con menor prioridad (empates: la primera por fila y columna,
+        o una al azar con `aleatorio`), o None si no queda ninguna.
+
+        Returns:
+            tuple | None: (fila, columna)
+        """
+        mejor, mejor_clave = None, None
+        azar = self.aleatorio.random if self.aleatorio is not None else None
+        for i in self.libres:
+            clave = (self.prioridad(i), azar() if azar is not None else i)
+            if mejor_clave is None or clave < mejor_clave:
+                mejor, mejor_clave = i, clave
+        return None if mejor is None else (mejor // 9, mejor % 9)
+
+    def registrar_fallo(self, fila, columna, valor, cambios):
+        """MRV no aprende de los fallos; solo los cuenta."""
+        self.fallos += 1
+
+
+class DomWdeg(SeleccionIncremental):
+    """
+    Pesos de las restricciones y selección dom/wdeg para un SudokuCSP.
+
+    Atributos:
+        pesos (list[int]): Peso de cada una de las 27 unidades
+        fallos (int): Vaciados de dominio registrados
+    """
+
+    def __init__(self, csp, pesos=None, aleatorio=None):
+        """
+        Args:
+            csp (SudokuCSP): Problema sobre el que se busca
+            pesos (list[int] | None): Pesos de partida, que se actualizan en
+                el sitio (así se conservan de una búsqueda a la siguiente); por
+                defecto, una lista nueva con todos a 1
+            aleatorio (random.Random | None): Generador para desempatar al azar
+        """
+        self.pesos = pesos if pesos is not None else [1] * 27
+        super().__init__(csp, aleatorio)
+
+    def wdeg(self, i):
+        """Suma de pesos de las unidades de la celda i con alguna otra celda libre."""
+        pesos, libres_unidad = self.pesos, self.libres_unidad
+        return sum(pesos[u] for u in self._unidades[i] if libres_unidad[u] > 1)
+
+    def prioridad(self, i):
+        """|dominio| / wdeg de la celda libre i."""
+        return len(self.csp.variables[i // 9][i % 9].dominio) / max(self.wdeg(i), 1)
+
+    def registrar_fallo(self, fila, columna, valor, cambios):
+        """
+        Aumenta el peso de las unidades que causaron el vaciado de un dominio
+        tras asignar `valor` a (fila, columna).
+
+        Con FC los dominios vaciados son vecinos de la celda asignada. Con MAC
+        la propagación se detiene en el primer vaciado (último cambio), que
+        pudo provocar un valor unitario propagado: se busca entre los vecinos
+        la celda que fija ese valor.
+        """
+        variables = self.csp.variables
+        # Celda vaciada -> último valor que perdió (el que la dejó vacía)
+        vaciadas = {(f, c): v for f, c, v in cambios if not variables[f][c].dominio}
+        for (f, c), v in vaciadas.items():
+            origen = None
+            if v == valor and (f, c) in self.csp.vecinos(fila, columna):
+                origen = (fila, columna)
+            else:
+                for fv, cv in self.csp.vecinos(f, c):
+                    vecina = variables[fv][cv]
+                    if vecina.valor == v or (not vecina.esta_asignada() and vecina.dominio == [v]):
+                        origen = (fv, cv)
+                        break
+            if origen is None:
+                continue
+            comunes = set(unidades_de_celda(f, c)) & set(unidades_de_celda(*origen))
+            for u in comunes:
+                self.pesos[u] += 1
+            self.fallos += 1
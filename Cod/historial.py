@@ -0,0 +1,235 @@
+"""
+Historial de benchmarks y detección de regresiones
+==================================================
+
+Guarda cada ejecución de `experimentos.py --benchmark` junto con el commit de
+git, la versión de Python y los datos de la máquina (`info_sistema`), y
+compara dos ejecuciones por (plantilla, algoritmo, pre_reduccion) dando los
+ratios de tiempo (mediana) y de nodos.
+
+Uso:
+    python historial.py registrar [benchmark.json] [--etiqueta texto]
+    python historial.py listar
+    python historial.py comparar BASE NUEVA [--umbral 0.10]
+
+BASE y NUEVA pueden ser el id de la ejecución, un índice (-1 = última,
+-2 = penúltima, 0 = primera), un prefijo de commit o una etiqueta.
+`comparar` termina con código 1 si detecta alguna regresión.
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+HISTORIAL_FILE = "historial_benchmarks.jsonl"
+UMBRAL_REGRESION = 0.10
+
+
+def obtener_commit_git() -> Optional[Dict[str, Any]]:
+    """
+    Devuelve {'commit': hash, 'sucio': bool} del repositorio que contiene este
+    fichero, o None si git no está disponible.
+    """
+    carpeta = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=carpeta,
+                                capture_output=True, text=True, timeout=10)
+        if commit.returncode != 0:
+            return None
+        estado = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=carpeta,
+                                capture_output=True, text=True, timeout=10)
+        return {
+            'commit': commit.stdout.strip(),
+            'sucio': bool(estado.stdout.strip()),
+        }
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def cargar_historial(fichero: str = HISTORIAL_FILE) -> List[Dict[str, Any]]:
+    """Lee todas las ejecuciones registradas (una por línea JSON)."""
+    if not os.path.exists(fichero):
+        return []
+    ejecuciones = []
+    with open(fichero, 'r', encoding='utf-8') as f:
+        for linea in f:
+            linea = linea.strip()
+            if linea:
+                ejecuciones.append(json.loads(linea))
+    return ejecuciones
+
+
+def registrar_ejecucion(benchmark: Dict[str, Any], fichero: str = HISTORIAL_FILE,
+                        etiqueta: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Añade al historial una ejecución de benchmark (el contenido de benchmark.json)
+    junto con el commit, la versión de Python y la información de la máquina.
+
+    Returns:
+        dict: Registro añadido.
+    """
+    from info_sistema import recopilar_info_maquina
+
+    git = obtener_commit_git()
+    ahora = time.strftime('%Y%m%d-%H%M%S')
+    registro = {
+        'id': ahora + ('-' + git['commit'][:8] if git else ''),
+        'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'etiqueta': etiqueta,
+        'git': git,
+        'python': platform.python_version(),
+        'maquina': recopilar_info_maquina(),
+        'metadatos': benchmark.get('metadatos', {}),
+        'resultados': benchmark.get('resultados', []),
+    }
+    with open(fichero, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    return registro
+
+
+def buscar_ejecucion(historial: List[Dict[str, Any]], referencia: str) -> Optional[Dict[str, Any]]:
+    """
+    Localiza una ejecución por id, índice, prefijo de commit o etiqueta
+    (en ese orden). Si varias coinciden se devuelve la más reciente.
+    """
+    for ejecucion in historial:
+        if ejecucion.get('id') == referencia:
+            return ejecucion
+    try:
+        return historial[int(referencia)]
+    except (ValueError, IndexError):
+        pass
+    for ejecucion in reversed(historial):
+        git = ejecucion.get('git') or {}
+        if len(referencia) >= 4 and git.get('commit', '').startswith(referencia):
+            return ejecucion
+        if ejecucion.get('etiqueta') == referencia:
+            return ejecucion
+    return None
+
+
+def _ratio(nuevo: float, base: float) -> Optional[float]:
+    if base == 0:
+        return None if nuevo != 0 else 1.0
+    return nuevo / base
+
+
+def comparar_ejecuciones(base: Dict[str, Any], nueva: Dict[str, Any],
+                         umbral: float = UMBRAL_REGRESION) -> List[Dict[str, Any]]:
+    """
+    Compara dos ejecuciones por (nombre, algoritmo, pre_reduccion).
+
+    Una fila es regresión si la mediana de tiempo o los nodos crecen más de
+    `umbral` (relativo). 'significativa' indica además que los IC95% de las
+    medianas no se solapan.
+
+    Returns:
+        list[dict]: Una fila por configuración presente en ambas ejecuciones.
+    """
+    def clave(r):
+        return (r['nombre'], r['algoritmo'], int(r.get('pre_reduccion', 1)))
+
+    indice_base = {clave(r): r for r in base.get('resultados', [])}
+    filas = []
+    for r in nueva.get('resultados', []):
+        b = indice_base.get(clave(r))
+        if b is None:
+            continue
+        ratio_tiempo = _ratio(r['mediana_ms'], b['mediana_ms'])
+        ratio_nodos = _ratio(r['nodos'], b['nodos'])
+        lento = ratio_tiempo is not None and ratio_tiempo > 1 + umbral
+        mas_nodos = ratio_nodos is None or ratio_nodos > 1 + umbral
+        significativa = r.get('ic95_inf_ms', r['mediana_ms']) > b.get('ic95_sup_ms', b['mediana_ms'])
+        filas.append({
+            'nombre': r['nombre'],
+            'algoritmo': r['algoritmo'],
+            'pre_reduccion': int(r.get('pre_reduccion', 1)),
+            'mediana_base_ms': b['mediana_ms'],
+            'mediana_nueva_ms': r['mediana_ms'],
+            'ratio_tiempo': ratio_tiempo,
+            'nodos_base': b['nodos'],
+            'nodos_nuevos': r['nodos'],
+            'ratio_nodos': ratio_nodos,
+            'significativa': significativa,
+            'regresion': lento or mas_nodos,
+        })
+    return filas
+
+
+def _formatear_ratio(ratio: Optional[float]) -> str:
+    return "   inf" if ratio is None else f"{ratio:6.3f}"
+
+
+def _describir(ejecucion: Dict[str, Any]) -> str:
+    git = ejecucion.get('git') or {}
+    commit = git.get('commit', '')[:8] or 'sin-git'
+    if git.get('sucio'):
+        commit += '+'
+    etiqueta = f" [{ejecucion['etiqueta']}]" if ejecucion.get('etiqueta') else ''
+    return f"{ejecucion['id']}  {commit}  py{ejecucion.get('python', '?')}{etiqueta}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Historial de benchmarks y comparación entre versiones')
+    parser.add_argument('--historial', default=HISTORIAL_FILE, help='Fichero JSONL del historial')
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p_reg = sub.add_parser('registrar', help='Añade un benchmark.json al historial')
+    p_reg.add_argument('benchmark', nargs='?', default='benchmark.json')
+    p_reg.add_argument('--etiqueta', help='Texto libre para identificar la ejecución')
+
+    sub.add_parser('listar', help='Lista las ejecuciones registradas')
+
+    p_cmp = sub.add_parser('comparar', help='Compara dos ejecuciones (código 1 si hay regresiones)')
+    p_cmp.add_argument('base')
+    p_cmp.add_argument('nueva')
+    p_cmp.add_argument('--umbral', type=float, default=UMBRAL_REGRESION,
+                       help='Aumento relativo tolerado de tiempo o nodos (0.10 = 10%%)')
+    args = parser.parse_args(argv)
+
+    if args.comando == 'registrar':
+        with open(args.benchmark, 'r', encoding='utf-8') as f:
+            benchmark = json.load(f)
+        registro = registrar_ejecucion(benchmark, args.historial, etiqueta=args.etiqueta)
+        print(f"Ejecución registrada: {_describir(registro)}")
+        return 0
+
+    historial = cargar_historial(args.historial)
+    if args.comando == 'listar':
+        for i, ejecucion in enumerate(historial):
+            print(f"{i:3d}  {_describir(ejecucion)}")
+        return 0
+
+    base = buscar_ejecucion(historial, args.base)
+    nueva = buscar_ejecucion(historial, args.nueva)
+    if base is None or nueva is None:
+        faltan = [ref for ref, e in ((args.base, base), (args.nueva, nueva)) if e is None]
+        print(f"No se encontraron en el historial: {', '.join(faltan)}", file=sys.stderr)
+        return 2
+
+    print(f"Base : {_describir(base)}")
+    print(f"Nueva: {_describir(nueva)}")
+    filas = comparar_ejecuciones(base, nueva, umbral=args.umbral)
+    print(f"\n{'nombre':6} {'algoritmo':9} {'pre':>3} {'base_ms':>11} {'nueva_ms':>11} {'t':>6} {'nodos':>6}")
+    for f in filas:
+        marca = ''
+        if f['regresion']:
+            marca = '  REGRESIÓN' + (' (significativa)' if f['significativa'] else '')
+        print(f"{f['nombre']:6} {f['algoritmo']:9} {f['pre_reduccion']:>3} "
+              f"{f['mediana_base_ms']:11.3f} {f['mediana_nueva_ms']:11.3f} "
+              f"{_formatear_ratio(f['ratio_tiempo'])} {_formatear_ratio(f['ratio_nodos'])}{marca}")
+    regresiones = sum(1 for f in filas if f['regresion'])
+    if not filas:
+        print("Las ejecuciones no tienen configuraciones en común.")
+    print(f"\n{regresiones} regresión(es) por encima del {args.umbral:.0%}")
+    return 1 if regresiones else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -256,6 +256,128 @@ def obtener_info_avanzada():
         print("Para obtener información avanzada del hardware, instala psutil:")
         print("pip install psutil")
 
+def _leer_cpuinfo(clave):
+    """Valores de un campo de /proc/cpuinfo (Linux), uno por núcleo."""
+    try:
+        with open('/proc/cpuinfo', 'r') as f:
+            return [linea.split(':', 1)[1].strip() for linea in f
+                    if linea.split(':', 1)[0].strip() == clave]
+    except OSError:
+        return []
+
+
+def modelo_cpu():
+    """Modelo de CPU legible (/proc/cpuinfo en Linux, si no platform.processor())."""
+    modelos = _leer_cpuinfo('model name')
+    return modelos[0] if modelos else platform.processor()
+
+
+def memoria_total_gb():
+    """Memoria total en GB (psutil o /proc/meminfo), o None si no se puede leer."""
+    try:
+        import psutil
+        return round(psutil.virtual_memory().total / (1024**3), 2)
+    except ImportError:
+        pass
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for linea in f:
+                if linea.startswith('MemTotal:'):
+                    return round(int(linea.split()[1]) / (1024**2), 2)
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def frecuencias_cpu_mhz(nucleos=None):
+    """
+    Frecuencia actual (MHz) de cada núcleo, donde el sistema la expone:
+    cpufreq en /sys, "cpu MHz" de /proc/cpuinfo o psutil.
+
+    Args:
+        nucleos (iterable | None): Núcleos a consultar (por defecto, todos)
+
+    Returns:
+        dict: {núcleo: MHz}; vacío si no hay forma de obtenerla
+    """
+    nucleos = sorted(nucleos) if nucleos is not None else list(range(os.cpu_count() or 1))
+    frecuencias = {}
+    for n in nucleos:
+        try:
+            with open(f'/sys/devices/system/cpu/cpu{n}/cpufreq/scaling_cur_freq', 'r') as f:
+                frecuencias[n] = round(int(f.read()) / 1000, 1)
+        except (OSError, ValueError):
+            pass
+    if frecuencias:
+        return frecuencias
+    por_nucleo = _leer_cpuinfo('cpu MHz')
+    if por_nucleo:
+        return {n: round(float(por_nucleo[n]), 1) for n in nucleos if n < len(por_nucleo)}
+    try:
+        import psutil
+        lista = psutil.cpu_freq(percpu=True) or []
+        return {n: round(lista[n].current, 1) for n in nucleos if n < len(lista)}
+    except (ImportError, Exception):
+        return {}
+
+
+def huella_maquina():
+    """
+    Huella compacta de la máquina para etiquetar resultados: hash corto de los
+    datos que afectan a los tiempos (SO, arquitectura, modelo de CPU, núcleos,
+    memoria e intérprete de Python) y una descripción legible.
+
+    Returns:
+        dict: {'huella': str de 10 caracteres, 'descripcion': str}
+    """
+    import hashlib
+
+    datos = [platform.system(), platform.machine(), modelo_cpu(), str(os.cpu_count()),
+             str(memoria_total_gb()), platform.python_implementation(), platform.python_version()]
+    huella = hashlib.sha1('|'.join(datos).encode('utf-8')).hexdigest()[:10]
+    descripcion = (f"{datos[0]} {datos[1]} | {datos[2] or 'CPU desconocida'} | {datos[3]} núcleos | "
+                   f"{datos[4]} GB | {datos[5]} {datos[6]}")
+    return {'huella': huella, 'descripcion': descripcion}
+
+
+def recopilar_info_maquina():
+    """
+    Recopila (sin imprimir) los datos de la máquina y de Python que muestran las
+    funciones anteriores, como diccionario serializable. Los campos que
+    dependen de psutil solo aparecen si está instalado.
+
+    Returns:
+        dict: Información de SO, CPU, memoria y Python.
+    """
+    info = {
+        'sistema': platform.system(),
+        'release': platform.release(),
+        'version_so': platform.version(),
+        'arquitectura': platform.architecture()[0],
+        'maquina': platform.machine(),
+        'procesador': platform.processor(),
+        'modelo_cpu': modelo_cpu(),
+        'nombre_equipo': platform.node(),
+        'python_version': platform.python_version(),
+        'python_implementacion': platform.python_implementation(),
+        'python_compilador': platform.python_compiler(),
+        'nucleos_logicos': os.cpu_count(),
+        'memoria_total_gb': memoria_total_gb(),
+        'huella': huella_maquina()['huella'],
+    }
+    try:
+        import psutil
+        info['nucleos_fisicos'] = psutil.cpu_count(logical=False)
+        try:
+            freq = psutil.cpu_freq()
+            if freq:
+                info['frecuencia_max_mhz'] = round(freq.max, 1)
+        except Exception:
+            pass
+    except ImportError:
+        pass
+    return info
+
 def main():
     """Función principal"""
     archivo_salida = "informacion_sistema.txt"
@@ -9,10 +9,11 @@
 
 import pygame
 import copy
-from tablero import *
+from tablero import Tablero, desdeCadena
 from pygame.locals import *
 import sys
-from algoritmos import backtracking, forward_checking, ac3
+from algoritmos import backtracking_stats, forward_checking_stats, ac3_incremental, preprocesar_ac3
+from progreso import ResolutorEnSegundoPlano
 import time
 
 GREY=(220,220,220)
@@ -37,35 +38,48 @@ def pulsaBoton(pos, boton):
         return False
 
 #########################################################################
-# Pintar un boton
+# Devuelve la celda (fila, columna) bajo la posición del ratón, o None
 #########################################################################   
-def pintarBoton(screen, fuenteBot, boton, mensaje):
-    if boton.collidepoint(pygame.mouse.get_pos()):
+def celdaEnPosicion(pos):
+    col=(pos[0]-MARGEN)//(TAM+MARGEN)
+    fil=(pos[1]-MARGEN)//(TAM+MARGEN)
+    if 0<=fil<N and 0<=col<N:
+        return (fil, col)
+    return None
+
+#########################################################################
+# Dominios de AC3 utilizables por BK/FC: si se ha editado el tablero desde
+# el último AC3 pueden no ser válidos y se descartan
+#########################################################################   
+def dominiosVigentes(ac3_dominios, celdas_cambiadas):
+    if celdas_cambiadas:
+        return None
+    return ac3_dominios
+
+#########################################################################
+# Rectángulo de una celda del sudoku
+#########################################################################   
+def rectCelda(fil, col):
+    return pygame.Rect((TAM+MARGEN)*col+MARGEN, (TAM+MARGEN)*fil+MARGEN, TAM, TAM)
+
+#########################################################################
+# Pintar un boton (con la etiqueta ya renderizada)
+#########################################################################   
+def pintarBoton(screen, boton, texto, activo):
+    if activo:
         pygame.draw.rect(screen, GRIS_ACTIVO, boton, 0)        
     else:
         pygame.draw.rect(screen, GRIS_NORMAL, boton, 0)
-        
-    texto=fuenteBot.render(mensaje, True, NEGRO)
     screen.blit(texto, (boton.x+(boton.width-texto.get_width())/2, boton.y+(boton.height-texto.get_height())/2))         
 
 #########################################################################
-# Pintar el sudoku
+# Pintar la parte estática: fondo, celdas vacías y líneas de la cuadrícula
 #########################################################################         
-def pintarTablero(screen, fuenteSud, tablero, copTab):
-    pygame.draw.rect(screen, GREY, [0, 0, N*(TAM+MARGEN)+MARGEN, N*(TAM+MARGEN)+MARGEN],0)
+def pintarFondo(screen):
+    screen.fill(GREY)
     for fil in range(9):
         for col in range(9):
-            if tablero is None or tablero.getCelda(fil, col)==VACIA :
-                pygame.draw.rect(screen, BLANCO, [(TAM+MARGEN)*col+MARGEN, (TAM+MARGEN)*fil+MARGEN, TAM, TAM], 0)            
-            else:
-                pygame.draw.rect(screen, BLANCO, [(TAM+MARGEN)*col+MARGEN, (TAM+MARGEN)*fil+MARGEN, TAM, TAM], 0)
-                if tablero.getCelda(fil, col)==copTab.getCelda(fil, col):
-                    color=NEGRO
-                else:
-                    color=GRIS_NORMAL                 
-                texto= fuenteSud.render(tablero.getCelda(fil, col), True, color)            
-                screen.blit(texto, [(TAM+MARGEN)*col+MARGEN+15, (TAM+MARGEN)*fil+MARGEN+5])
-    
+            pygame.draw.rect(screen, BLANCO, rectCelda(fil, col), 0)
     #dibujar línea de cuadrícula     
     pygame.draw.line(screen, GRIS_NORMAL, (MARGEN, 3*(TAM+MARGEN)+2), (9*(TAM+MARGEN),3*(TAM+MARGEN)+2), 5)
     pygame.draw.line(screen, GRIS_NORMAL, (MARGEN, 6*(TAM+MARGEN)+2), (9*(TAM+MARGEN),6*(TAM+MARGEN)+2), 5)    
@@ -73,6 +87,77 @@ def pintarTablero(screen, fuenteSud, tablero, copTab):
     pygame.draw.line(screen, GRIS_NORMAL, (6*(TAM+MARGEN)+2, MARGEN), (6*(TAM+MARGEN)+2,9*(TAM+MARGEN)), 5)
     pygame.draw.rect(screen, GRIS_NORMAL, [MARGEN, MARGEN, N*(TAM+MARGEN), N*(TAM+MARGEN)],5)
 
+#########################################################################
+# Pintado incremental: guarda los dígitos y etiquetas ya renderizados y el
+# fondo estático, y solo repinta las celdas, botones y textos que cambian
+# respecto al fotograma anterior (devuelve los rectángulos modificados para
+# pygame.display.update)
+#########################################################################
+class PintorSudoku:
+    def __init__(self, screen, fuenteSud, fuenteBot, fuenteInfo, botones, zonaInfo):
+        self.screen=screen
+        self.fuenteInfo=fuenteInfo
+        self.botones=botones #lista de (rect, mensaje)
+        self.zonaInfo=zonaInfo
+        self.fondo=pygame.Surface(screen.get_size())
+        pintarFondo(self.fondo)
+        #dígitos pre-renderizados en los dos colores
+        self.glifos={color: {d: fuenteSud.render(d, True, color) for d in '123456789'} for color in (NEGRO, GRIS_NORMAL)}
+        self.etiquetas={mensaje: fuenteBot.render(mensaje, True, NEGRO) for _, mensaje in botones}
+        self.invalidar()
+
+    def invalidar(self):
+        #fuerza el repintado completo en el siguiente fotograma
+        self.completo=True
+        self.celdas=[[None]*N for _ in range(N)]
+        self.estadoBotones=[None]*len(self.botones)
+        self.lineasInfo=None
+
+    def pintar(self, tablero, copTab, seleccion, lineasInfo, posRaton):
+        sucios=[]
+        if self.completo:
+            self.screen.blit(self.fondo, (0, 0))
+        for fil in range(N):
+            for col in range(N):
+                valor=VACIA if tablero is None else tablero.getCelda(fil, col)
+                color=None
+                if valor!=VACIA:
+                    color=NEGRO if valor==copTab.getCelda(fil, col) else GRIS_NORMAL
+                estado=(valor, color, seleccion==(fil, col))
+                if estado!=self.celdas[fil][col]:
+                    self.celdas[fil][col]=estado
+                    rect=rectCelda(fil, col)
+                    self.screen.blit(self.fondo, rect, rect)
+                    if color is not None:
+                        self.screen.blit(self.glifos[color][valor], (rect.x+15, rect.y+5))
+                    if estado[2]:
+                        pygame.draw.rect(self.screen, NEGRO, rect, 3)
+                    sucios.append(rect)
+        for i, (boton, mensaje) in enumerate(self.botones):
+            activo=boton.collidepoint(posRaton)
+            if activo!=self.estadoBotones[i]:
+                self.estadoBotones[i]=activo
+                pintarBoton(self.screen, boton, self.etiquetas[mensaje], activo)
+                sucios.append(boton)
+        if lineasInfo!=self.lineasInfo:
+            self.lineasInfo=lineasInfo
+            self.screen.blit(self.fondo, self.zonaInfo, self.zonaInfo)
+            for i, linea in enumerate(lineasInfo or []):
+                self.screen.blit(self.fuenteInfo.render(linea, True, NEGRO), (self.zonaInfo.x, self.zonaInfo.y+20*i))
+            sucios.append(self.zonaInfo)
+        if self.completo:
+            self.completo=False
+            return [self.screen.get_rect()]
+        return sucios
+
+#########################################################################
+# Líneas de texto con el progreso de la búsqueda en curso
+#########################################################################   
+def lineasProgreso(progreso):
+    if progreso is None:
+        return ("Resolviendo...",)
+    return (f"{progreso.nodos} nodos", f"{progreso.nodos_por_segundo:.0f} n/s", f"prof. {progreso.profundidad}")
+
 
 #########################################################################  
 # Principal
@@ -95,90 +180,134 @@ def main():
     
     fuenteBot=pygame.font.Font(None, 30)
     fuenteSud= pygame.font.Font(None, 70)
+    fuenteInfo=pygame.font.Font(None, 22)
     
     botLoad=pygame.Rect(anchoVentana-95, 75, 70, 50)    
     botBK=pygame.Rect(anchoVentana-95, 203, 70, 50)
     botFC=pygame.Rect(anchoVentana-95, 333, 70, 50)
     botAC3=pygame.Rect(anchoVentana-95, 463, 70, 50)
+    botStop=pygame.Rect(anchoVentana-95, 533, 70, 50)
+    botones=[(botLoad, "Load"), (botBK, "BK"), (botFC, "FC"), (botAC3, "AC3"), (botStop, "Stop")]
+    zonaInfo=pygame.Rect(anchoVentana-MARGEN_DERECHO+8, 8, MARGEN_DERECHO-10, 60)
+    pintor=PintorSudoku(screen, fuenteSud, fuenteBot, fuenteInfo, botones, zonaInfo)
     
     game_over=False
     tablero=None
     copTab=None
     ac3_dominios=None
+    seleccion=None #celda seleccionada para editar
+    celdas_cambiadas=set() #celdas editadas desde el último AC3
+    resolutor=None #búsqueda BK/FC en curso (hilo en segundo plano)
+    nombreAlg=""
     
     
     while not game_over:
+        #comprobar si la búsqueda en segundo plano ha terminado
+        if resolutor is not None and not resolutor.activo():
+            res=resolutor.resultado
+            if resolutor.error is not None:
+                print(f"Error durante la búsqueda con {nombreAlg}: {resolutor.error}")
+            elif res['cancelado']:
+                print(f"Búsqueda con {nombreAlg} cancelada tras {res['nodos']} nodos")
+            elif res['exito']:
+                tablero = res['tablero']
+                print(f"¡Solución encontrada con {nombreAlg}! Tiempo: {resolutor.segundos:.4f} segundos ({res['nodos']} nodos)")
+                ac3_dominios=None
+                celdas_cambiadas=set()
+            else:
+                print(f"No se encontró solución con {nombreAlg}")
+            resolutor=None
         for event in pygame.event.get():
             if event.type==pygame.QUIT:               
                 game_over=True
-            if event.type==pygame.MOUSEBUTTONUP:                
+                if resolutor is not None:
+                    resolutor.cancelar()
+            if event.type in (pygame.VIDEOEXPOSE, getattr(pygame, 'WINDOWEXPOSED', pygame.VIDEOEXPOSE)):
+                pintor.invalidar()
+            if event.type==pygame.MOUSEBUTTONUP and resolutor is not None:
+                #durante la búsqueda solo se atiende al botón de parar
+                if pulsaBoton(pygame.mouse.get_pos(), botStop):
+                    resolutor.cancelar()
+            elif event.type==pygame.MOUSEBUTTONUP:                
                 #obtener posición                               
                 pos=pygame.mouse.get_pos()
+                if tablero is not None and celdaEnPosicion(pos) is not None:
+                    seleccion=celdaEnPosicion(pos)
                 if pulsaBoton(pos, botLoad):                                      
                     tablero=Tablero(file)
                     copTab=copy.deepcopy(tablero)
-                    ac3_dominios=None                                    
+                    ac3_dominios=None
+                    seleccion=None
+                    celdas_cambiadas=set()
                 if pulsaBoton(pos, botBK):                    
                     if tablero is None:
                         print('Hay que cargar un sudoku')
                     else:
                         print("Ejecutando Backtracking...")
-                        tablero_temp = copy.deepcopy(tablero)
-                        inicio = time.time()
-                        solucion = backtracking(tablero_temp, dominios=ac3_dominios)
-                        fin = time.time()
-                        
-                        if solucion:
-                            tablero = tablero_temp
-                            print(f"¡Solución encontrada con Backtracking! Tiempo: {fin - inicio:.4f} segundos")
-                            ac3_dominios=None
-                        else:
-                            print("No se encontró solución con Backtracking")                                                         
+                        nombreAlg="Backtracking"
+                        resolutor=ResolutorEnSegundoPlano(backtracking_stats, tablero,
+                                                          dominios=dominiosVigentes(ac3_dominios, celdas_cambiadas)).iniciar()
                 elif pulsaBoton(pos, botFC):                    
                     if tablero is None:
                         print('Hay que cargar un sudoku')
                     else:
                         print("Ejecutando Forward Checking...")
-                        tablero_temp = copy.deepcopy(tablero)
-                        inicio = time.time()
-                        solucion = forward_checking(tablero_temp, dominios=ac3_dominios)
-                        fin = time.time()
-                        
-                        if solucion:
-                            tablero = tablero_temp
-                            print(f"¡Solución encontrada con Forward Checking! Tiempo: {fin - inicio:.4f} segundos")
-                            ac3_dominios=None
-                        else:
-                            print("No se encontró solución con Forward Checking")                    
+                        nombreAlg="Forward Checking"
+                        resolutor=ResolutorEnSegundoPlano(forward_checking_stats, tablero,
+                                                          dominios=dominiosVigentes(ac3_dominios, celdas_cambiadas)).iniciar()
                 elif pulsaBoton(pos, botAC3):
                     if tablero is None:
                         print('Hay que cargar un sudoku')
                     else:                        
                         print("Ejecutando AC3...")
-                        tablero_temp = copy.deepcopy(tablero)
                         inicio = time.time()
-                        resultado = ac3(tablero_temp)
+                        if ac3_dominios is not None:
+                            #re-propagar solo desde las celdas editadas tras el último AC3
+                            tablero_temp = copy.deepcopy(tablero)
+                            resultado = ac3_incremental(tablero_temp, ac3_dominios, celdas_cambiadas)
+                            consistente, dominios_nuevos = resultado['consistente'], resultado['dominios_despues']
+                            modo = "incremental" if resultado.get('incremental') else "completo"
+                        else:
+                            #preprocesado compartido: si este tablero ya pasó por AC3 se reutiliza
+                            preproceso = preprocesar_ac3(tablero)
+                            tablero_temp = preproceso.tablero.copia() #la instantánea no se edita
+                            consistente, dominios_nuevos = preproceso.consistente, preproceso.dominios
+                            modo = "completo"
                         fin = time.time()
                         
-                        if resultado['consistente']:
+                        if consistente:
                             tablero = tablero_temp
-                            ac3_dominios = resultado['dominios_despues']
-                            print(f"AC3 completado. Tiempo: {fin - inicio:.4f} segundos")
+                            ac3_dominios = dominios_nuevos
+                            celdas_cambiadas=set()
+                            print(f"AC3 ({modo}) completado. Tiempo: {fin - inicio:.4f} segundos")
                             print("Los dominios han sido reducidos. Puede aplicar BK o FC ahora.")
                         else:
+                            ac3_dominios=None
+                            celdas_cambiadas=set()
                             print("El problema es inconsistente después de AC3")    
+            if event.type==pygame.KEYDOWN and tablero is not None and seleccion is not None and resolutor is None:
+                #edición de la celda seleccionada: 1-9 fija un valor; 0, retroceso o suprimir la vacía
+                fil, col = seleccion
+                nuevo=None
+                if event.unicode in ('1','2','3','4','5','6','7','8','9'):
+                    nuevo=event.unicode
+                elif event.unicode=='0' or event.key in (pygame.K_BACKSPACE, pygame.K_DELETE):
+                    nuevo=VACIA
+                if nuevo is not None and tablero.getCelda(fil, col)!=nuevo:
+                    tablero.setCelda(fil, col, nuevo)
+                    copTab.setCelda(fil, col, nuevo) #lo editado se muestra como dato inicial
+                    celdas_cambiadas.add((fil, col))
                
-        #limpiar pantalla
-        screen.fill(GREY)
-        #pintar cuadrícula del sudoku  
-        pintarTablero(screen, fuenteSud, tablero, copTab)                   
-        #pintar botones        
-        pintarBoton(screen, fuenteBot, botLoad, "Load")
-        pintarBoton(screen, fuenteBot, botBK, "BK")
-        pintarBoton(screen, fuenteBot, botFC, "FC")
-        pintarBoton(screen, fuenteBot, botAC3, "AC3")        
+        #pintar solo lo que ha cambiado (durante la búsqueda, el tablero parcial)
+        if resolutor is not None:
+            progreso=resolutor.canal.ultimo()
+            parcial=desdeCadena(progreso.celdas) if progreso is not None else tablero
+            sucios=pintor.pintar(parcial, copTab, None, lineasProgreso(progreso), pygame.mouse.get_pos())
+        else:
+            sucios=pintor.pintar(tablero, copTab, seleccion, None, pygame.mouse.get_pos())
         #actualizar pantalla
-        pygame.display.flip()
+        if sucios:
+            pygame.display.update(sucios)
         reloj.tick(40)
         if game_over==True: #retardo cuando se cierra la ventana
             pygame.time.delay(500)
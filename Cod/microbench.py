@@ -0,0 +1,277 @@
+"""
+Micro-benchmarks de las primitivas del camino caliente
+======================================================
+
+Mide en ns/op las operaciones de bajo nivel que dominan el coste de BT/FC:
+
+- SudokuCSP.es_consistente
+- SudokuCSP.obtener_variable_no_asignada
+- SudokuCSP.esta_completo
+- propagar_fc + revertir_cambios (paso de FC, con su detección de vaciados)
+- Variable.eliminar_del_dominio + restaurar_en_dominio
+- SudokuCSP.__init__
+
+Las mediciones se hacen sobre estados de tablero fijos capturados de búsquedas
+FC reales sobre m0..m6 (el estado del CSP en los nodos indicados con --nodos),
+de modo que cada optimización de bajo nivel se puede comprobar por separado.
+
+Uso:
+    python microbench.py
+    python microbench.py --subset m0.txt m3.txt --nodos 1 100 --repeticiones 9
+    python microbench.py --solo es_consistente propagar+revertir --detalle --json micro.json
+"""
+
+from __future__ import annotations
+import argparse
+import copy
+import json
+import os
+import time
+from itertools import repeat
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from tablero import Tablero
+from sudoku_csp import SudokuCSP
+from algoritmos import propagar_fc, revertir_cambios
+from benchmark import GCControlado, percentil
+
+SUDOKUS = ["m0.txt", "m1.txt", "m2.txt", "m3.txt", "m4.txt", "m5.txt", "m6.txt"]
+NODOS_POR_DEFECTO = [1, 20, 50]
+
+
+class Estado:
+    """
+    Estado del CSP capturado durante una búsqueda: tablero original, valores
+    asignados por la búsqueda y dominios en ese nodo.
+    """
+
+    def __init__(self, nombre, nodo, tablero, asignaciones, dominios):
+        self.nombre = nombre
+        self.nodo = nodo
+        self.tablero = tablero
+        self.asignaciones = asignaciones
+        self.dominios = dominios
+
+    def construir_csp(self):
+        """Reconstruye un SudokuCSP idéntico al de la búsqueda en ese nodo."""
+        csp = SudokuCSP(copy.deepcopy(self.tablero), dominios=self.dominios)
+        for f, c, v in self.asignaciones:
+            csp.variables[f][c].asignar_valor(v)
+        return csp
+
+    def etiqueta(self):
+        return f"{self.nombre}@{self.nodo}"
+
+
+def capturar_estados(nombre: str, tablero: Tablero, nodos: Sequence[int]) -> List[Estado]:
+    """
+    Recorre la búsqueda FC (mismo orden que forward_checking_stats) y captura el
+    estado en cada nodo de `nodos`. Si la búsqueda termina antes, se captura el
+    último nodo visitado.
+    """
+    objetivos = sorted(set(n for n in nodos if n >= 1))
+    csp = SudokuCSP(copy.deepcopy(tablero))
+    estados: List[Estado] = []
+    contador = 0
+
+    def capturar():
+        asignaciones = [(f, c, csp.variables[f][c].valor)
+                        for f in range(9) for c in range(9)
+                        if csp.variables[f][c].esta_asignada() and not csp.variables[f][c].es_fija]
+        return Estado(nombre, contador, tablero, asignaciones, csp.snapshot_dominios())
+
+    def recursivo():
+        nonlocal contador
+        contador += 1
+        if objetivos and contador == objetivos[0]:
+            estados.append(capturar())
+            objetivos.pop(0)
+        if not objetivos:
+            return True
+        if csp.esta_completo():
+            # Búsqueda terminada antes de los nodos pedidos: se usa el estado final
+            estados.append(capturar())
+            return True
+        pos = csp.obtener_variable_no_asignada()
+        fila, columna = pos
+        variable = csp.variables[fila][columna]
+        for valor in variable.obtener_dominio():
+            if csp.es_consistente(fila, columna, valor):
+                variable.asignar_valor(valor)
+                cambios, consistente = propagar_fc(csp, fila, columna, valor)
+                if consistente:
+                    if recursivo():
+                        return True
+                variable.desasignar()
+                revertir_cambios(csp, cambios)
+        return False
+
+    recursivo()
+    return estados
+
+
+def _primera_libre(csp) -> Optional[Tuple[int, int]]:
+    """Variable MRV del estado, o cualquier libre con dominio no vacío."""
+    pos = csp.obtener_variable_no_asignada()
+    if pos is not None and csp.variables[pos[0]][pos[1]].tamano_dominio() > 0:
+        return pos
+    for f in range(9):
+        for c in range(9):
+            v = csp.variables[f][c]
+            if not v.esta_asignada() and v.tamano_dominio() > 0:
+                return (f, c)
+    return None
+
+
+def _preparar(primitiva: str, estado: Estado) -> Optional[Callable[[], object]]:
+    """Devuelve una función sin argumentos que ejecuta una vez la primitiva sobre el estado."""
+    csp = estado.construir_csp()
+    if primitiva == 'es_consistente':
+        pos = _primera_libre(csp) or (0, 0)
+        fila, columna = pos
+        return lambda: csp.es_consistente(fila, columna, '5')
+    if primitiva == 'obtener_variable_no_asignada':
+        return csp.obtener_variable_no_asignada
+    if primitiva == 'esta_completo':
+        return csp.esta_completo
+    if primitiva == 'propagar+revertir':
+        pos = _primera_libre(csp)
+        if pos is None:
+            return None
+        fila, columna = pos
+        variable = csp.variables[fila][columna]
+        valor = variable.dominio[0]
+
+        def paso_fc():
+            variable.asignar_valor(valor)
+            cambios, consistente = propagar_fc(csp, fila, columna, valor)
+            variable.desasignar()
+            revertir_cambios(csp, cambios)
+            return consistente
+        return paso_fc
+    if primitiva == 'eliminar+restaurar':
+        pos = _primera_libre(csp)
+        if pos is None:
+            return None
+        variable = csp.variables[pos[0]][pos[1]]
+        valor = variable.dominio[-1]
+
+        def eliminar_restaurar():
+            variable.eliminar_del_dominio(valor)
+            variable.restaurar_en_dominio(valor)
+        return eliminar_restaurar
+    if primitiva == 'SudokuCSP.__init__':
+        tablero = copy.deepcopy(estado.tablero)
+        return lambda: SudokuCSP(tablero)
+    if primitiva == 'SudokuCSP.__init__(dominios)':
+        tablero = copy.deepcopy(estado.tablero)
+        dominios = estado.dominios
+        return lambda: SudokuCSP(tablero, dominios=dominios)
+    if primitiva == 'llamada_vacia':
+        return lambda: None
+    raise ValueError(f"Primitiva desconocida: {primitiva}")
+
+
+PRIMITIVAS = [
+    'es_consistente',
+    'obtener_variable_no_asignada',
+    'esta_completo',
+    'propagar+revertir',
+    'eliminar+restaurar',
+    'SudokuCSP.__init__',
+    'SudokuCSP.__init__(dominios)',
+    'llamada_vacia',
+]
+
+
+def medir_ns_por_op(funcion: Callable[[], object], repeticiones: int = 7,
+                    tiempo_min: float = 0.02) -> Dict[str, float]:
+    """
+    Calibra el número de operaciones por lote para que cada lote dure al menos
+    `tiempo_min` segundos y mide `repeticiones` lotes con el GC desactivado.
+
+    Returns:
+        dict: {'ops_por_lote', 'mediana_ns', 'min_ns', 'iqr_rel'}
+    """
+    def lote(n):
+        with GCControlado():
+            t0 = time.perf_counter_ns()
+            for _ in repeat(None, n):
+                funcion()
+            return time.perf_counter_ns() - t0
+
+    n = 1
+    while True:
+        if lote(n) >= tiempo_min * 1e9 or n >= 1 << 24:
+            break
+        n *= 2
+    muestras = sorted(lote(n) / n for _ in range(repeticiones))
+    mediana = percentil(muestras, 50)
+    iqr = percentil(muestras, 75) - percentil(muestras, 25)
+    return {
+        'ops_por_lote': n,
+        'mediana_ns': round(mediana, 1),
+        'min_ns': round(muestras[0], 1),
+        'iqr_rel': round(iqr / mediana, 4) if mediana > 0 else 0.0,
+    }
+
+
+def ejecutar_microbench(estados: List[Estado], primitivas: Sequence[str],
+                        repeticiones: int = 7, tiempo_min: float = 0.02) -> List[Dict]:
+    filas = []
+    for primitiva in primitivas:
+        for estado in estados:
+            funcion = _preparar(primitiva, estado)
+            if funcion is None:
+                continue
+            r = medir_ns_por_op(funcion, repeticiones=repeticiones, tiempo_min=tiempo_min)
+            r.update({'primitiva': primitiva, 'estado': estado.etiqueta()})
+            filas.append(r)
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmarks (ns/op) de las primitivas de BT/FC')
+    parser.add_argument('--subset', nargs='*', help='Plantillas de las que capturar estados (por defecto m0..m6)')
+    parser.add_argument('--nodos', nargs='*', type=int, default=NODOS_POR_DEFECTO,
+                        help='Nodos de la búsqueda FC en los que capturar el estado')
+    parser.add_argument('--solo', nargs='*', choices=PRIMITIVAS, help='Medir solo estas primitivas')
+    parser.add_argument('--repeticiones', type=int, default=7, help='Lotes medidos por primitiva y estado')
+    parser.add_argument('--tiempo-min', type=float, default=0.02, help='Duración mínima de cada lote (s)')
+    parser.add_argument('--detalle', action='store_true', help='Mostrar cada estado en lugar del agregado')
+    parser.add_argument('--json', help='Guardar las filas medidas en este fichero JSON')
+    args = parser.parse_args()
+
+    estados: List[Estado] = []
+    for nombre in args.subset or SUDOKUS:
+        if not os.path.exists(nombre):
+            print(f"Aviso: {nombre} no existe, se omite.")
+            continue
+        etiqueta = os.path.splitext(nombre)[0].upper()
+        estados.extend(capturar_estados(etiqueta, Tablero(nombre), args.nodos))
+    print(f"Estados capturados: {', '.join(e.etiqueta() for e in estados)}\n")
+
+    filas = ejecutar_microbench(estados, args.solo or PRIMITIVAS,
+                                repeticiones=args.repeticiones, tiempo_min=args.tiempo_min)
+
+    if args.detalle:
+        print(f"{'primitiva':30} {'estado':10} {'mediana ns/op':>14} {'min ns/op':>11} {'IQR rel':>8}")
+        for r in filas:
+            print(f"{r['primitiva']:30} {r['estado']:10} {r['mediana_ns']:14.1f} {r['min_ns']:11.1f} {r['iqr_rel']:8.3f}")
+    else:
+        print(f"{'primitiva':30} {'estados':>7} {'mediana ns/op':>14} {'min ns/op':>11} {'max ns/op':>11}")
+        for primitiva in args.solo or PRIMITIVAS:
+            valores = sorted(r['mediana_ns'] for r in filas if r['primitiva'] == primitiva)
+            if not valores:
+                continue
+            print(f"{primitiva:30} {len(valores):7d} {percentil(valores, 50):14.1f} "
+                  f"{valores[0]:11.1f} {valores[-1]:11.1f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(filas, f, indent=1)
+        print(f"\nResultados guardados en: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
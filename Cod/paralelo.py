@@ -0,0 +1,340 @@
+"""
+Resolución en paralelo con memoria compartida
+=============================================
+
+Reparte un corpus de Sudokus entre procesos sin serializar tableros ni
+dominios: el corpus (81 bytes por Sudoku), las máscaras de dominios
+reducidos (81 enteros de 16 bits, bit v-1 = valor v) y los resultados viven
+en un único bloque de `multiprocessing.shared_memory`. Cada tarea que se
+envía al pool es solo un rango de índices (inicio, fin); el proceso lee sus
+Sudokus del bloque, los resuelve y escribe éxito, nodos, tiempo y solución en
+su parte del array de resultados. Lo único que vuelve por pickle es un entero.
+
+Con un algoritmo `ac3+*`, AC3 se ejecuta una vez en el proceso principal
+(`preprocesar_ac3`) y los procesos reciben el tablero reducido y sus máscaras.
+
+`--comparar` ejecuta además el reparto clásico (un Tablero y su matriz de
+dominios serializados por tarea) y comprueba que los resultados coinciden.
+
+Uso:
+    python paralelo.py m0.txt m1.txt m2.txt [--algo fc] [--procesos 4] [--bloque 8]
+    python paralelo.py sudokus.txt --algo ac3+fc --repetir 50 --comparar
+    python paralelo.py m*.txt --csv paralelo.csv
+"""
+
+from __future__ import annotations
+import argparse
+import csv
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+from tablero import Tablero, tablerosDesdeTexto
+from algoritmos import backtracking_stats, forward_checking_stats, generar_soluciones, preprocesar_ac3
+from sudoku_csp import EstadoDominios
+
+ALGORITMOS = ('bt', 'fc', 'mac', 'ac3+bt', 'ac3+fc')
+CELDAS = 81
+
+# Estado por Sudoku en el array de resultados
+PENDIENTE, RESUELTO, SIN_SOLUCION, LIMITE, INCONSISTENTE = range(5)
+NOMBRES_ESTADO = ('pendiente', 'resuelto', 'sin_solucion', 'limite', 'inconsistente')
+
+# Bytes por elemento de cada formato de memoryview
+_BYTES = {'q': 8, 'd': 8, 'H': 2, 'B': 1}
+
+# Celdas empaquetadas como bytes 0..9 <-> caracteres '0'..'9'
+_A_DIGITO = bytes.maketrans(bytes(range(10)), b'0123456789')
+_A_VALOR = bytes.maketrans(b'0123456789', bytes(range(10)))
+
+
+def disposicion(n: int) -> Dict[str, Tuple[int, int, str]]:
+    """
+    Campos del bloque compartido para `n` Sudokus: {campo: (desplazamiento,
+    elementos, formato de memoryview)}. Los campos de 8 bytes van primero para
+    que todos queden alineados.
+    """
+    campos = (('nodos', n, 'q'), ('tiempo_ms', n, 'd'), ('mascaras', n * CELDAS, 'H'),
+              ('tableros', n * CELDAS, 'B'), ('soluciones', n * CELDAS, 'B'), ('estado', n, 'B'))
+    resultado, desplazamiento = {}, 0
+    for nombre, elementos, formato in campos:
+        resultado[nombre] = (desplazamiento, elementos, formato)
+        desplazamiento += elementos * _BYTES[formato]
+    return resultado
+
+
+def _vistas(buffer, n: int) -> Dict[str, memoryview]:
+    """Un memoryview tipado por campo sobre el buffer del bloque."""
+    return {nombre: buffer[inicio:inicio + elementos * _BYTES[formato]].cast(formato)
+            for nombre, (inicio, elementos, formato) in disposicion(n).items()}
+
+
+def _liberar(vistas: Dict[str, memoryview]) -> None:
+    # SharedMemory.close() falla si quedan memoryviews vivos sobre el buffer
+    for vista in vistas.values():
+        vista.release()
+    vistas.clear()
+
+
+class CorpusCompartido:
+    """
+    Corpus, máscaras de dominios y resultados en un bloque de memoria
+    compartida. Se usa como gestor de contexto: al salir se cierra y se
+    elimina el bloque.
+    """
+
+    def __init__(self, tableros: List[Tablero], algoritmo: str = 'fc'):
+        """
+        Args:
+            tableros (list[Tablero]): Sudokus a resolver
+            algoritmo (str): Uno de ALGORITMOS; con 'ac3+*' se guardan el
+                tablero y los dominios reducidos por AC3
+        """
+        self.n = len(tableros)
+        self.algoritmo = algoritmo
+        tamano = sum(elementos * _BYTES[formato] for _, elementos, formato in disposicion(self.n).values())
+        self.memoria = shared_memory.SharedMemory(create=True, size=max(tamano, 1))
+        self.vistas = _vistas(self.memoria.buf, self.n)
+        self.tiempo_ac3_ms = 0.0
+        self._cargar(tableros)
+
+    @property
+    def nombre(self) -> str:
+        return self.memoria.name
+
+    def _cargar(self, tableros: List[Tablero]) -> None:
+        tabs, mascaras, estado = self.vistas['tableros'], self.vistas['mascaras'], self.vistas['estado']
+        for i, tab in enumerate(tableros):
+            base = i * CELDAS
+            if self.algoritmo.startswith('ac3+'):
+                preproceso = preprocesar_ac3(tab)
+                self.tiempo_ac3_ms += preproceso.tiempo_ms
+                tab = preproceso.tablero
+                if not preproceso.consistente:
+                    estado[i] = INCONSISTENTE
+                for k, m in enumerate(preproceso.dominios.mascaras):
+                    mascaras[base + k] = m
+            celdas = ''.join(''.join(fila) for fila in tab.getTablero())
+            tabs[base:base + CELDAS] = celdas.encode('ascii').translate(_A_VALOR)
+
+    def resultados(self) -> List[Dict]:
+        """Resultados por Sudoku leídos del array compartido."""
+        v = self.vistas
+        filas = []
+        for i in range(self.n):
+            estado = v['estado'][i]
+            base = i * CELDAS
+            solucion = None
+            if estado == RESUELTO:
+                solucion = bytes(v['soluciones'][base:base + CELDAS]).translate(_A_DIGITO).decode('ascii')
+            filas.append({'indice': i, 'estado': NOMBRES_ESTADO[estado], 'exito': estado == RESUELTO,
+                          'nodos': v['nodos'][i], 'limite_excedido': estado == LIMITE,
+                          'tiempo_ms': round(v['tiempo_ms'][i], 3), 'solucion': solucion})
+        return filas
+
+    def cerrar(self) -> None:
+        _liberar(self.vistas)
+        self.memoria.close()
+        self.memoria.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+# Estado de cada proceso del pool: bloque adjunto y sus vistas
+_MEMORIA: Optional[shared_memory.SharedMemory] = None
+_VISTAS: Dict[str, memoryview] = {}
+
+
+def _adjuntar(nombre: str, n: int) -> None:
+    """Inicializador del pool: abre el bloque compartido en el proceso."""
+    global _MEMORIA, _VISTAS
+    # Los procesos del pool comparten el resource_tracker del principal, que
+    # es quien elimina el bloque (unlink) al terminar
+    _MEMORIA = shared_memory.SharedMemory(name=nombre)
+    _VISTAS = _vistas(_MEMORIA.buf, n)
+
+
+def _tablero_y_dominios(vistas: Dict[str, memoryview], i: int, con_dominios: bool):
+    """Reconstruye el Tablero (y los dominios, si hay máscaras) del Sudoku i."""
+    base = i * CELDAS
+    celdas = bytes(vistas['tableros'][base:base + CELDAS]).translate(_A_DIGITO).decode('ascii')
+    tab = Tablero()
+    tab.tablero = [list(celdas[f * 9:f * 9 + 9]) for f in range(9)]
+    if not con_dominios:
+        return tab, None
+    return tab, EstadoDominios(vistas['mascaras'][base:base + CELDAS].tolist())
+
+
+def resolver_rango(inicio: int, fin: int, algoritmo: str, max_nodos: Optional[int] = None,
+                   vistas: Optional[Dict[str, memoryview]] = None) -> int:
+    """
+    Resuelve los Sudokus [inicio, fin) del bloque compartido y escribe sus
+    resultados en él. Se ejecuta en los procesos del pool (con las vistas de
+    `_adjuntar`) o en el principal pasando `vistas`.
+
+    Returns:
+        int: Sudokus procesados
+    """
+    v = vistas if vistas is not None else _VISTAS
+    con_dominios = algoritmo.startswith('ac3+')
+    resolutor = backtracking_stats if algoritmo.endswith('bt') else forward_checking_stats
+    for i in range(inicio, fin):
+        if v['estado'][i] == INCONSISTENTE:
+            continue
+        tab, dominios = _tablero_y_dominios(v, i, con_dominios)
+        t0 = time.perf_counter()
+        if algoritmo == 'mac':
+            metricas = {}
+            solucion = next(generar_soluciones(tab, max_nodos=max_nodos, metricas=metricas), None)
+            r = {'exito': solucion is not None, 'nodos': metricas.get('nodos', 0),
+                 'limite_excedido': metricas.get('limite_excedido', False)}
+        else:
+            r = resolutor(tab, max_nodos=max_nodos, dominios=dominios)
+            solucion = ''.join(''.join(fila) for fila in r['tablero'].getTablero()) if r['exito'] else None
+        v['tiempo_ms'][i] = (time.perf_counter() - t0) * 1000
+        v['nodos'][i] = r['nodos']
+        if r['exito']:
+            base = i * CELDAS
+            v['soluciones'][base:base + CELDAS] = solucion.encode('ascii').translate(_A_VALOR)
+            v['estado'][i] = RESUELTO
+        else:
+            v['estado'][i] = LIMITE if r['limite_excedido'] else SIN_SOLUCION
+    return fin - inicio
+
+
+def rangos(n: int, bloque: int) -> List[Tuple[int, int]]:
+    """Divide [0, n) en rangos consecutivos de `bloque` Sudokus."""
+    return [(i, min(i + bloque, n)) for i in range(0, n, bloque)]
+
+
+def resolver_en_paralelo(corpus: CorpusCompartido, procesos: Optional[int] = None, bloque: int = 8,
+                         max_nodos: Optional[int] = None) -> float:
+    """
+    Reparte el corpus por rangos entre `procesos` procesos (o lo resuelve en
+    el proceso actual si `procesos` es 0). Los resultados quedan en el bloque.
+
+    Returns:
+        float: Tiempo total en ms (sin incluir la carga del corpus)
+    """
+    t0 = time.perf_counter()
+    if procesos == 0:
+        resolver_rango(0, corpus.n, corpus.algoritmo, max_nodos, vistas=corpus.vistas)
+        return (time.perf_counter() - t0) * 1000
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_adjuntar,
+                             initargs=(corpus.nombre, corpus.n)) as pool:
+        futuros = [pool.submit(resolver_rango, inicio, fin, corpus.algoritmo, max_nodos)
+                   for inicio, fin in rangos(corpus.n, bloque)]
+        procesados = sum(f.result() for f in futuros)
+    assert procesados == corpus.n
+    return (time.perf_counter() - t0) * 1000
+
+
+def _resolver_serializado(tab: Tablero, dominios, algoritmo: str, max_nodos: Optional[int]) -> Tuple:
+    """Tarea del reparto clásico: recibe el Tablero y los dominios por pickle."""
+    if algoritmo == 'mac':
+        metricas = {}
+        solucion = next(generar_soluciones(tab, max_nodos=max_nodos, metricas=metricas), None)
+        return solucion is not None, metricas.get('nodos', 0)
+    resolutor = backtracking_stats if algoritmo.endswith('bt') else forward_checking_stats
+    r = resolutor(tab, max_nodos=max_nodos, dominios=dominios)
+    return r['exito'], r['nodos']
+
+
+def resolver_serializado(tableros: List[Tablero], algoritmo: str, procesos: Optional[int] = None,
+                         max_nodos: Optional[int] = None) -> Tuple[List[Tuple], float, int]:
+    """
+    Reparto clásico, para comparar: una tarea por Sudoku con su Tablero y su
+    matriz de dominios serializados.
+
+    Returns:
+        tuple: ([(exito, nodos)], tiempo total en ms, bytes serializados de los argumentos)
+    """
+    tareas = []
+    for tab in tableros:
+        dominios = None
+        if algoritmo.startswith('ac3+'):
+            preproceso = preprocesar_ac3(tab)
+            if not preproceso.consistente:
+                tareas.append(None)
+                continue
+            tab = preproceso.tablero
+            dominios = [[list(d) for d in fila] for fila in preproceso.dominios]
+        tareas.append((tab, dominios, algoritmo, max_nodos))
+    serializados = sum(len(pickle.dumps(t)) for t in tareas if t is not None)
+
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = [pool.submit(_resolver_serializado, *t) if t is not None else None for t in tareas]
+        resultados = [f.result() if f is not None else (False, 0) for f in futuros]
+    return resultados, (time.perf_counter() - t0) * 1000, serializados
+
+
+def leer_corpus(ficheros: List[str], repetir: int = 1) -> List[Tablero]:
+    """Sudokus de los ficheros (plantillas o líneas de 81), repetidos `repetir` veces."""
+    tableros = []
+    for fichero in ficheros:
+        with open(fichero, encoding='utf-8') as f:
+            tableros.extend(tablerosDesdeTexto(f.read()))
+    return [tab.copia() for _ in range(repetir) for tab in tableros]
+
+
+def guardar_csv(filas: List[Dict], csv_file: str) -> None:
+    campos = ['indice', 'estado', 'exito', 'nodos', 'limite_excedido', 'tiempo_ms', 'solucion']
+    with open(csv_file, 'w', newline='', encoding='utf-8') as f:
+        w = csv.DictWriter(f, fieldnames=campos)
+        w.writeheader()
+        for fila in filas:
+            w.writerow({**fila, 'exito': int(fila['exito']), 'limite_excedido': int(fila['limite_excedido'])})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Resolución en paralelo con el corpus en memoria compartida')
+    parser.add_argument('ficheros', nargs='+', help='Ficheros de Sudokus (plantillas o líneas de 81)')
+    parser.add_argument('--algo', choices=ALGORITMOS, default='fc', help='Algoritmo')
+    parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1,
+                        help='Procesos del pool (0 = en este proceso)')
+    parser.add_argument('--bloque', type=int, default=8, help='Sudokus por rango enviado a cada tarea')
+    parser.add_argument('--max-nodos', type=int, default=None, help='Límite de nodos por Sudoku')
+    parser.add_argument('--repetir', type=int, default=1, help='Repetir el corpus N veces (pruebas de escala)')
+    parser.add_argument('--comparar', action='store_true',
+                        help='Comparar con el reparto clásico (Tablero y dominios por pickle)')
+    parser.add_argument('--csv', help='Guardar los resultados por Sudoku en este CSV')
+    args = parser.parse_args()
+
+    tableros = leer_corpus(args.ficheros, args.repetir)
+    if not tableros:
+        raise SystemExit("No se encontró ningún Sudoku en los ficheros indicados")
+
+    t0 = time.perf_counter()
+    with CorpusCompartido(tableros, args.algo) as corpus:
+        carga_ms = (time.perf_counter() - t0) * 1000
+        total_ms = resolver_en_paralelo(corpus, args.procesos, args.bloque, args.max_nodos)
+        filas = corpus.resultados()
+        tamano = corpus.memoria.size
+
+    resueltos = sum(f['exito'] for f in filas)
+    print(f"{len(filas)} Sudokus | {args.algo} | {args.procesos} procesos | bloques de {args.bloque}")
+    print(f"  memoria compartida: {tamano} bytes ({tamano / len(filas):.0f} por Sudoku), carga {carga_ms:.1f} ms")
+    print(f"  resueltos: {resueltos}/{len(filas)} | nodos: {sum(f['nodos'] for f in filas)} | "
+          f"total {total_ms:.1f} ms ({len(filas) / (total_ms / 1000):.0f} Sudokus/s)")
+
+    if args.comparar:
+        clasicos, clasico_ms, serializados = resolver_serializado(tableros, args.algo, args.procesos, args.max_nodos)
+        iguales = all((f['exito'], f['nodos']) == c for f, c in zip(filas, clasicos))
+        print(f"  reparto clásico: total {clasico_ms:.1f} ms, {serializados} bytes serializados "
+              f"({serializados / len(filas):.0f} por Sudoku) | resultados {'iguales' if iguales else 'DISTINTOS'}")
+
+    if args.csv:
+        guardar_csv(filas, args.csv)
+        print(f"\nResultados guardados en: {args.csv}")
+
+
+if __name__ == '__main__':
+    main()
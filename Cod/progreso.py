@@ -0,0 +1,111 @@
+"""
+Resolución en segundo plano con progreso en vivo
+================================================
+
+`CanalProgreso` es el canal entre el hilo que resuelve y el que pinta: el
+resolutor llama a `notificar` cada `intervalo` nodos y, como mucho una vez
+por periodo (por defecto a 40 Hz), publica una instantánea inmutable
+(nodos, nodos/s, profundidad y tablero parcial). La publicación es una sola
+asignación de referencia, por lo que el lector no necesita bloqueos: siempre
+ve la última instantánea completa.
+
+`ResolutorEnSegundoPlano` ejecuta backtracking_stats / forward_checking_stats
+en un hilo aparte con ese canal, de modo que la GUI sigue respondiendo y
+puede cancelar la búsqueda.
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+# Instantánea publicada por el resolutor
+Progreso = namedtuple('Progreso', ['segundos', 'nodos', 'nodos_por_segundo', 'profundidad', 'celdas'])
+
+
+class CanalProgreso:
+    """
+    Canal de progreso entre un resolutor y un lector (sin bloqueos).
+    """
+
+    def __init__(self, intervalo=256, periodo=1 / 40):
+        """
+        Args:
+            intervalo (int): Cada cuántos nodos consulta el resolutor el canal
+            periodo (float): Tiempo mínimo (s) entre dos instantáneas publicadas
+        """
+        self.intervalo = intervalo
+        self.periodo = periodo
+        self._cancelar = threading.Event()
+        self._ultimo = None
+        self._inicio = time.perf_counter()
+        self._t_anterior = self._inicio
+        self._nodos_anteriores = 0
+
+    def notificar(self, nodos, profundidad, csp):
+        """
+        Llamado por el resolutor. Publica una instantánea si ha pasado el
+        periodo desde la anterior.
+
+        Returns:
+            bool: True si se ha pedido cancelar la búsqueda
+        """
+        ahora = time.perf_counter()
+        if ahora - self._t_anterior >= self.periodo:
+            ritmo = (nodos - self._nodos_anteriores) / (ahora - self._t_anterior)
+            celdas = ''.join([variable.valor for fila in csp.variables for variable in fila])
+            self._ultimo = Progreso(ahora - self._inicio, nodos, ritmo, profundidad, celdas)
+            self._t_anterior = ahora
+            self._nodos_anteriores = nodos
+        return self._cancelar.is_set()
+
+    def ultimo(self):
+        """Última instantánea publicada, o None si aún no hay ninguna."""
+        return self._ultimo
+
+    def cancelar(self):
+        """Pide al resolutor que se detenga en su próxima consulta."""
+        self._cancelar.set()
+
+    def cancelado(self):
+        return self._cancelar.is_set()
+
+
+class ResolutorEnSegundoPlano:
+    """
+    Ejecuta un resolutor con métricas (backtracking_stats, forward_checking_stats)
+    en un hilo demonio, publicando su avance en un CanalProgreso.
+    """
+
+    def __init__(self, resolutor, tablero, **opciones):
+        """
+        Args:
+            resolutor (callable): Función resolutor(tablero, progreso=..., **opciones) -> dict
+            tablero (Tablero): Tablero a resolver (el resolutor trabaja sobre una copia)
+            opciones: Parámetros adicionales del resolutor (max_nodos, dominios...)
+        """
+        self.canal = CanalProgreso()
+        self.resultado = None
+        self.error = None
+        self.segundos = 0.0
+        self._resolutor = resolutor
+        self._tablero = tablero
+        self._opciones = opciones
+        self._hilo = threading.Thread(target=self._ejecutar, daemon=True)
+
+    def _ejecutar(self):
+        inicio = time.perf_counter()
+        try:
+            self.resultado = self._resolutor(self._tablero, progreso=self.canal, **self._opciones)
+        except Exception as e:  # se informa al hilo principal en lugar de perderse
+            self.error = e
+        self.segundos = time.perf_counter() - inicio
+
+    def iniciar(self):
+        self._hilo.start()
+        return self
+
+    def activo(self):
+        return self._hilo.is_alive()
+
+    def cancelar(self):
+        self.canal.cancelar()
@@ -0,0 +1,451 @@
+"""
+Reglas de inferencia "humanas" hasta el punto fijo
+==================================================
+
+`_reduccion_inicial_dominios`, AC3 y MAC solo eliminan el valor de un vecino
+de dominio unitario (single desnudo). Aquí se añade una cadena configurable
+de reglas baratas de las que usa una persona al resolver a mano:
+
+- singles_desnudos: una celda libre con un único candidato lo elimina de sus
+  vecinos libres.
+- singles_ocultos: si un dígito solo cabe en una celda de una unidad, esa
+  celda se queda solo con él.
+- pares_apuntados: si en un bloque un dígito solo cabe en una fila (o
+  columna), se elimina de esa fila (o columna) fuera del bloque.
+- caja_linea: si en una fila (o columna) un dígito solo cabe dentro de un
+  bloque, se elimina del resto del bloque.
+- subconjuntos_desnudos: k celdas de una unidad (k = 2, 3) cuyos candidatos
+  juntos son k dígitos; esos dígitos se eliminan del resto de la unidad.
+- subconjuntos_ocultos: k dígitos (k = 2, 3) que en una unidad solo caben en
+  las mismas k celdas; esas celdas pierden los demás candidatos.
+
+`Inferencia.aplicar` ejecuta las reglas en orden y vuelve a la primera en
+cuanto una elimina algo, hasta que ninguna cambia nada (las baratas se
+agotan antes de probar las caras). Cuenta, por regla, las veces que actuó,
+los valores eliminados y el tiempo. Las reglas solo eliminan candidatos (no
+asignan); los cambios se devuelven como (fila, columna, valor), igual que
+propagar_fc/propagar_mac, para deshacerlos con revertir_cambios. Dentro de
+la búsqueda solo se revisan las celdas que cambiaron y sus unidades.
+
+resolver_con_reglas resuelve solo con las reglas cuando bastan y, si no,
+busca con Forward Checking aplicando en cada nodo únicamente los singles.
+
+Uso:
+    python reglas.py m1.txt [--reglas singles_desnudos singles_ocultos]
+    python reglas.py m1.txt m2.txt m5.txt m6.txt --comprobar
+"""
+
+import time
+from itertools import combinations
+
+REGLAS = ('singles_desnudos', 'singles_ocultos', 'pares_apuntados', 'caja_linea',
+          'subconjuntos_desnudos', 'subconjuntos_ocultos')
+# Reglas que resolver_con_reglas sigue aplicando dentro de la búsqueda: las
+# demás se pagan en cada nodo y casi nunca ahorran nodos tras la raíz
+REGLAS_BUSQUEDA = ('singles_desnudos', 'singles_ocultos')
+
+
+def _libres_y_usados(csp, unidad):
+    """Celdas libres (fila, columna, variable) de la unidad y dígitos ya asignados en ella."""
+    libres, usados = [], set()
+    for f, c in unidad:
+        variable = csp.variables[f][c]
+        if variable.esta_asignada():
+            usados.add(variable.valor)
+        else:
+            libres.append((f, c, variable))
+    return libres, usados
+
+
+def _posiciones(libres, usados):
+    """
+    Dígito -> celdas libres (fila, columna, variable) de la unidad que lo
+    admiten. Se omiten los dígitos ya asignados en la unidad: sus celdas libres
+    pueden conservarlos si los dominios no se redujeron antes.
+    """
+    posiciones = {}
+    for celda in libres:
+        for v in celda[2].dominio:
+            if v not in usados:
+                posiciones.setdefault(v, []).append(celda)
+    return posiciones
+
+
+def _eliminar(celdas, valor, cambios):
+    """Elimina `valor` de las celdas; False si alguna se queda sin candidatos."""
+    for f, c, variable in celdas:
+        if variable.eliminar_del_dominio(valor):
+            cambios.append((f, c, valor))
+            if not variable.dominio:
+                return False
+    return True
+
+
+def _bloque(f, c):
+    return f // 3 * 3 + c // 3
+
+
+def _indices_unidades(celdas):
+    """Índices en csp.restricciones (filas 0-8, columnas 9-17, bloques 18-26) de las unidades de las celdas."""
+    unidades = set()
+    for f, c in celdas:
+        unidades.update((f, 9 + c, 18 + _bloque(f, c)))
+    return sorted(unidades)
+
+
+def _unidades(csp, celdas):
+    """Unidades que contienen alguna de las celdas (None = las 27)."""
+    if celdas is None:
+        return csp.restricciones
+    return [csp.restricciones[u] for u in _indices_unidades(celdas)]
+
+
+def singles_desnudos(csp, celdas=None):
+    cambios = []
+    variables = csp.variables
+    if celdas is None:
+        celdas = [(f, c) for f in range(9) for c in range(9)]
+    for f, c in sorted(celdas):
+        variable = variables[f][c]
+        if variable.esta_asignada() or len(variable.dominio) != 1:
+            continue
+        v = variable.dominio[0]
+        vecinas = [(fv, cv, variables[fv][cv]) for fv, cv in csp.vecinos(f, c)
+                   if not variables[fv][cv].esta_asignada()]
+        if not _eliminar(vecinas, v, cambios):
+            return cambios, False
+    return cambios, True
+
+
+def singles_ocultos(csp, celdas=None):
+    cambios = []
+    for unidad in _unidades(csp, celdas):
+        libres, usados = _libres_y_usados(csp, unidad)
+        posiciones = _posiciones(libres, usados)
+        for v in '123456789':
+            if v in usados:
+                continue
+            celdas = posiciones.get(v)
+            if not celdas:
+                return cambios, False  # El dígito ya no cabe en la unidad
+            if len(celdas) == 1:
+                f, c, variable = celdas[0]
+                if v not in variable.dominio:
+                    return cambios, False  # La celda ya quedó forzada a otro dígito oculto
+                for otro in [d for d in variable.dominio if d != v]:
+                    variable.eliminar_del_dominio(otro)
+                    cambios.append((f, c, otro))
+    return cambios, True
+
+
+def pares_apuntados(csp, celdas=None):
+    cambios = []
+    variables = csp.variables
+    bloques = range(9) if celdas is None else sorted({_bloque(f, c) for f, c in celdas})
+    for b in bloques:
+        libres, usados = _libres_y_usados(csp, csp.restricciones[18 + b])
+        for v, celdas in _posiciones(libres, usados).items():
+            filas = {f for f, _, _ in celdas}
+            columnas = {c for _, c, _ in celdas}
+            if len(filas) == 1:
+                f = filas.pop()
+                fuera = [(f, c, variables[f][c]) for c in range(9)
+                         if _bloque(f, c) != b and not variables[f][c].esta_asignada()]
+                if not _eliminar(fuera, v, cambios):
+                    return cambios, False
+            if len(columnas) == 1:
+                c = columnas.pop()
+                fuera = [(f, c, variables[f][c]) for f in range(9)
+                         if _bloque(f, c) != b and not variables[f][c].esta_asignada()]
+                if not _eliminar(fuera, v, cambios):
+                    return cambios, False
+    return cambios, True
+
+
+def caja_linea(csp, celdas=None):
+    cambios = []
+    variables = csp.variables
+    lineas = range(18) if celdas is None else [u for u in _indices_unidades(celdas) if u < 18]
+    for u in lineas:
+        libres, usados = _libres_y_usados(csp, csp.restricciones[u])
+        for v, celdas in _posiciones(libres, usados).items():
+            bloques = {_bloque(f, c) for f, c, _ in celdas}
+            if len(bloques) != 1:
+                continue
+            b = bloques.pop()
+            resto = [(f, c, variables[f][c]) for f, c in csp.restricciones[18 + b]
+                     if (f if u < 9 else 9 + c) != u and not variables[f][c].esta_asignada()]
+            if not _eliminar(resto, v, cambios):
+                return cambios, False
+    return cambios, True
+
+
+def subconjuntos_desnudos(csp, celdas=None, tamanos=(2, 3)):
+    cambios = []
+    for unidad in _unidades(csp, celdas):
+        libres, usados = _libres_y_usados(csp, unidad)
+        for k in tamanos:
+            if len(libres) <= k:
+                continue
+            candidatas = [celda for celda in libres if 2 <= len(celda[2].dominio) <= k]
+            for grupo in combinations(candidatas, k):
+                valores = set()
+                for _, _, variable in grupo:
+                    valores.update(variable.dominio)
+                valores -= usados
+                if len(valores) != k:
+                    continue
+                resto = [celda for celda in libres if celda not in grupo]
+                for v in sorted(valores):
+                    if not _eliminar(resto, v, cambios):
+                        return cambios, False
+    return cambios, True
+
+
+def subconjuntos_ocultos(csp, celdas=None, tamanos=(2, 3)):
+    cambios = []
+    for unidad in _unidades(csp, celdas):
+        libres, usados = _libres_y_usados(csp, unidad)
+        posiciones = _posiciones(libres, usados)
+        for k in tamanos:
+            if len(libres) <= k:
+                continue
+            digitos = [v for v, celdas in posiciones.items() if 2 <= len(celdas) <= k]
+            for grupo in combinations(sorted(digitos), k):
+                celdas = {(f, c): variable for v in grupo for f, c, variable in posiciones[v]}
+                if len(celdas) != k:
+                    continue
+                for (f, c), variable in celdas.items():
+                    for otro in [d for d in variable.dominio if d not in grupo]:
+                        variable.eliminar_del_dominio(otro)
+                        cambios.append((f, c, otro))
+                    if not variable.dominio:
+                        return cambios, False
+    return cambios, True
+
+
+_FUNCIONES = {
+    'singles_desnudos': singles_desnudos,
+    'singles_ocultos': singles_ocultos,
+    'pares_apuntados': pares_apuntados,
+    'caja_linea': caja_linea,
+    'subconjuntos_desnudos': subconjuntos_desnudos,
+    'subconjuntos_ocultos': subconjuntos_ocultos,
+}
+
+
+class Inferencia:
+    """
+    Cadena de reglas de inferencia con contadores por regla.
+
+    Atributos:
+        reglas (tuple[str]): Reglas activas, en orden de aplicación
+        contadores (dict): Regla -> {'aplicaciones', 'eliminados', 'tiempo_ms'}
+    """
+
+    def __init__(self, reglas=REGLAS):
+        """
+        Args:
+            reglas (Iterable[str]): Nombres de REGLAS a usar, de la más barata
+                a la más cara
+        """
+        self.reglas = tuple(reglas)
+        for regla in self.reglas:
+            if regla not in _FUNCIONES:
+                raise ValueError(f"Regla desconocida: {regla} (opciones: {', '.join(REGLAS)})")
+        self.contadores = {regla: {'aplicaciones': 0, 'eliminados': 0, 'tiempo_ms': 0.0}
+                           for regla in self.reglas}
+
+    def aplicar(self, csp, celdas=None):
+        """
+        Aplica las reglas hasta el punto fijo.
+
+        Args:
+            csp (SudokuCSP): Problema (se modifica)
+            celdas (set[tuple] | None): Celdas (fila, columna) que cambiaron
+                desde el último punto fijo; las reglas solo revisan esas celdas
+                y sus unidades. None = todo el tablero. Cada eliminación añade
+                su celda al conjunto, así que el punto fijo es el mismo que
+                revisándolo todo.
+
+        Returns:
+            tuple: (cambios, consistente)
+        """
+        cambios = []
+        i = 0
+        while i < len(self.reglas):
+            regla = self.reglas[i]
+            t0 = time.perf_counter()
+            nuevos, consistente = _FUNCIONES[regla](csp, celdas)
+            contador = self.contadores[regla]
+            contador['tiempo_ms'] += (time.perf_counter() - t0) * 1000
+            cambios.extend(nuevos)
+            if nuevos:
+                contador['aplicaciones'] += 1
+                contador['eliminados'] += len(nuevos)
+                if celdas is not None:
+                    celdas.update((f, c) for f, c, _ in nuevos)
+            if not consistente:
+                return cambios, False
+            i = 0 if nuevos else i + 1
+        return cambios, True
+
+    def propagador(self, propagar):
+        """
+        Paso de búsqueda: `propagar` (p. ej. propagar_fc) seguido de las
+        reglas, revisando solo la celda asignada, las que perdieron valores y
+        sus unidades (el nodo padre ya estaba en punto fijo).
+
+        Returns:
+            Callable: (csp, fila, columna, valor) -> (cambios, consistente)
+        """
+        def propagar_con_reglas(csp, fila, columna, valor):
+            cambios, consistente = propagar(csp, fila, columna, valor)
+            if not consistente:
+                return cambios, False
+            celdas = {(f, c) for f, c, _ in cambios}
+            celdas.add((fila, columna))
+            nuevos, consistente = self.aplicar(csp, celdas)
+            cambios.extend(nuevos)
+            return cambios, consistente
+        return propagar_con_reglas
+
+    def resumen(self):
+        """Contadores redondeados (ms con 3 decimales), para informes y JSON."""
+        return {regla: {**c, 'tiempo_ms': round(c['tiempo_ms'], 3)} for regla, c in self.contadores.items()}
+
+
+def aplicar_reglas(tablero, dominios=None, reglas=REGLAS):
+    """
+    Preprocesado: como ac3, pero con la cadena de reglas. Las celdas cuyo
+    dominio queda unitario se asignan en `tablero`.
+
+    Args:
+        tablero (Tablero): Tablero inicial (se modifica como en ac3)
+        dominios (list[list[list[str]]] | None): Dominios iniciales opcionales
+        reglas (Iterable[str] | Inferencia): Reglas a aplicar
+
+    Returns:
+        dict: {'consistente', 'dominios_antes', 'dominios_despues', 'resueltas',
+               'resuelto' (sin celdas libres), 'contadores'}
+    """
+    from algoritmos import _cerrar_ac3
+    from sudoku_csp import SudokuCSP
+
+    csp = SudokuCSP(tablero, dominios=dominios)
+    dominios_antes = csp.estado_dominios()
+    inferencia = reglas if isinstance(reglas, Inferencia) else Inferencia(reglas)
+    consistente = csp.fijas_consistentes() and inferencia.aplicar(csp)[1]
+    resultado = _cerrar_ac3(csp, tablero, dominios_antes, consistente, verbose=False)
+    resultado['resuelto'] = consistente and all(v != '0' for fila in tablero.getTablero() for v in fila)
+    resultado['contadores'] = inferencia.resumen()
+    return resultado
+
+
+def resolver_con_reglas(tablero, max_nodos=None, dominios=None, reglas=REGLAS, **opciones):
+    """
+    Resuelve primero solo con las reglas (aplicar_reglas, sin búsqueda) y, si
+    quedan celdas libres, con Forward Checking sobre los dominios que dejan,
+    aplicando en cada nodo únicamente las REGLAS_BUSQUEDA elegidas y solo
+    sobre las celdas que cambiaron (ver Inferencia.propagador).
+
+    Args:
+        tablero (Tablero): Tablero inicial (no se modifica)
+        max_nodos (int|None): Límite de nodos de la búsqueda
+        dominios (list[list[list[str]]] | None): Dominios iniciales opcionales
+        reglas (Iterable[str] | Inferencia): Reglas de la raíz; sus contadores
+            acumulan también los de la búsqueda
+        **opciones: Resto de argumentos de forward_checking_stats (simetria,
+            heuristica, progreso, traza...)
+
+    Returns:
+        dict: Como forward_checking_stats, con 'reglas' (contadores por regla);
+            'nodos' = 0 si las reglas bastaron
+    """
+    from algoritmos import forward_checking_stats
+    from sudoku_csp import SudokuCSP
+
+    inferencia = reglas if isinstance(reglas, Inferencia) else Inferencia(reglas)
+    tablero = tablero.copia()
+    pre = aplicar_reglas(tablero, dominios=dominios, reglas=inferencia)
+    if not pre['consistente'] or pre['resuelto']:
+        exito = pre['resuelto'] and SudokuCSP(tablero).fijas_consistentes()
+        return {'exito': exito, 'nodos': 0, 'limite_excedido': False, 'cancelado': False,
+                'podados_simetria': 0, 'tablero': tablero if exito else None, 'reglas': inferencia.contadores}
+    busqueda = None
+    elegidas = [regla for regla in inferencia.reglas if regla in REGLAS_BUSQUEDA]
+    if elegidas:
+        busqueda = Inferencia(elegidas)
+        busqueda.contadores = {regla: inferencia.contadores[regla] for regla in elegidas}
+    r = forward_checking_stats(tablero, max_nodos=max_nodos, dominios=pre['dominios_despues'],
+                               reglas=busqueda, **opciones)
+    r['reglas'] = inferencia.contadores
+    return r
+
+
+def comprobar(tablero, reglas=REGLAS, max_nodos=20000):
+    """
+    Comprobación de regresión: resuelve con dominios completos (1..9 en cada
+    celda libre, sin reducir por los valores fijos) usando cada regla por
+    separado, todas juntas en cada nodo y con resolver_con_reglas
+    ('primero'), y compara con Forward Checking sin reglas. Las
+    reglas solo pueden quitar valores sin soporte: si FC encuentra solución,
+    con reglas tampoco se puede concluir que no la hay.
+
+    Returns:
+        dict: Configuración (nombre de regla, 'todas' o 'primero') -> 'ok', 'limite'
+            (presupuesto agotado, sin conclusión) o 'sin solucion' (fallo: las
+            reglas eliminaron valores de todas las soluciones)
+    """
+    from algoritmos import forward_checking_stats
+
+    if not forward_checking_stats(tablero, max_nodos=max_nodos)['exito']:
+        return {}
+    completos = [['123456789' if v == '0' else v for v in fila] for fila in tablero.getTablero()]
+    estados = {}
+    for nombre, elegidas in [(regla, (regla,)) for regla in reglas] + [('todas', reglas)]:
+        r = forward_checking_stats(tablero, max_nodos=max_nodos, dominios=completos, reglas=elegidas)
+        estados[nombre] = 'ok' if r['exito'] else ('limite' if r['limite_excedido'] else 'sin solucion')
+    r = resolver_con_reglas(tablero, max_nodos=max_nodos, dominios=completos, reglas=reglas)
+    estados['primero'] = 'ok' if r['exito'] else ('limite' if r['limite_excedido'] else 'sin solucion')
+    return estados
+
+
+def main():
+    import argparse
+    from tablero import Tablero
+
+    parser = argparse.ArgumentParser(description='Aplica las reglas de inferencia y muestra sus contadores')
+    parser.add_argument('ficheros', nargs='+', help='Plantillas de Sudoku')
+    parser.add_argument('--reglas', nargs='+', choices=REGLAS, default=list(REGLAS),
+                        help='Reglas a aplicar, en orden')
+    parser.add_argument('--comprobar', action='store_true',
+                        help='Comprobar que, con dominios sin reducir, ninguna regla hace insoluble un Sudoku con solución')
+    args = parser.parse_args()
+
+    if args.comprobar:
+        fallos = 0
+        for fichero in args.ficheros:
+            estados = comprobar(Tablero(fichero), reglas=args.reglas)
+            if not estados:
+                print(f"{fichero}: FC no encuentra solución, no se comprueba")
+                continue
+            malas = [nombre for nombre, estado in estados.items() if estado == 'sin solucion']
+            fallos += bool(malas)
+            print(f"{fichero}: {'FALLO' if malas else 'OK'} "
+                  + ' '.join(f"{nombre}={estado}" for nombre, estado in estados.items()))
+        raise SystemExit(1 if fallos else 0)
+
+    for fichero in args.ficheros:
+        tablero = Tablero(fichero)
+        r = aplicar_reglas(tablero, reglas=args.reglas)
+        libres = sum(v == '0' for fila in tablero.getTablero() for v in fila)
+        estado = 'resuelto' if r['resuelto'] else ('inconsistente' if not r['consistente'] else f'{libres} libres')
+        print(f"{fichero}: {estado}")
+        for regla, c in r['contadores'].items():
+            print(f"  {regla:22} aplicaciones={c['aplicaciones']:4} eliminados={c['eliminados']:5} "
+                  f"tiempo_ms={c['tiempo_ms']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,344 @@
+"""
+Resolutor de línea de comandos (sin GUI)
+========================================
+
+Resuelve uno o varios Sudokus desde ficheros o desde la entrada estándar y
+escribe una línea por Sudoku (texto o JSON). Está pensado para invocarse
+miles de veces desde otras herramientas, así que solo importa el núcleo
+(`algoritmos`, `sudoku_csp`, `variable`, `tablero`): ni pygame, ni argparse
+ni json (el análisis de argumentos y la salida JSON se hacen a mano).
+
+Uso:
+    python -m resolver solve m1.txt [--algo fc] [--json] [--max-nodos N] [--heuristica domwdeg]
+    python -m resolver solve m4.txt --reinicios luby [--semilla 7]
+    cat sudokus.txt | python -m resolver solve - --algo mac --json
+    python -m resolver count m0.txt [--limite 2] [--json]
+    python -m resolver arranque [--repeticiones 20]
+
+Entrada: plantillas (9 filas de 9 valores) o una línea de 81 caracteres por
+Sudoku ('0' o '.' = vacía); un fichero o la entrada estándar puede contener
+varios. Algoritmos: bt, fc, mac, ac3+bt, ac3+fc, td (búsqueda que filtra cada
+unidad como todos-distintos), td+fc (ese filtrado como preprocesado y FC),
+reglas (las reglas de inferencia de reglas.py y, si no bastan, FC), sat
+(CNF y resolutor CDCL; --max-nodos limita las decisiones) y minconf (búsqueda
+local por mínimos conflictos; --max-nodos es su límite de pasos, por defecto
+PASOS_MINCONF, y --semilla su semilla). `--heuristica domwdeg` cambia la
+selección de variable de fc/mac/ac3+fc/td/reglas (bt usa siempre MRV).
+`--reinicios luby|geometrica` resuelve fc/mac/ac3+fc con reinicios
+aleatorizados (por defecto con dom/wdeg, cuyos pesos se conservan entre
+reinicios); `--semilla` fija el generador y hace la ejecución reproducible.
+
+Código de salida: 0 si todos se resolvieron, 1 si alguno no, 2 si hay un
+error de uso o de entrada.
+"""
+
+import sys
+import time
+
+from tablero import tablerosDesdeTexto
+from algoritmos import (
+    backtracking_stats,
+    forward_checking_stats,
+    generar_soluciones,
+    contar_soluciones,
+    forward_checking_reinicios,
+    ac3,
+)
+
+ALGORITMOS = ('bt', 'fc', 'mac', 'ac3+bt', 'ac3+fc', 'td', 'td+fc', 'reglas', 'sat', 'minconf')
+PASOS_MINCONF = 1_000_000
+HEURISTICAS = ('mrv', 'domwdeg')
+ESTRATEGIAS_REINICIO = ('luby', 'geometrica')
+USO = """uso:
+  python -m resolver solve FICHERO|- [...] [--algo bt|fc|mac|ac3+bt|ac3+fc|td|td+fc|reglas|sat|minconf] [--json] [--max-nodos N]
+                     [--heuristica mrv|domwdeg] [--reinicios luby|geometrica] [--semilla N]
+  python -m resolver count FICHERO|- [...] [--limite K] [--max-nodos N] [--json] [--heuristica mrv|domwdeg]
+  python -m resolver arranque [--repeticiones N]"""
+
+
+class ErrorUso(Exception):
+    pass
+
+
+def _cadena_json(texto):
+    """Cadena JSON entre comillas, con barras, comillas y caracteres de control escapados."""
+    texto = str(texto).replace('\\', '\\\\').replace('"', '\\"')
+    return '"' + ''.join(ch if ch >= ' ' else '\\u%04x' % ord(ch) for ch in texto) + '"'
+
+
+def _valor_json(valor):
+    """Serializa los tipos simples (y los diccionarios y secuencias anidados) que aparecen en los resultados."""
+    if valor is None:
+        return 'null'
+    if valor is True:
+        return 'true'
+    if valor is False:
+        return 'false'
+    if isinstance(valor, float) and valor - valor != 0:
+        return 'null'  # inf / -inf / nan no existen en JSON
+    if isinstance(valor, (int, float)):
+        return repr(valor)
+    if isinstance(valor, dict):
+        return a_json(valor)
+    if isinstance(valor, (list, tuple)):
+        return '[' + ', '.join(_valor_json(elemento) for elemento in valor) + ']'
+    return _cadena_json(valor)
+
+
+def a_json(registro):
+    """Objeto JSON de una línea a partir de un diccionario."""
+    return '{' + ', '.join(f'{_cadena_json(clave)}: {_valor_json(valor)}' for clave, valor in registro.items()) + '}'
+
+
+def _cadena(tablero):
+    return ''.join(''.join(fila) for fila in tablero.getTablero())
+
+
+def resolver_tablero(tablero, algoritmo='fc', max_nodos=None, simetria=False, heuristica=None,
+                     reinicios=None, semilla=0, progreso=None):
+    """
+    Resuelve un tablero con el algoritmo indicado.
+
+    Con `reinicios` ('luby' o 'geometrica') fc, mac y ac3+fc usan
+    forward_checking_reinicios; la heurística por defecto pasa a ser dom/wdeg.
+    `progreso` (un CanalProgreso o cualquier objeto con `intervalo` y
+    `notificar`) permite cancelar bt, fc, mac, ac3+bt, ac3+fc, td, td+fc y
+    reglas; sat, minconf y los reinicios solo se detienen por `max_nodos`.
+
+    Returns:
+        dict: {'algoritmo', 'exito', 'nodos', 'limite_excedido', 'tiempo_ms', 'solucion'}
+        (y 'podados_simetria' con `simetria`, 'reinicios' con `reinicios`,
+        'cancelado' con `progreso`)
+    """
+    if heuristica is None:
+        heuristica = 'domwdeg' if reinicios else 'mrv'
+    t0 = time.perf_counter()
+    if algoritmo == 'sat':
+        from sat import resolver_sat
+        r = resolver_sat(tablero, max_nodos=max_nodos)
+        solucion = _cadena(r['tablero']) if r['exito'] else None
+    elif algoritmo == 'minconf':
+        # Incompleta: sin límite no terminaría en un Sudoku sin solución
+        from busqueda_local import min_conflictos
+        r = min_conflictos(tablero, max_pasos=max_nodos or PASOS_MINCONF, semilla=semilla)
+        solucion = _cadena(r['tablero']) if r['exito'] else None
+    elif reinicios:
+        if algoritmo.endswith('bt'):
+            raise ValueError("los reinicios solo se aplican a fc, mac y ac3+fc")
+        dominios = None
+        r = {'exito': False, 'nodos': 0, 'limite_excedido': False, 'reinicios': 0, 'tablero': None}
+        if algoritmo == 'ac3+fc':
+            res_ac3 = ac3(tablero, verbose=False)
+            dominios = res_ac3['dominios_despues']
+        if algoritmo != 'ac3+fc' or res_ac3['consistente']:
+            r = forward_checking_reinicios(tablero, max_nodos=max_nodos, dominios=dominios, semilla=semilla,
+                                           estrategia=reinicios, heuristica=heuristica, mac=algoritmo == 'mac')
+        solucion = _cadena(r['tablero']) if r['exito'] else None
+    elif algoritmo == 'mac':
+        metricas = {}
+        solucion = next(generar_soluciones(tablero, max_nodos=max_nodos, metricas=metricas,
+                                           simetria=simetria, heuristica=heuristica, progreso=progreso), None)
+        r = {'exito': solucion is not None, 'nodos': metricas.get('nodos', 0),
+             'limite_excedido': metricas.get('limite_excedido', False),
+             'cancelado': metricas.get('cancelado', False),
+             'podados_simetria': metricas.get('podados_simetria', 0)}
+    else:
+        dominios = None
+        if algoritmo.startswith('ac3+'):
+            res_ac3 = ac3(tablero, verbose=False)
+            dominios = res_ac3['dominios_despues']
+        elif algoritmo == 'td+fc':
+            from todos_distintos import filtrar_todos_distintos
+            res_ac3 = filtrar_todos_distintos(tablero)
+            dominios = res_ac3['dominios_despues']
+        if '+' in algoritmo and not res_ac3['consistente']:
+            r = {'exito': False, 'nodos': 0, 'limite_excedido': False, 'podados_simetria': 0, 'tablero': None}
+        else:
+            if algoritmo.endswith('bt'):
+                r = backtracking_stats(tablero, max_nodos=max_nodos, dominios=dominios, simetria=simetria,
+                                       progreso=progreso)
+            elif algoritmo == 'reglas':
+                from reglas import Inferencia, resolver_con_reglas
+                inferencia = Inferencia()
+                r = resolver_con_reglas(tablero, max_nodos=max_nodos, simetria=simetria,
+                                        heuristica=heuristica, reglas=inferencia, progreso=progreso)
+                r['reglas'] = inferencia.resumen()
+            else:
+                r = forward_checking_stats(tablero, max_nodos=max_nodos, dominios=dominios, simetria=simetria,
+                                           heuristica=heuristica, todos_distintos=algoritmo == 'td',
+                                           progreso=progreso)
+        solucion = _cadena(r['tablero']) if r['exito'] else None
+    t1 = time.perf_counter()
+    resultado = {
+        'algoritmo': algoritmo,
+        'exito': r['exito'],
+        'nodos': r['nodos'],
+        'limite_excedido': r['limite_excedido'],
+        'tiempo_ms': round((t1 - t0) * 1000, 3),
+        'solucion': solucion,
+    }
+    if simetria:
+        resultado['podados_simetria'] = r.get('podados_simetria', 0)
+    if reinicios:
+        resultado['reinicios'] = r['reinicios']
+    if progreso is not None:
+        resultado['cancelado'] = r.get('cancelado', False)
+    if 'reglas' in r:
+        resultado['reglas'] = r['reglas']
+    return resultado
+
+
+def _analizar_argumentos(argv):
+    """Análisis mínimo de argumentos (evita el coste de importar argparse)."""
+    if not argv or argv[0] in ('-h', '--help'):
+        raise ErrorUso(USO)
+    opciones = {'comando': argv[0], 'entradas': [], 'algo': 'fc', 'json': False,
+                'max_nodos': None, 'limite': 2, 'repeticiones': 20, 'heuristica': None,
+                'reinicios': None, 'semilla': 0}
+    if opciones['comando'] not in ('solve', 'count', 'arranque'):
+        raise ErrorUso(f"comando desconocido: {argv[0]}\n{USO}")
+    i = 1
+    while i < len(argv):
+        arg = argv[i]
+        if arg == '--json':
+            opciones['json'] = True
+        elif arg in ('--algo', '--heuristica', '--reinicios', '--semilla', '--max-nodos', '--limite',
+                     '--repeticiones'):
+            if i + 1 >= len(argv):
+                raise ErrorUso(f"falta el valor de {arg}")
+            valor = argv[i + 1]
+            i += 1
+            if arg == '--algo':
+                if valor not in ALGORITMOS:
+                    raise ErrorUso(f"algoritmo no válido: {valor} (opciones: {', '.join(ALGORITMOS)})")
+                opciones['algo'] = valor
+            elif arg == '--heuristica':
+                if valor not in HEURISTICAS:
+                    raise ErrorUso(f"heurística no válida: {valor} (opciones: {', '.join(HEURISTICAS)})")
+                opciones['heuristica'] = valor
+            elif arg == '--reinicios':
+                if valor not in ESTRATEGIAS_REINICIO:
+                    raise ErrorUso(f"estrategia de reinicio no válida: {valor} "
+                                   f"(opciones: {', '.join(ESTRATEGIAS_REINICIO)})")
+                opciones['reinicios'] = valor
+            else:
+                try:
+                    opciones[arg[2:].replace('-', '_')] = int(valor)
+                except ValueError:
+                    raise ErrorUso(f"{arg} espera un entero")
+        elif arg.startswith('--'):
+            raise ErrorUso(f"opción desconocida: {arg}\n{USO}")
+        else:
+            opciones['entradas'].append(arg)
+        i += 1
+    if opciones['reinicios'] and (opciones['comando'] != 'solve' or opciones['algo'] not in ('fc', 'mac', 'ac3+fc')):
+        raise ErrorUso("--reinicios solo se aplica a solve con fc, mac o ac3+fc")
+    if opciones['comando'] != 'arranque' and not opciones['entradas']:
+        raise ErrorUso(f"indique al menos un fichero o '-' para la entrada estándar\n{USO}")
+    return opciones
+
+
+def _leer_entradas(entradas):
+    """Devuelve [(etiqueta, tablero)] leyendo cada fichero o la entrada estándar ('-')."""
+    tableros = []
+    for entrada in entradas:
+        if entrada == '-':
+            texto = sys.stdin.read()
+        else:
+            try:
+                with open(entrada, 'r') as f:
+                    texto = f.read()
+            except OSError as e:
+                raise ErrorUso(f"no se pudo leer {entrada}: {e.strerror}")
+        try:
+            leidos = tablerosDesdeTexto(texto)
+        except ValueError as e:
+            raise ErrorUso(f"{entrada}: {e}")
+        nombre = 'stdin' if entrada == '-' else entrada
+        for i, tablero in enumerate(leidos):
+            etiqueta = nombre if len(leidos) == 1 else f"{nombre}#{i + 1}"
+            tableros.append((etiqueta, tablero))
+    return tableros
+
+
+def medir_arranque(repeticiones=20):
+    """
+    Mide la latencia de arranque del resolutor como proceso completo
+    (`solve` de un Sudoku sencillo) frente a un intérprete vacío.
+
+    Returns:
+        dict: medianas en ms de 'python_vacio_ms' y 'resolver_ms'
+    """
+    import os
+    import subprocess
+
+    script = os.path.abspath(__file__)
+    sudoku = '.' * 81
+
+    def mediana(comando, entrada=None):
+        tiempos = []
+        for _ in range(repeticiones):
+            t0 = time.perf_counter()
+            subprocess.run(comando, input=entrada, capture_output=True, text=True, check=True)
+            tiempos.append((time.perf_counter() - t0) * 1000)
+        tiempos.sort()
+        return round(tiempos[len(tiempos) // 2], 2)
+
+    vacio = mediana([sys.executable, '-c', 'pass'])
+    resolver = mediana([sys.executable, script, 'solve', '-', '--algo', 'mac'], entrada=sudoku)
+    return {'repeticiones': repeticiones, 'python_vacio_ms': vacio, 'resolver_ms': resolver,
+            'sobrecoste_ms': round(resolver - vacio, 2)}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    try:
+        opciones = _analizar_argumentos(argv)
+        if opciones['comando'] == 'arranque':
+            r = medir_arranque(opciones['repeticiones'])
+            print(a_json(r) if opciones['json'] else
+                  f"arranque: python vacío {r['python_vacio_ms']} ms | resolver {r['resolver_ms']} ms "
+                  f"(+{r['sobrecoste_ms']} ms) | mediana de {r['repeticiones']}")
+            return 0
+        tableros = _leer_entradas(opciones['entradas'])
+    except ErrorUso as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    todos_ok = True
+    salida = []
+    for etiqueta, tablero in tableros:
+        if opciones['comando'] == 'solve':
+            r = resolver_tablero(tablero, opciones['algo'], opciones['max_nodos'],
+                                 heuristica=opciones['heuristica'], reinicios=opciones['reinicios'],
+                                 semilla=opciones['semilla'])
+            todos_ok = todos_ok and r['exito']
+            r = {'entrada': etiqueta, **r}
+            if opciones['json']:
+                salida.append(a_json(r))
+            else:
+                estado = 'ok' if r['exito'] else ('limite' if r['limite_excedido'] else 'sin-solucion')
+                podados = f"reinicios={r['reinicios']} " if opciones['reinicios'] else ''
+                salida.append(f"{etiqueta} {r['algoritmo']} {estado} nodos={r['nodos']} {podados}"
+                              f"tiempo_ms={r['tiempo_ms']} {r['solucion'] or '-'}")
+        else:
+            t0 = time.perf_counter()
+            r = contar_soluciones(tablero, limite=opciones['limite'], max_nodos=opciones['max_nodos'],
+                                  heuristica=opciones['heuristica'] or 'mrv')
+            r = {'entrada': etiqueta, **r, 'tiempo_ms': round((time.perf_counter() - t0) * 1000, 3)}
+            todos_ok = todos_ok and r['soluciones'] > 0
+            if opciones['json']:
+                salida.append(a_json(r))
+            else:
+                salida.append(f"{etiqueta} soluciones={r['soluciones']} unica={int(r['unica'])} "
+                              f"nodos={r['nodos']} limite_excedido={int(r['limite_excedido'])} tiempo_ms={r['tiempo_ms']}")
+        if len(salida) >= 256:
+            sys.stdout.write('\n'.join(salida) + '\n')
+            salida.clear()
+    if salida:
+        sys.stdout.write('\n'.join(salida) + '\n')
+    return 0 if todos_ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
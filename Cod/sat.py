@@ -0,0 +1,459 @@
+"""
+Resolución por SAT: codificación CNF y resolutor CDCL
+=====================================================
+
+El Sudoku se codifica como fórmula en forma normal conjuntiva (CNF) con una
+variable booleana por celda y dígito: x(f, c, d) = 81*f + 9*c + d (1..729) es
+cierta si la celda (f, c) vale d. Cláusulas:
+- cada celda tiene al menos un dígito (de su dominio) y como mucho uno;
+- cada fila, columna y bloque tiene cada dígito al menos una vez y como mucho una;
+- los valores fijos son cláusulas unitarias.
+
+`ResolutorCDCL` es un resolutor CDCL (conflict-driven clause learning) en
+Python puro:
+- propagación unitaria con dos literales vigilados por cláusula;
+- aprendizaje de cláusulas por el primer punto de implicación único (1UIP)
+  y salto atrás no cronológico;
+- VSIDS: actividad por variable que crece al intervenir en un conflicto y
+  decae de forma geométrica, con guardado de fase;
+- reinicios según la secuencia de Luby (en conflictos).
+
+A diferencia de FC/MAC, lo aprendido en un conflicto se conserva como
+cláusula y poda cualquier otra rama que repita la misma combinación.
+
+`a_dimacs` exporta la fórmula en formato DIMACS para contrastar el
+resultado con resolutores externos. Uso:
+    python sat.py m4.txt                       # resuelve y muestra estadísticas
+    python sat.py m4.txt --dimacs m4.cnf       # exporta la CNF
+    python sat.py m4.txt --modelo salida.txt   # decodifica y verifica un modelo externo ("v ...")
+"""
+
+import heapq
+
+from algoritmos import luby
+
+NUM_VARIABLES = 729
+
+
+def variable(fila, columna, digito):
+    """Variable booleana de 'la celda (fila, columna) vale digito' (digito en 1..9)."""
+    return 81 * fila + 9 * columna + digito
+
+
+def _unidades():
+    """Las 27 unidades (filas, columnas y bloques) como listas de celdas."""
+    unidades = [[(f, c) for c in range(9)] for f in range(9)]
+    unidades += [[(f, c) for f in range(9)] for c in range(9)]
+    unidades += [[(f, c) for f in range(b // 3 * 3, b // 3 * 3 + 3) for c in range(b % 3 * 3, b % 3 * 3 + 3)]
+                 for b in range(9)]
+    return unidades
+
+
+def codificar(tablero, dominios=None):
+    """
+    Codifica un tablero como lista de cláusulas (listas de literales enteros).
+
+    Args:
+        tablero (Tablero): Tablero a codificar.
+        dominios (list[list[list[str]]] | None): Dominios opcionales (p. ej.
+            tras AC3): los dígitos fuera del dominio de una celda libre se
+            excluyen con cláusulas unitarias negativas.
+
+    Returns:
+        list[list[int]]: Cláusulas sobre las variables 1..729
+    """
+    clausulas = []
+    for f in range(9):
+        for c in range(9):
+            clausulas.append([variable(f, c, d) for d in range(1, 10)])
+            for d in range(1, 10):
+                for e in range(d + 1, 10):
+                    clausulas.append([-variable(f, c, d), -variable(f, c, e)])
+    for unidad in _unidades():
+        for d in range(1, 10):
+            clausulas.append([variable(f, c, d) for f, c in unidad])
+            for i, (f1, c1) in enumerate(unidad):
+                for f2, c2 in unidad[i + 1:]:
+                    clausulas.append([-variable(f1, c1, d), -variable(f2, c2, d)])
+    for f in range(9):
+        for c in range(9):
+            valor = tablero.getCelda(f, c)
+            if valor != '0':
+                clausulas.append([variable(f, c, int(valor))])
+            elif dominios is not None:
+                for d in range(1, 10):
+                    if str(d) not in dominios[f][c]:
+                        clausulas.append([-variable(f, c, d)])
+    return clausulas
+
+
+def a_dimacs(clausulas, num_variables=NUM_VARIABLES, comentarios=()):
+    """Texto DIMACS CNF de las cláusulas ('p cnf V C' y una cláusula por línea, acabada en 0)."""
+    lineas = [f"c {comentario}" for comentario in comentarios]
+    lineas.append(f"p cnf {num_variables} {len(clausulas)}")
+    lineas.extend(' '.join(map(str, clausula)) + ' 0' for clausula in clausulas)
+    return '\n'.join(lineas) + '\n'
+
+
+def decodificar(modelo, tablero):
+    """
+    Tablero resuelto a partir de un modelo (literales ciertos).
+
+    Args:
+        modelo (Iterable[int]): Literales del modelo; se usan los positivos.
+        tablero (Tablero): Tablero de partida (no se modifica).
+
+    Returns:
+        Tablero: Copia de `tablero` con cada celda cuyo dígito es cierto en el modelo
+    """
+    resultado = tablero.copia()
+    for literal in modelo:
+        if 0 < literal <= NUM_VARIABLES:
+            f, resto = divmod(literal - 1, 81)
+            c, d = divmod(resto, 9)
+            resultado.setCelda(f, c, str(d + 1))
+    return resultado
+
+
+def leer_modelo(texto):
+    """Literales de la salida de un resolutor externo (líneas 'v ...' o una lista de enteros)."""
+    literales = []
+    for linea in texto.splitlines():
+        linea = linea.strip()
+        if not linea or linea[0] in 'cs':
+            continue
+        if linea.startswith('v'):
+            linea = linea[1:]
+        literales.extend(int(x) for x in linea.split() if x != '0')
+    return literales
+
+
+class ResolutorCDCL:
+    """
+    Resolutor CDCL sobre literales enteros (v cierta = v, v falsa = -v).
+
+    Atributos:
+        decisiones (int): Decisiones tomadas
+        conflictos (int): Conflictos encontrados
+        propagaciones (int): Literales asignados por propagación unitaria
+        aprendidas (int): Cláusulas aprendidas
+        reinicios (int): Reinicios realizados
+    """
+
+    def __init__(self, clausulas, num_variables=NUM_VARIABLES, decaimiento=0.95, unidad_reinicio=100):
+        """
+        Args:
+            clausulas (list[list[int]]): Fórmula CNF
+            num_variables (int): Número de variables (1..num_variables)
+            decaimiento (float): Factor de decaimiento de la actividad VSIDS
+            unidad_reinicio (int): Conflictos por unidad de la secuencia de Luby
+        """
+        n = num_variables
+        self.num_variables = n
+        self.decaimiento = decaimiento
+        self.unidad_reinicio = unidad_reinicio
+        self.asignacion = [0] * (n + 1)      # 1 cierta, -1 falsa, 0 libre
+        self.nivel = [0] * (n + 1)
+        self.razon = [None] * (n + 1)
+        self.fase = [-1] * (n + 1)
+        self.actividad = [0.0] * (n + 1)
+        self.incremento = 1.0
+        self.traza = []
+        self.inicio_nivel = []               # Posición en la traza de cada nivel de decisión
+        self.cabeza = 0                      # Siguiente literal de la traza por propagar
+        self.vigilantes = {}                 # literal -> cláusulas que lo vigilan
+        self.clausulas = []
+        self.insatisfacible = False
+        self.decisiones = self.conflictos = self.propagaciones = self.aprendidas = self.reinicios = 0
+        for v in range(1, n + 1):
+            self.vigilantes[v] = []
+            self.vigilantes[-v] = []
+        for clausula in clausulas:
+            self._anadir(list(dict.fromkeys(clausula)))
+        self._monton = [(0.0, v) for v in range(1, n + 1)]
+
+    def _valor(self, literal):
+        a = self.asignacion[abs(literal)]
+        return a if literal > 0 else -a
+
+    def _asignar(self, literal, razon):
+        v = abs(literal)
+        self.asignacion[v] = 1 if literal > 0 else -1
+        self.nivel[v] = len(self.inicio_nivel)
+        self.razon[v] = razon
+        self.traza.append(literal)
+
+    def _anadir(self, clausula):
+        """Añade una cláusula de la fórmula en el nivel 0."""
+        if self.insatisfacible:
+            return
+        if not clausula:
+            self.insatisfacible = True
+        elif len(clausula) == 1:
+            valor = self._valor(clausula[0])
+            if valor == -1:
+                self.insatisfacible = True
+            elif valor == 0:
+                self._asignar(clausula[0], None)
+        else:
+            self.clausulas.append(clausula)
+            self.vigilantes[clausula[0]].append(clausula)
+            self.vigilantes[clausula[1]].append(clausula)
+
+    def _propagar(self):
+        """
+        Propagación unitaria desde `cabeza`.
+
+        Returns:
+            list[int] | None: Cláusula en conflicto, o None
+        """
+        asignacion, vigilantes, traza = self.asignacion, self.vigilantes, self.traza
+        while self.cabeza < len(traza):
+            falso = -traza[self.cabeza]
+            self.cabeza += 1
+            lista = vigilantes[falso]
+            i = j = 0
+            while i < len(lista):
+                clausula = lista[i]
+                i += 1
+                # El literal falso pasa a la posición 1
+                if clausula[0] == falso:
+                    clausula[0], clausula[1] = clausula[1], falso
+                otro = clausula[0]
+                a = asignacion[abs(otro)]
+                if (a if otro > 0 else -a) == 1:
+                    lista[j] = clausula
+                    j += 1
+                    continue
+                # Buscar otro literal no falso que vigilar
+                for k in range(2, len(clausula)):
+                    literal = clausula[k]
+                    a = asignacion[abs(literal)]
+                    if (a if literal > 0 else -a) != -1:
+                        clausula[1], clausula[k] = literal, falso
+                        vigilantes[literal].append(clausula)
+                        break
+                else:
+                    lista[j] = clausula
+                    j += 1
+                    a = asignacion[abs(otro)]
+                    if (a if otro > 0 else -a) == -1:
+                        # Conflicto: conservar el resto de vigilantes
+                        while i < len(lista):
+                            lista[j] = lista[i]
+                            i += 1
+                            j += 1
+                        del lista[j:]
+                        return clausula
+                    self._asignar(otro, clausula)
+                    self.propagaciones += 1
+            del lista[j:]
+        return None
+
+    def _analizar(self, conflicto):
+        """
+        Cláusula aprendida por 1UIP y nivel al que saltar.
+
+        Returns:
+            tuple: (cláusula aprendida con el literal UIP en la posición 0, nivel)
+        """
+        nivel_actual = len(self.inicio_nivel)
+        vistos = set()
+        aprendida = [0]
+        pendientes = 0
+        literal = None
+        indice = len(self.traza) - 1
+        clausula = conflicto
+        while True:
+            for q in (clausula if literal is None else clausula[1:]):
+                v = abs(q)
+                if v not in vistos and self.nivel[v] > 0:
+                    vistos.add(v)
+                    self._aumentar(v)
+                    if self.nivel[v] == nivel_actual:
+                        pendientes += 1
+                    else:
+                        aprendida.append(q)
+            while abs(self.traza[indice]) not in vistos:
+                indice -= 1
+            literal = self.traza[indice]
+            indice -= 1
+            pendientes -= 1
+            if pendientes == 0:
+                break
+            clausula = self.razon[abs(literal)]
+        aprendida[0] = -literal
+        if len(aprendida) == 1:
+            return aprendida, 0
+        # El literal del nivel más alto (tras el UIP) se vigila en la posición 1
+        k = max(range(1, len(aprendida)), key=lambda i: self.nivel[abs(aprendida[i])])
+        aprendida[1], aprendida[k] = aprendida[k], aprendida[1]
+        return aprendida, self.nivel[abs(aprendida[1])]
+
+    def _aumentar(self, v):
+        self.actividad[v] += self.incremento
+        if self.actividad[v] > 1e100:
+            self.actividad = [a * 1e-100 for a in self.actividad]
+            self.incremento *= 1e-100
+            self._monton = [(-self.actividad[u], u) for u in range(1, self.num_variables + 1)
+                            if self.asignacion[u] == 0]
+            heapq.heapify(self._monton)
+        elif self.asignacion[v] == 0:
+            heapq.heappush(self._monton, (-self.actividad[v], v))
+
+    def _retroceder(self, nivel):
+        if len(self.inicio_nivel) <= nivel:
+            return
+        inicio = self.inicio_nivel[nivel]
+        for literal in self.traza[inicio:]:
+            v = abs(literal)
+            self.fase[v] = self.asignacion[v]
+            self.asignacion[v] = 0
+            self.razon[v] = None
+            heapq.heappush(self._monton, (-self.actividad[v], v))
+        del self.traza[inicio:]
+        del self.inicio_nivel[nivel:]
+        self.cabeza = inicio
+
+    def _decidir(self):
+        """Variable libre de mayor actividad (con su fase guardada), o None si no queda ninguna."""
+        monton = self._monton
+        while monton:
+            _, v = heapq.heappop(monton)
+            if self.asignacion[v] == 0:
+                return v if self.fase[v] > 0 else -v
+        return None
+
+    def resolver(self, max_decisiones=None, max_conflictos=None):
+        """
+        Busca un modelo.
+
+        Args:
+            max_decisiones (int|None): Límite de decisiones. Si None, sin límite.
+            max_conflictos (int|None): Límite de conflictos. Si None, sin límite.
+
+        Returns:
+            bool | None: True si es satisfacible, False si no, None si se agotó un límite
+        """
+        if self.insatisfacible or self._propagar() is not None:
+            self.insatisfacible = True
+            return False
+        indice_luby = 1
+        limite_reinicio = self.unidad_reinicio * luby(indice_luby)
+        conflictos_reinicio = 0
+        while True:
+            conflicto = self._propagar()
+            if conflicto is not None:
+                self.conflictos += 1
+                conflictos_reinicio += 1
+                if not self.inicio_nivel:
+                    self.insatisfacible = True
+                    return False
+                aprendida, nivel = self._analizar(conflicto)
+                self._retroceder(nivel)
+                if len(aprendida) == 1:
+                    self._asignar(aprendida[0], None)
+                else:
+                    self.clausulas.append(aprendida)
+                    self.vigilantes[aprendida[0]].append(aprendida)
+                    self.vigilantes[aprendida[1]].append(aprendida)
+                    self._asignar(aprendida[0], aprendida)
+                self.aprendidas += 1
+                self.incremento /= self.decaimiento
+                if max_conflictos is not None and self.conflictos >= max_conflictos:
+                    return None
+                continue
+            if conflictos_reinicio >= limite_reinicio:
+                self._retroceder(0)
+                self.reinicios += 1
+                indice_luby += 1
+                limite_reinicio = self.unidad_reinicio * luby(indice_luby)
+                conflictos_reinicio = 0
+                continue
+            literal = self._decidir()
+            if literal is None:
+                return True
+            if max_decisiones is not None and self.decisiones >= max_decisiones:
+                return None
+            self.decisiones += 1
+            self.inicio_nivel.append(len(self.traza))
+            self._asignar(literal, None)
+
+    def modelo(self):
+        """Literales ciertos de la asignación actual."""
+        return [v for v in range(1, self.num_variables + 1) if self.asignacion[v] == 1]
+
+
+def resolver_sat(tablero, max_nodos=None, dominios=None):
+    """
+    Resuelve un tablero con el resolutor CDCL.
+
+    Args:
+        tablero (Tablero): Tablero inicial del Sudoku (no se modifica).
+        max_nodos (int|None): Límite de decisiones (cada decisión cuenta como un nodo).
+        dominios (list[list[list[str]]] | None): Dominios iniciales opcionales.
+
+    Returns:
+        dict: {
+            'exito': bool,
+            'nodos': int (decisiones),
+            'limite_excedido': bool,
+            'cancelado': bool,
+            'podados_simetria': int (siempre 0: sin poda por simetrías),
+            'conflictos': int,
+            'aprendidas': int,
+            'reinicios': int,
+            'tablero': Tablero (copia resuelta si exito=True)
+        }
+    """
+    resolutor = ResolutorCDCL(codificar(tablero, dominios))
+    satisfacible = resolutor.resolver(max_decisiones=max_nodos)
+    return {
+        'exito': satisfacible is True,
+        'nodos': resolutor.decisiones,
+        'limite_excedido': satisfacible is None,
+        'cancelado': False,
+        'podados_simetria': 0,
+        'conflictos': resolutor.conflictos,
+        'aprendidas': resolutor.aprendidas,
+        'reinicios': resolutor.reinicios,
+        'tablero': decodificar(resolutor.modelo(), tablero) if satisfacible else None,
+    }
+
+
+def main():
+    import argparse
+    from tablero import Tablero
+    from experimentos import verificar_solucion
+
+    parser = argparse.ArgumentParser(description='Sudoku como SAT: CNF, DIMACS y resolutor CDCL')
+    parser.add_argument('fichero', help='Plantilla del Sudoku')
+    parser.add_argument('--dimacs', metavar='SALIDA', help='Escribir la CNF en formato DIMACS y salir')
+    parser.add_argument('--modelo', metavar='FICHERO',
+                        help='Decodificar y verificar el modelo de un resolutor externo y salir')
+    parser.add_argument('--max-nodos', type=int, help='Límite de decisiones')
+    args = parser.parse_args()
+
+    tablero = Tablero(args.fichero)
+    if args.dimacs:
+        clausulas = codificar(tablero)
+        with open(args.dimacs, 'w', encoding='utf-8') as f:
+            f.write(a_dimacs(clausulas, comentarios=[f"Sudoku {args.fichero}", "x(f,c,d) = 81*f + 9*c + d"]))
+        print(f"{args.dimacs}: {NUM_VARIABLES} variables, {len(clausulas)} cláusulas")
+        return
+    if args.modelo:
+        with open(args.modelo, 'r', encoding='utf-8') as f:
+            solucion = decodificar(leer_modelo(f.read()), tablero)
+        print(solucion)
+        print('solución válida' if verificar_solucion(solucion) else 'solución NO válida')
+        return
+    r = resolver_sat(tablero, max_nodos=args.max_nodos)
+    estado = 'ok' if r['exito'] else ('limite' if r['limite_excedido'] else 'insatisfacible')
+    print(f"{args.fichero}: {estado} decisiones={r['nodos']} conflictos={r['conflictos']} "
+          f"aprendidas={r['aprendidas']} reinicios={r['reinicios']}")
+    if r['exito']:
+        print(r['tablero'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,419 @@
+"""
+Servicio HTTP local de resolución por lotes
+===========================================
+
+Servidor asyncio (solo biblioteca estándar, escucha en 127.0.0.1) que mantiene
+un proceso caliente con un pool de procesos resolutores, de modo que cada
+Sudoku no paga el arranque de un intérprete nuevo.
+
+- Las peticiones se encolan y se agrupan en lotes durante una ventana corta
+  (`--ventana-ms`) o hasta `--tam-lote` Sudokus; cada lote se resuelve en un
+  proceso del pool con `resolver.resolver_tablero` (bt, fc, mac, ac3+bt,
+  ac3+fc, td, td+fc, reglas, sat, minconf).
+- Contrapresión: la cola es acotada (`--max-pendientes`). Si una petición no
+  cabe ahora se responde 503 con Retry-After; si no cabría nunca (más Sudokus
+  que la capacidad de la cola), 413. No se despachan más lotes que procesos hay.
+- Plazos: cada petición tiene un plazo (`plazo_ms`, por defecto
+  `--plazo-ms`). Si vence se responde 504; los Sudokus ya vencidos no se
+  llegan a resolver, y la búsqueda en curso se cancela al vencer (bt, fc,
+  mac, ac3+*, td, td+fc, reglas), así que el proceso queda libre enseguida.
+- Presupuesto: `max_nodos` nunca supera `--max-nodos` (y es ese valor si la
+  petición no lo da); es lo que acota sat y minconf, que no consultan el plazo.
+
+Endpoints:
+    POST /resolver   {"sudoku": "<81 caracteres>", "algoritmo": "fc", "max_nodos": N, "plazo_ms": D}
+                     o {"sudokus": [...], ...} para varios en una petición
+    GET  /metricas   contadores, tamaño medio de lote, cola y latencias
+    GET  /salud
+
+Uso:
+    python servicio.py [--puerto 8765] [--procesos 4] [--ventana-ms 5] [--tam-lote 32] [--max-nodos 1000000]
+    curl -s localhost:8765/resolver -d '{"sudoku": "53..7....6..195....98....6.8...6...34..8.3..17...2...6.6....28....419..5....8..79"}'
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from tablero import desdeCadena
+from resolver import ALGORITMOS
+
+HOST = '127.0.0.1'
+PUERTO = 8765
+MAX_CUERPO = 1 << 20
+# Presupuesto máximo de nodos por Sudoku (unos 30 s de BT/FC en m6)
+MAX_NODOS = 1_000_000
+TEXTOS_ESTADO = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                 413: 'Payload Too Large', 500: 'Internal Server Error',
+                 503: 'Service Unavailable', 504: 'Gateway Timeout'}
+
+
+def _calentar_proceso():
+    """Inicializador del pool: importa el núcleo una sola vez por proceso."""
+    import resolver  # noqa: F401
+
+
+class PlazoBusqueda:
+    """
+    Sustituto de CanalProgreso para el pool: la búsqueda lo consulta cada
+    `intervalo` nodos y se cancela en cuanto vence el plazo de la petición.
+    """
+
+    __slots__ = ('vence', 'intervalo')
+
+    def __init__(self, vence, intervalo=64):
+        """
+        Args:
+            vence (float): Instante límite, en segundos de time.time()
+            intervalo (int): Cada cuántos nodos se mira el reloj
+        """
+        self.vence = vence
+        self.intervalo = intervalo
+
+    def notificar(self, nodos, profundidad, csp):
+        return time.time() > self.vence
+
+
+def resolver_lote(trabajos: List[Tuple[str, str, Optional[int], float]]) -> List[Optional[Dict]]:
+    """
+    Resuelve un lote en un proceso del pool.
+
+    Args:
+        trabajos: [(cadena de 81, algoritmo, max_nodos, vence)] con `vence` en
+            segundos de time.time()
+
+    Returns:
+        list: Resultado de resolver_tablero por trabajo, o None si su plazo ya
+        había vencido al llegarle el turno o venció durante la búsqueda
+    """
+    from resolver import resolver_tablero
+
+    resultados = []
+    for cadena, algoritmo, max_nodos, vence in trabajos:
+        if time.time() > vence:
+            resultados.append(None)
+            continue
+        r = resolver_tablero(desdeCadena(cadena), algoritmo, max_nodos, progreso=PlazoBusqueda(vence))
+        resultados.append(None if r.pop('cancelado') else r)
+    return resultados
+
+
+class ErrorPeticion(Exception):
+    """Petición inválida; lleva el código HTTP con el que responder."""
+
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+class Trabajo:
+    """Un Sudoku pendiente en la cola del servicio."""
+
+    __slots__ = ('cadena', 'algoritmo', 'max_nodos', 'vence', 'futuro')
+
+    def __init__(self, cadena, algoritmo, max_nodos, vence, futuro):
+        self.cadena = cadena
+        self.algoritmo = algoritmo
+        self.max_nodos = max_nodos
+        self.vence = vence
+        self.futuro = futuro
+
+
+class Metricas:
+    """Contadores del servicio expuestos en /metricas."""
+
+    def __init__(self, ventana_latencias=2000):
+        self.inicio = time.time()
+        self.peticiones = 0
+        self.sudokus = 0
+        self.resueltos = 0
+        self.lotes = 0
+        self.sudokus_en_lotes = 0
+        self.rechazadas_503 = 0
+        self.vencidas_504 = 0
+        self.invalidas_400 = 0
+        self.errores_500 = 0
+        self.latencias_ms = deque(maxlen=ventana_latencias)
+
+    def resumen(self, en_cola, lotes_en_vuelo):
+        latencias = sorted(self.latencias_ms)
+
+        def pct(p):
+            return round(latencias[min(len(latencias) - 1, int(p / 100 * len(latencias)))], 3) if latencias else None
+
+        return {
+            'segundos_activo': round(time.time() - self.inicio, 3),
+            'peticiones': self.peticiones,
+            'sudokus': self.sudokus,
+            'resueltos': self.resueltos,
+            'lotes': self.lotes,
+            'tam_medio_lote': round(self.sudokus_en_lotes / self.lotes, 2) if self.lotes else 0.0,
+            'en_cola': en_cola,
+            'lotes_en_vuelo': lotes_en_vuelo,
+            'rechazadas_503': self.rechazadas_503,
+            'vencidas_504': self.vencidas_504,
+            'invalidas_400': self.invalidas_400,
+            'errores_500': self.errores_500,
+            'latencia_p50_ms': pct(50),
+            'latencia_p90_ms': pct(90),
+            'latencia_p99_ms': pct(99),
+        }
+
+
+class ServicioSudoku:
+    """
+    Servicio asyncio: recibe peticiones HTTP, agrupa los Sudokus en lotes y
+    los resuelve en un ProcessPoolExecutor.
+    """
+
+    def __init__(self, procesos=None, ventana_ms=5.0, tam_lote=32, max_pendientes=1000,
+                 plazo_ms=10000.0, max_nodos=MAX_NODOS):
+        """
+        Args:
+            procesos (int | None): Procesos resolutores (por defecto, núcleos disponibles)
+            ventana_ms (float): Tiempo que se espera para completar un lote
+            tam_lote (int): Máximo de Sudokus por lote
+            max_pendientes (int): Capacidad de la cola (contrapresión)
+            plazo_ms (float): Plazo por defecto de cada petición
+            max_nodos (int): Presupuesto de nodos por defecto y máximo de cada Sudoku
+        """
+        self.procesos = procesos or os.cpu_count() or 1
+        self.ventana = ventana_ms / 1000
+        self.tam_lote = tam_lote
+        self.max_pendientes = max_pendientes
+        self.plazo_ms = plazo_ms
+        self.max_nodos = max_nodos
+        self.metricas = Metricas()
+        self._cola: Optional[asyncio.Queue] = None
+        self._huecos: Optional[asyncio.Semaphore] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._tareas = set()
+        self._lotes_en_vuelo = 0
+
+    # --- Lotes ---
+
+    async def _despachar(self):
+        """Forma lotes con lo que llega durante la ventana y los envía al pool."""
+        while True:
+            # No se forma un lote hasta que hay un proceso libre: mientras
+            # tanto la cola crece y los lotes salen más grandes
+            await self._huecos.acquire()
+            primero = await self._cola.get()
+            if self._cola.qsize() < self.tam_lote - 1:
+                await asyncio.sleep(self.ventana)
+            lote = [primero]
+            while len(lote) < self.tam_lote and not self._cola.empty():
+                lote.append(self._cola.get_nowait())
+            vigentes = [t for t in lote if not t.futuro.done()]
+            if not vigentes:
+                self._huecos.release()
+                continue
+            tarea = asyncio.create_task(self._ejecutar_lote(vigentes))
+            self._tareas.add(tarea)
+            tarea.add_done_callback(self._tareas.discard)
+
+    async def _ejecutar_lote(self, lote: List[Trabajo]):
+        loop = asyncio.get_running_loop()
+        self.metricas.lotes += 1
+        self.metricas.sudokus_en_lotes += len(lote)
+        self._lotes_en_vuelo += 1
+        try:
+            trabajos = [(t.cadena, t.algoritmo, t.max_nodos, t.vence) for t in lote]
+            resultados = await loop.run_in_executor(self._pool, resolver_lote, trabajos)
+            for trabajo, resultado in zip(lote, resultados):
+                if not trabajo.futuro.done():
+                    trabajo.futuro.set_result(resultado)
+        except Exception as e:
+            for trabajo in lote:
+                if not trabajo.futuro.done():
+                    trabajo.futuro.set_exception(e)
+        finally:
+            self._lotes_en_vuelo -= 1
+            self._huecos.release()
+
+    # --- Peticiones ---
+
+    def _leer_trabajos(self, cuerpo: bytes) -> Tuple[List[str], bool, str, int, float]:
+        try:
+            datos = json.loads(cuerpo or b'{}')
+        except ValueError:
+            raise ErrorPeticion(400, 'cuerpo JSON no válido')
+        if not isinstance(datos, dict):
+            raise ErrorPeticion(400, 'se esperaba un objeto JSON')
+        varios = 'sudokus' in datos
+        sudokus = datos.get('sudokus') if varios else [datos.get('sudoku')]
+        if not isinstance(sudokus, list) or not sudokus:
+            raise ErrorPeticion(400, "falta 'sudoku' o 'sudokus'")
+        if len(sudokus) > self.max_pendientes:
+            raise ErrorPeticion(413, f'como mucho {self.max_pendientes} Sudokus por petición')
+        algoritmo = datos.get('algoritmo', 'fc')
+        if algoritmo not in ALGORITMOS:
+            raise ErrorPeticion(400, f"algoritmo no válido (opciones: {', '.join(ALGORITMOS)})")
+        max_nodos = datos.get('max_nodos')
+        plazo_ms = datos.get('plazo_ms', self.plazo_ms)
+        if max_nodos is not None and (not isinstance(max_nodos, int) or max_nodos <= 0):
+            raise ErrorPeticion(400, "'max_nodos' debe ser un entero positivo")
+        if not isinstance(plazo_ms, (int, float)) or plazo_ms <= 0:
+            raise ErrorPeticion(400, "'plazo_ms' debe ser positivo")
+        cadenas = []
+        for sudoku in sudokus:
+            try:
+                if not isinstance(sudoku, str):
+                    raise ValueError('se esperaba una cadena de 81 caracteres')
+                tab = desdeCadena(sudoku)
+            except ValueError as e:
+                raise ErrorPeticion(400, f'sudoku no válido: {e}')
+            cadenas.append(''.join(''.join(fila) for fila in tab.getTablero()))
+        max_nodos = self.max_nodos if max_nodos is None else min(max_nodos, self.max_nodos)
+        return cadenas, varios, algoritmo, max_nodos, min(plazo_ms, self.plazo_ms)
+
+    async def _resolver(self, cuerpo: bytes) -> Tuple[int, Dict]:
+        cadenas, varios, algoritmo, max_nodos, plazo_ms = self._leer_trabajos(cuerpo)
+        self.metricas.sudokus += len(cadenas)
+        if self.max_pendientes - self._cola.qsize() < len(cadenas):
+            self.metricas.rechazadas_503 += 1
+            return 503, {'error': 'servicio saturado, reintente más tarde'}
+
+        loop = asyncio.get_running_loop()
+        vence = time.time() + plazo_ms / 1000
+        futuros = []
+        for cadena in cadenas:
+            futuro = loop.create_future()
+            self._cola.put_nowait(Trabajo(cadena, algoritmo, max_nodos, vence, futuro))
+            futuros.append(futuro)
+        try:
+            resultados = await asyncio.wait_for(asyncio.gather(*futuros), plazo_ms / 1000)
+        except asyncio.TimeoutError:
+            resultados = None
+        if resultados is None or any(r is None for r in resultados):
+            for futuro in futuros:
+                futuro.cancel()
+            self.metricas.vencidas_504 += 1
+            return 504, {'error': f'plazo de {plazo_ms} ms excedido'}
+        self.metricas.resueltos += len(resultados)
+        return 200, ({'resultados': resultados} if varios else resultados[0])
+
+    async def _atender(self, metodo: str, ruta: str, cuerpo: bytes) -> Tuple[int, Dict]:
+        ruta = ruta.split('?', 1)[0]
+        if ruta == '/resolver':
+            if metodo != 'POST':
+                raise ErrorPeticion(405, 'use POST')
+            return await self._resolver(cuerpo)
+        if ruta == '/metricas':
+            return 200, self.metricas.resumen(self._cola.qsize(), self._lotes_en_vuelo)
+        if ruta == '/salud':
+            return 200, {'estado': 'ok', 'procesos': self.procesos}
+        raise ErrorPeticion(404, f'ruta desconocida: {ruta}')
+
+    async def _conexion(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Atiende una conexión HTTP/1.1 (con keep-alive) hasta que el cliente la cierra."""
+        try:
+            while True:
+                linea = await reader.readline()
+                if not linea:
+                    break
+                cabeceras = {}
+                while True:
+                    cabecera = await reader.readline()
+                    if cabecera in (b'\r\n', b'\n', b''):
+                        break
+                    nombre, _, valor = cabecera.decode('latin-1').partition(':')
+                    cabeceras[nombre.strip().lower()] = valor.strip()
+                inicio = time.perf_counter()
+                self.metricas.peticiones += 1
+                ruta = ''
+                extra = {}
+                try:
+                    partes = linea.decode('latin-1').split()
+                    if len(partes) != 3:
+                        raise ErrorPeticion(400, 'línea de petición no válida')
+                    metodo, ruta, _ = partes
+                    longitud = int(cabeceras.get('content-length', '0') or 0)
+                    if longitud > MAX_CUERPO:
+                        raise ErrorPeticion(413, 'cuerpo demasiado grande')
+                    cuerpo = await reader.readexactly(longitud) if longitud > 0 else b''
+                    estado, respuesta = await self._atender(metodo, ruta, cuerpo)
+                except ErrorPeticion as e:
+                    estado, respuesta = e.estado, {'error': str(e)}
+                    if e.estado == 400:
+                        self.metricas.invalidas_400 += 1
+                except ValueError:
+                    estado, respuesta = 400, {'error': 'Content-Length no válido'}
+                    self.metricas.invalidas_400 += 1
+                except Exception as e:  # no se tumba el servidor por un lote fallido
+                    estado, respuesta = 500, {'error': f'{type(e).__name__}: {e}'}
+                    self.metricas.errores_500 += 1
+                if estado == 503:
+                    extra['Retry-After'] = '1'
+                cerrar = cabeceras.get('connection', '').lower() == 'close' or estado == 413
+                cuerpo_resp = json.dumps(respuesta, ensure_ascii=False).encode('utf-8')
+                lineas = [f"HTTP/1.1 {estado} {TEXTOS_ESTADO.get(estado, '')}",
+                          'Content-Type: application/json; charset=utf-8',
+                          f'Content-Length: {len(cuerpo_resp)}',
+                          f"Connection: {'close' if cerrar else 'keep-alive'}"]
+                lineas += [f'{k}: {v}' for k, v in extra.items()]
+                writer.write(('\r\n'.join(lineas) + '\r\n\r\n').encode('latin-1') + cuerpo_resp)
+                await writer.drain()
+                if ruta.startswith('/resolver'):
+                    self.metricas.latencias_ms.append((time.perf_counter() - inicio) * 1000)
+                if cerrar:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def servir(self, host=HOST, puerto=PUERTO, listo=None):
+        """
+        Arranca el pool y el servidor y atiende hasta que se cancela.
+
+        Args:
+            listo (asyncio.Event | None): Se activa cuando el servidor ya escucha
+        """
+        self._cola = asyncio.Queue(self.max_pendientes)
+        self._huecos = asyncio.Semaphore(self.procesos)
+        self._pool = ProcessPoolExecutor(self.procesos, initializer=_calentar_proceso)
+        despachador = asyncio.create_task(self._despachar())
+        servidor = await asyncio.start_server(self._conexion, host, puerto)
+        try:
+            async with servidor:
+                print(f"Servicio escuchando en http://{host}:{puerto} "
+                      f"({self.procesos} procesos, lote {self.tam_lote}, ventana {self.ventana * 1000:g} ms)")
+                if listo is not None:
+                    listo.set()
+                await servidor.serve_forever()
+        finally:
+            despachador.cancel()
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servicio HTTP local de resolución de Sudokus por lotes')
+    parser.add_argument('--host', default=HOST, help='Dirección de escucha (por defecto solo localhost)')
+    parser.add_argument('--puerto', type=int, default=PUERTO)
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos resolutores (por defecto, núcleos)')
+    parser.add_argument('--ventana-ms', type=float, default=5.0, help='Ventana de agrupación de lotes')
+    parser.add_argument('--tam-lote', type=int, default=32, help='Máximo de Sudokus por lote')
+    parser.add_argument('--max-pendientes', type=int, default=1000, help='Capacidad de la cola antes de responder 503')
+    parser.add_argument('--plazo-ms', type=float, default=10000.0, help='Plazo máximo por petición')
+    parser.add_argument('--max-nodos', type=int, default=MAX_NODOS,
+                        help='Presupuesto de nodos por defecto y máximo de cada Sudoku')
+    args = parser.parse_args()
+
+    servicio = ServicioSudoku(procesos=args.procesos, ventana_ms=args.ventana_ms, tam_lote=args.tam_lote,
+                              max_pendientes=args.max_pendientes, plazo_ms=args.plazo_ms,
+                              max_nodos=args.max_nodos)
+    try:
+        asyncio.run(servicio.servir(args.host, args.puerto))
+    except KeyboardInterrupt:
+        print("\nServicio detenido.")
+
+
+if __name__ == '__main__':
+    main()
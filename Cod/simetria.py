@@ -0,0 +1,308 @@
+"""
+Poda por simetrías durante la búsqueda
+======================================
+
+En un nodo de la búsqueda, el subproblema que queda son las celdas libres con
+sus dominios (restringidos por lo ya asignado) y las desigualdades entre
+ellas. Si una simetría de ese subproblema deja fija la celda que se está
+ramificando y lleva el valor `a` a `b`, los subárboles `celda=a` y `celda=b`
+son isomorfos: si `a` no condujo a ninguna solución, tampoco lo hará `b`, y
+se puede saltar.
+
+Se consideran dos clases de simetrías del subproblema:
+- De valores: dos dígitos son intercambiables si aparecen exactamente en los
+  mismos dominios libres (p. ej. un par desnudo que no aparece en otra parte).
+- Geométricas: transformaciones del tablero que conservan filas, columnas y
+  bloques (trasponer, permutar bandas/pilas y, igual en todas, las filas o
+  columnas de dentro), que dejan fija la celda, llevan las celdas libres a
+  celdas libres y transforman los dominios mediante una permutación de dígitos.
+
+La poda solo actúa tras un subárbol sin soluciones, así que no cambia la
+solución encontrada ni el número de soluciones; solo se ahorran nodos.
+
+`MascarasSimetria` mantiene las máscaras de la búsqueda de forma incremental
+(se actualizan al asignar y se restauran al deshacer). Primero se prueba la
+simetría de valores, que es barata; la pasada geométrica solo se hace si el
+patrón de celdas libres tiene automorfismos, que se cachean por patrón.
+"""
+
+from itertools import permutations
+
+DIGITOS = ('1', '2', '3', '4', '5', '6', '7', '8', '9')
+_BIT = {d: 1 << i for i, d in enumerate(DIGITOS)}
+# Dígito -> inicio de sus 9 máscaras en MascarasSimetria; índice -> máscara sin ese bit
+_BASE = {d: 9 * i for i, d in enumerate(DIGITOS)}
+_SIN = tuple(~(1 << i) for i in range(9))
+
+# Se calculan la primera vez que se usan (ver _preparar)
+_LINEAS = None        # 36 permutaciones de 0..8 (bandas/pilas y líneas dentro de ellas)
+_PERMUTAR = None      # _PERMUTAR[k][m]: máscara de 9 bits m con sus bits movidos por _LINEAS[k]
+
+# Patrón de celdas libres (máscaras por fila) -> transformaciones que lo conservan
+_AUTOMORFISMOS = {}
+MAX_AUTOMORFISMOS = 4096
+
+
+def _mapas_lineas():
+    """Las 36 permutaciones de 0..8 que permutan bandas y, igual en todas, sus líneas."""
+    mapas = []
+    for bandas in permutations(range(3)):
+        for lineas in permutations(range(3)):
+            mapas.append(tuple(3 * bandas[i // 3] + lineas[i % 3] for i in range(9)))
+    return mapas
+
+
+def _preparar():
+    global _LINEAS, _PERMUTAR
+    _LINEAS = _mapas_lineas()
+    _PERMUTAR = []
+    for mapa in _LINEAS:
+        tabla = []
+        for m in range(512):
+            tabla.append(sum(1 << mapa[i] for i in range(9) if m >> i & 1))
+        _PERMUTAR.append(tuple(tabla))
+
+
+def _fija(transformacion, fila, columna):
+    """True si la transformación deja la celda (fila, columna) en su sitio."""
+    traspuesta, k_filas, k_columnas = transformacion
+    rf, rc = _LINEAS[k_filas], _LINEAS[k_columnas]
+    return (rc[columna], rf[fila]) == (fila, columna) if traspuesta else (rf[fila], rc[columna]) == (fila, columna)
+
+
+def transformaciones():
+    """
+    Las 2592 transformaciones geométricas consideradas, como tuplas
+    (traspuesta, k_filas, k_columnas): la celda (f, c) va a
+    (L[k_filas][f], L[k_columnas][c]), o a (L[k_columnas][c], L[k_filas][f]) si
+    se traspone, con L = las 36 permutaciones de líneas. La (False, 0, 0) es
+    la identidad.
+    """
+    return [(traspuesta, filas, columnas)
+            for filas in range(36) for columnas in range(36) for traspuesta in (False, True)]
+
+
+def estabilizadores(celda):
+    """Transformaciones (sin la identidad) que dejan fija `celda` (fila*9+columna)."""
+    if _LINEAS is None:
+        _preparar()
+    return [t for t in transformaciones()[1:] if _fija(t, celda // 9, celda % 9)]
+
+
+def _imagen(conjunto, transformacion):
+    """
+    Imagen de un conjunto de celdas, dado como (máscaras por fila, máscaras
+    por columna), devuelta como máscaras por fila.
+    """
+    traspuesta, k_filas, k_columnas = transformacion
+    imagen = [0] * 9
+    if traspuesta:
+        destino, permutar = _LINEAS[k_columnas], _PERMUTAR[k_filas]
+        for c, mascara in enumerate(conjunto[1]):
+            imagen[destino[c]] = permutar[mascara]
+    else:
+        destino, permutar = _LINEAS[k_filas], _PERMUTAR[k_columnas]
+        for f, mascara in enumerate(conjunto[0]):
+            imagen[destino[f]] = permutar[mascara]
+    return tuple(imagen)
+
+
+def mascaras_libres(csp):
+    """
+    Celdas libres y, por dígito, las celdas libres que aún lo admiten (su
+    dominio sin los valores ya asignados en su fila, columna o bloque). Cada
+    conjunto se da como (máscaras por fila, máscaras por columna).
+
+    Returns:
+        tuple: (libres, {dígito: conjunto})
+    """
+    variables = csp.variables
+    usados_fila = [0] * 9
+    usados_columna = [0] * 9
+    usados_bloque = [0] * 9
+    for f, fila in enumerate(variables):
+        for c, variable in enumerate(fila):
+            valor = variable.valor
+            if valor != '0':
+                bit = _BIT[valor]
+                usados_fila[f] |= bit
+                usados_columna[c] |= bit
+                usados_bloque[f // 3 * 3 + c // 3] |= bit
+
+    libres_filas, libres_columnas = [0] * 9, [0] * 9
+    filas = {d: [0] * 9 for d in DIGITOS}
+    columnas = {d: [0] * 9 for d in DIGITOS}
+    for f, fila in enumerate(variables):
+        for c, variable in enumerate(fila):
+            if variable.valor != '0':
+                continue
+            bit_c, bit_f = 1 << c, 1 << f
+            libres_filas[f] |= bit_c
+            libres_columnas[c] |= bit_f
+            usados = usados_fila[f] | usados_columna[c] | usados_bloque[f // 3 * 3 + c // 3]
+            for valor in variable.dominio:
+                if not usados & _BIT[valor]:
+                    filas[valor][f] |= bit_c
+                    columnas[valor][c] |= bit_f
+    libres = (tuple(libres_filas), tuple(libres_columnas))
+    return libres, {d: (tuple(filas[d]), tuple(columnas[d])) for d in DIGITOS}
+
+
+# _ESPACIAR[m]: la máscara de 9 bits m con el bit c movido a la posición 9 * c
+_ESPACIAR = tuple(sum(1 << 9 * c for c in range(9) if m >> c & 1) for m in range(512))
+
+
+def _columnas(filas):
+    """Máscaras por columna del conjunto de celdas dado por sus máscaras por fila."""
+    espaciadas = 0
+    for f, mascara in enumerate(filas):
+        espaciadas |= _ESPACIAR[mascara] << f
+    return tuple(espaciadas >> 9 * c & 511 for c in range(9))
+
+
+def _recuentos_conservados(origen, destino):
+    """Índices k de _LINEAS que llevan cada línea i a una línea con el mismo recuento: destino[L[k][i]] == origen[i]."""
+    return [k for k, mapa in enumerate(_LINEAS) if all(destino[mapa[i]] == origen[i] for i in range(9))]
+
+
+def automorfismos(filas_libres):
+    """
+    Transformaciones (sin la identidad) que llevan las celdas libres a celdas
+    libres. Como una transformación lleva filas a filas (o a columnas, si
+    traspone), antes de calcular imágenes se descartan las permutaciones de
+    líneas que no conservan el número de celdas libres por línea: en casi
+    todos los nodos no queda ninguna. El resultado se guarda por patrón.
+
+    Args:
+        filas_libres (tuple): Máscaras por fila de las celdas libres
+    """
+    encontradas = _AUTOMORFISMOS.get(filas_libres)
+    if encontradas is not None:
+        return encontradas
+    if _LINEAS is None:
+        _preparar()
+    libres = (filas_libres, _columnas(filas_libres))
+    por_fila = [bin(m).count('1') for m in libres[0]]
+    por_columna = [bin(m).count('1') for m in libres[1]]
+    candidatas = [(False, kf, kc) for kf in _recuentos_conservados(por_fila, por_fila)
+                  for kc in _recuentos_conservados(por_columna, por_columna)]
+    candidatas += [(True, kf, kc) for kf in _recuentos_conservados(por_fila, por_columna)
+                   for kc in _recuentos_conservados(por_columna, por_fila)]
+    encontradas = [t for t in candidatas if t != (False, 0, 0) and _imagen(libres, t) == libres[0]]
+    if len(_AUTOMORFISMOS) >= MAX_AUTOMORFISMOS:
+        _AUTOMORFISMOS.clear()
+    _AUTOMORFISMOS[filas_libres] = encontradas
+    return encontradas
+
+
+def _simetricos_geometricos(libres, mascaras, transformaciones_celda, valor, candidatos):
+    """
+    Dígitos de `candidatos` a los que lleva `valor` alguna de las
+    transformaciones (ya filtradas: conservan las celdas libres y fijan la
+    celda) que además conserva los conjuntos de celdas por dígito.
+    """
+    simetricos = set()
+    ordenadas = sorted(m[0] for m in mascaras.values())
+    for transformacion in transformaciones_celda:
+        if sorted(_imagen(m, transformacion) for m in mascaras.values()) != ordenadas:
+            continue
+        imagen = _imagen(mascaras[valor], transformacion)
+        simetricos.update(d for d in candidatos if mascaras[d][0] == imagen)
+    return simetricos
+
+
+def valores_simetricos(csp, fila, columna, valor, candidatos=DIGITOS):
+    """
+    Valores de la celda (fila, columna), libre, simétricos a `valor` en el
+    subproblema actual. Recorre el tablero para calcular las máscaras; dentro
+    de la búsqueda se usa MascarasSimetria, que las mantiene al asignar.
+
+    Args:
+        candidatos: Valores que aún quedan por probar; solo se buscan entre ellos
+
+    Returns:
+        set: Dígitos de `candidatos` (sin `valor`) cuyo subárbol es isomorfo al de `valor`
+    """
+    candidatos = [d for d in candidatos if d != valor]
+    if not candidatos:
+        return set()
+    libres, mascaras = mascaras_libres(csp)
+    # Simetría de valores: dígitos con el mismo conjunto de celdas libres
+    objetivo = mascaras[valor][0]
+    simetricos = {d for d in candidatos if mascaras[d][0] == objetivo}
+    if len(simetricos) < len(candidatos):
+        propias = [t for t in automorfismos(libres[0]) if _fija(t, fila, columna)]
+        if propias:
+            simetricos |= _simetricos_geometricos(libres, mascaras, propias, valor, candidatos)
+    return simetricos
+
+
+class MascarasSimetria:
+    """
+    Las máscaras de mascaras_libres mantenidas durante la búsqueda, para no
+    recorrer las 81 celdas tras cada valor fallido. Solo se mantienen las
+    máscaras por fila, en una lista plana de 10 x 9 enteros (por dígito y para
+    las celdas libres); las de columna se reconstruyen en el raro caso de que
+    haga falta la pasada geométrica. Cada asignación apila una copia y la
+    deshace al retroceder.
+    """
+
+    def __init__(self, csp):
+        libres, mascaras = mascaras_libres(csp)
+        self._m = []
+        for filas, _ in [mascaras[d] for d in DIGITOS] + [libres]:
+            self._m += filas
+        self._pila = []
+
+    def asignar(self, fila, columna, valor, cambios=()):
+        """
+        Asigna `valor` en (fila, columna): la celda deja de estar libre, el
+        dígito deja de caber en su fila, columna y bloque, y se quitan los
+        valores eliminados por la propagación (`cambios`, como en propagar_fc).
+        """
+        m = self._m
+        self._pila.append(m[:])
+        sin_columna = _SIN[columna]
+        for base in range(0, 90, 9):
+            m[base + fila] &= sin_columna
+        base = _BASE[valor]
+        for f in range(base, base + 9):
+            m[f] &= sin_columna
+        m[base + fila] = 0
+        f0 = base + fila // 3 * 3
+        sin_bloque = ~(7 << columna // 3 * 3)
+        m[f0] &= sin_bloque
+        m[f0 + 1] &= sin_bloque
+        m[f0 + 2] &= sin_bloque
+        for f, c, v in cambios:
+            m[_BASE[v] + f] &= _SIN[c]
+
+    def deshacer(self):
+        """Deshace la última asignación."""
+        self._m = self._pila.pop()
+
+    def simetricos(self, fila, columna, valor, candidatos=DIGITOS):
+        """
+        Como valores_simetricos, con las máscaras mantenidas. Las máscaras por
+        dígito solo se copian si el patrón de celdas libres tiene alguna
+        simetría geométrica que fije la celda.
+        """
+        candidatos = [d for d in candidatos if d != valor]
+        if not candidatos:
+            return set()
+        m = self._m
+        inicio = _BASE[valor]
+        objetivo = m[inicio:inicio + 9]
+        simetricos = {d for d in candidatos if m[_BASE[d]:_BASE[d] + 9] == objetivo}
+        if len(simetricos) == len(candidatos):
+            return simetricos
+        filas_libres = tuple(m[81:90])
+        propias = [t for t in automorfismos(filas_libres) if _fija(t, fila, columna)]
+        if propias:
+            libres = (filas_libres, _columnas(filas_libres))
+            mascaras = {}
+            for d in DIGITOS:
+                filas = tuple(m[_BASE[d]:_BASE[d] + 9])
+                mascaras[d] = (filas, _columnas(filas))
+            simetricos |= _simetricos_geometricos(libres, mascaras, propias, valor, candidatos)
+        return simetricos
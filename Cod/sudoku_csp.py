@@ -12,9 +12,115 @@ Curso: 2024-25
 Asignatura: Sistemas Inteligentes
 """
 
-import copy
 from variable import Variable
 
+# Dígitos de cada máscara de 9 bits (bit v-1 = dígito v), compartidos por
+# todos los EstadoDominios. Se construyen duplicando la lista por cada dígito
+# (la máscara m + 2^(v-1) es la de m más el dígito v): importar el módulo
+# debe seguir siendo barato
+_valores = [()]
+_cadenas = ['']
+for _v in '123456789':
+    _valores += [t + (_v,) for t in _valores]
+    _cadenas += [t + _v for t in _cadenas]
+VALORES_MASCARA = tuple(_valores)
+_BIT = {str(v): 1 << (v - 1) for v in range(1, 10)}
+
+
+def mascara(dominio):
+    """Máscara de 9 bits de una lista (o tupla, o cadena) de dígitos."""
+    m = 0
+    for v in dominio:
+        m |= _BIT[v]
+    return m
+
+
+class _Mascaras(dict):
+    """Cadena de dígitos -> máscara; las cadenas ordenadas vienen precalculadas."""
+
+    def __missing__(self, clave):
+        return mascara(clave)
+
+
+# ''.join(dominio) + una búsqueda es bastante más rápido que recorrer el dominio
+_MASCARA_DE = _Mascaras(zip(_cadenas, range(512)))
+del _valores, _cadenas, _v
+
+
+class EstadoDominios:
+    """
+    Dominios 9x9 inmutables y empaquetados: una máscara de 9 bits por celda
+    en una tupla de 81 enteros (por filas).
+
+    Se indexa como la matriz de snapshot_dominios (estado[f][c] es la tupla
+    de dígitos de la celda), así que se puede pasar como `dominios=` a
+    cualquier resolutor. Las tuplas de dígitos son las de VALORES_MASCARA,
+    compartidas; solo las 9 filas se construyen, una vez y al primer acceso.
+
+    Atributos:
+        mascaras (tuple[int]): Máscara de cada celda, índice fila * 9 + columna
+    """
+
+    __slots__ = ('mascaras', '_filas')
+
+    def __init__(self, mascaras):
+        """
+        Args:
+            mascaras (Iterable[int]): 81 máscaras, por filas
+        """
+        object.__setattr__(self, 'mascaras', tuple(mascaras))
+        object.__setattr__(self, '_filas', None)
+
+    @classmethod
+    def desde_matriz(cls, dominios):
+        """EstadoDominios a partir de una matriz 9x9 de listas o tuplas de dígitos."""
+        if isinstance(dominios, cls):
+            return dominios
+        return cls(mascara(d) for fila in dominios for d in fila)
+
+    def __setattr__(self, nombre, valor):
+        raise AttributeError("EstadoDominios es inmutable")
+
+    def _matriz(self):
+        if self._filas is None:
+            m = self.mascaras
+            filas = tuple(tuple(VALORES_MASCARA[x] for x in m[f * 9:f * 9 + 9]) for f in range(9))
+            object.__setattr__(self, '_filas', filas)
+        return self._filas
+
+    def __getitem__(self, fila):
+        return self._matriz()[fila]
+
+    def __iter__(self):
+        return iter(self._matriz())
+
+    def __len__(self):
+        return 9
+
+    def __eq__(self, otro):
+        return isinstance(otro, EstadoDominios) and self.mascaras == otro.mascaras
+
+    def __hash__(self):
+        return hash(self.mascaras)
+
+    def __repr__(self):
+        return f"EstadoDominios({sum(bin(m).count('1') for m in self.mascaras)} valores)"
+
+    def diferencias(self, otro):
+        """
+        Celdas cuyo dominio difiere entre este estado y `otro`.
+
+        Returns:
+            list[tuple]: (fila, columna, dominio aquí, dominio en `otro`)
+        """
+        return [(k // 9, k % 9, VALORES_MASCARA[a], VALORES_MASCARA[b])
+                for k, (a, b) in enumerate(zip(self.mascaras, otro.mascaras)) if a != b]
+
+    def a_listas(self):
+        """Copia modificable 9x9 de listas (como snapshot_dominios)."""
+        return [[list(d) for d in fila] for fila in self._matriz()]
+
+
 class SudokuCSP:
     """
     Clase que representa el problema de satisfacción de restricciones del Sudoku
@@ -26,8 +132,9 @@ class SudokuCSP:
         
         Args:
             tablero (Tablero): Objeto tablero con la configuración inicial
-            dominios (list[list[list[str]]] | None): Matriz 9x9 con los dominios
-                para cada celda (solo usado para celdas no fijas). Si es None,
+            dominios (list[list[list[str]]] | EstadoDominios | None): Matriz
+                9x9 con los dominios para cada celda (solo usado para celdas no
+                fijas). Si es None,
                 se inicializan dominios por defecto y se aplica una reducción
                 inicial en base a los valores fijos en el tablero.
         """
@@ -86,8 +193,16 @@ class SudokuCSP:
         Aplica una matriz de dominios a las variables no fijas.
 
         Args:
-            dominios (list[list[list[str]]]): Matriz 9x9 con listas de valores permitidos por celda.
+            dominios (list[list[list[str]]] | EstadoDominios): Matriz 9x9 con
+                listas (o tuplas) de valores permitidos por celda, o sus máscaras.
         """
+        if isinstance(dominios, EstadoDominios):
+            mascaras = dominios.mascaras
+            for f in range(9):
+                for c in range(9):
+                    v = self.variables[f][c]
+                    v.dominio = [v.valor] if v.es_fija else list(VALORES_MASCARA[mascaras[f * 9 + c]])
+            return
         if len(dominios) != 9 or any(len(fila) != 9 for fila in dominios):
             raise ValueError("La matriz de dominios debe ser 9x9")
         for f in range(9):
@@ -97,9 +212,11 @@ class SudokuCSP:
                     # Mantener el dominio consistente con el valor fijo
                     v.dominio = [v.valor]
                 else:
-                    dom = dominios[f][c][:] if dominios[f][c] is not None else v.dominio
-                    # Asegurar que el dominio no sea vacío; si está vacío se deja como está para que el algoritmo detecte inconsistencia
-                    v.dominio = dom if isinstance(dom, list) else v.dominio
+                    # Copia propia de la variable (admite listas o tuplas, p.ej. la
+                    # instantánea inmutable de preprocesar_ac3). Si está vacío se deja
+                    # como está para que el algoritmo detecte la inconsistencia
+                    dom = dominios[f][c]
+                    v.dominio = list(dom) if isinstance(dom, (list, tuple)) else v.dominio
 
     def _asignar_vecinos(self):
         """
@@ -208,6 +325,20 @@ class SudokuCSP:
         
         return True
     
+    def fijas_consistentes(self):
+        """
+        Verifica que los valores fijos del tablero no se contradicen entre sí
+        
+        Returns:
+            bool: True si ningún valor fijo se repite en su fila, columna o submatriz
+        """
+        for fila in range(9):
+            for columna in range(9):
+                variable = self.variables[fila][columna]
+                if variable.es_fija and not self.es_consistente(fila, columna, variable.valor):
+                    return False
+        return True
+    
     def obtener_variable_no_asignada(self):
         """
         Obtiene la primera variable no asignada usando la heurística MRV
@@ -261,6 +392,16 @@ class SudokuCSP:
                 variable = self.variables[fila][columna]
                 print(f"({fila},{columna}): {variable.dominio}")
 
+    def estado_dominios(self):
+        """
+        Instantánea inmutable y empaquetada de los dominios actuales.
+
+        Returns:
+            EstadoDominios: Una máscara por celda (81 enteros, sin listas).
+        """
+        mascaras = _MASCARA_DE
+        return EstadoDominios([mascaras[''.join(variable.dominio)] for fila in self.variables for variable in fila])
+
     def snapshot_dominios(self):
         """
         Devuelve una copia profunda de los dominios actuales (9x9 listas).
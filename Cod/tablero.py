@@ -1,8 +1,11 @@
 # Representa el sudoku
 class Tablero:    
-    def __init__(self, archivo):
+    def __init__(self, archivo=None):
         self.tam=9           
-        self.tablero=leer(archivo)        
+        if archivo is None:
+            self.tablero=[['0']*9 for _ in range(9)]
+        else:
+            self.tablero=leer(archivo)        
          
     def __str__(self):
         salida=""
@@ -27,8 +30,49 @@ class Tablero:
         
     def getTablero(self):
         return self.tablero
+
+    # Copia independiente del tablero (más barata que copy.deepcopy)
+    def copia(self):
+        nuevo=Tablero()
+        nuevo.tablero=[list(fila) for fila in self.tablero]
+        return nuevo
     
         
+# Crea un tablero a partir de una cadena de 81 dígitos por filas ('0' o '.' = vacía)
+def desdeCadena(cadena):
+    celdas=[ch for ch in cadena if not ch.isspace()]
+    if len(celdas)!=81:
+        raise ValueError("Se esperaban 81 celdas")
+    tab=Tablero()
+    for i, ch in enumerate(celdas):
+        if ch=='.':
+            ch='0'
+        if ch not in '0123456789':
+            raise ValueError(f"Carácter no válido: {ch!r}")
+        tab.setCelda(i//9, i%9, ch)
+    return tab
+
+# Lee uno o varios tableros de un texto. Admite el formato de las plantillas
+# (9 filas de 9 valores separados por espacios) y el de una línea de 81
+# caracteres por sudoku ('0' o '.' = vacía). Las líneas con '#' se ignoran.
+def tablerosDesdeTexto(texto):
+    tableros=[]
+    pendiente=""
+    for linea in texto.splitlines():
+        linea="".join(linea.split())
+        if not linea or linea.startswith('#'):
+            continue
+        if not pendiente and len(linea)==81:
+            tableros.append(desdeCadena(linea))
+            continue
+        pendiente+=linea
+        if len(pendiente)>=81:
+            tableros.append(desdeCadena(pendiente[:81]))
+            pendiente=pendiente[81:]
+    if pendiente:
+        raise ValueError("Sudoku incompleto al final de la entrada")
+    return tableros
+
 def leer(archivo):
     tablero=[]
     
@@ -0,0 +1,228 @@
+"""
+Propagación de todos-distintos (Régin) por unidades
+===================================================
+
+AC3 y MAC tratan cada fila, columna y bloque como 36 desigualdades binarias,
+así que solo eliminan valores que coinciden con un vecino de dominio unitario.
+Aquí cada una de las 27 unidades de `SudokuCSP.restricciones` es una única
+restricción todos-distintos y se filtra con el algoritmo de Régin:
+
+1. Se busca un emparejamiento máximo entre las celdas libres de la unidad y
+   los dígitos que aún no usa ninguna celda asignada de ella (caminos de
+   aumento). Si no cubre todas las celdas libres, la unidad es inconsistente.
+2. Un valor v de la celda x tiene soporte si (x, v) está en algún
+   emparejamiento máximo: está en el emparejamiento, o en un ciclo alternado
+   (x y v en la misma componente fuertemente conexa del grafo orientado), o en
+   un camino alternado que sale de un dígito libre. El resto se elimina.
+
+Esto incluye, en un solo paso, los pares/tríos desnudos y ocultos y cualquier
+conjunto de Hall. Las unidades se revisan hasta el punto fijo: cuando cambia
+el dominio de una celda se vuelven a revisar sus tres unidades.
+
+Los cambios se devuelven como (fila, columna, valor), igual que en
+propagar_fc/propagar_mac, para deshacerlos con revertir_cambios.
+"""
+
+from heuristicas import unidades_de_celda
+
+
+def _emparejar(celdas, dominios):
+    """
+    Emparejamiento máximo celda -> valor por caminos de aumento.
+
+    Args:
+        celdas (list): Índices de las celdas libres de la unidad
+        dominios (dict): Celda -> valores candidatos
+
+    Returns:
+        dict: Celda -> valor emparejado (solo las celdas emparejadas)
+    """
+    de_valor = {}
+
+    def aumentar(x, visitados):
+        for v in dominios[x]:
+            if v in visitados:
+                continue
+            visitados.add(v)
+            if v not in de_valor or aumentar(de_valor[v], visitados):
+                de_valor[v] = x
+                return True
+        return False
+
+    # Primero las celdas con menos candidatos: menos caminos de aumento largos
+    for x in sorted(celdas, key=lambda x: len(dominios[x])):
+        aumentar(x, set())
+    return {x: v for v, x in de_valor.items()}
+
+
+def _componentes(nodos, sucesores):
+    """Componentes fuertemente conexas (Tarjan) como dict nodo -> identificador."""
+    indice, bajo, pila, en_pila, componente = {}, {}, [], set(), {}
+    contador = [0]
+
+    def visitar(n):
+        indice[n] = bajo[n] = contador[0]
+        contador[0] += 1
+        pila.append(n)
+        en_pila.add(n)
+        for m in sucesores(n):
+            if m not in indice:
+                visitar(m)
+                bajo[n] = min(bajo[n], bajo[m])
+            elif m in en_pila:
+                bajo[n] = min(bajo[n], indice[m])
+        if bajo[n] == indice[n]:
+            while True:
+                m = pila.pop()
+                en_pila.discard(m)
+                componente[m] = n
+                if m == n:
+                    break
+
+    for n in nodos:
+        if n not in indice:
+            visitar(n)
+    return componente
+
+
+def filtrar_unidad(csp, unidad):
+    """
+    Filtra una unidad como restricción todos-distintos.
+
+    Args:
+        csp (SudokuCSP): Problema (se modifican los dominios de las celdas libres).
+        unidad (list): Celdas (fila, columna) de la unidad.
+
+    Returns:
+        tuple: (cambios, consistente); cambios = [(fila, columna, valor)] eliminados
+    """
+    variables = csp.variables
+    usados = set()
+    libres = []
+    for f, c in unidad:
+        variable = variables[f][c]
+        if variable.esta_asignada():
+            if variable.valor in usados:
+                return [], False  # Valores fijos repetidos
+            usados.add(variable.valor)
+        else:
+            libres.append((f, c))
+    cambios = []
+    if not libres:
+        return cambios, True
+    dominios = {x: [v for v in variables[x[0]][x[1]].dominio if v not in usados] for x in libres}
+    emparejamiento = _emparejar(libres, dominios)
+    if len(emparejamiento) < len(libres):
+        return cambios, False
+
+    # Grafo alternado: celda -> valor emparejado; valor -> celdas que lo tienen
+    # en el dominio sin estar emparejadas con él
+    celda_de = {v: x for x, v in emparejamiento.items()}
+    hacia_celdas = {}
+    for x in libres:
+        for v in dominios[x]:
+            if emparejamiento[x] != v:
+                hacia_celdas.setdefault(v, []).append(x)
+
+    def sucesores(n):
+        if n in dominios:
+            return (emparejamiento[n],)
+        return hacia_celdas.get(n, ())
+
+    # Alcanzables desde los valores libres (caminos alternados pares)
+    alcanzables = set()
+    pendientes = [v for v in hacia_celdas if v not in celda_de]
+    while pendientes:
+        n = pendientes.pop()
+        if n in alcanzables:
+            continue
+        alcanzables.add(n)
+        pendientes.extend(sucesores(n))
+
+    componente = _componentes(list(libres) + list(celda_de), sucesores)
+    for x in libres:
+        variable = variables[x[0]][x[1]]
+        for v in list(variable.dominio):
+            soporte = (v not in usados and
+                       (emparejamiento[x] == v or v in alcanzables
+                        or componente.get(v) == componente[x]))
+            if not soporte and variable.eliminar_del_dominio(v):
+                cambios.append((x[0], x[1], v))
+    return cambios, True
+
+
+def propagar_unidades(csp, unidades=None):
+    """
+    Filtra todos-distintos hasta el punto fijo.
+
+    Args:
+        csp (SudokuCSP): Problema (se modifican los dominios).
+        unidades (Iterable[int] | None): Índices en csp.restricciones por los
+            que empezar; por defecto, las 27.
+
+    Returns:
+        tuple: (cambios, consistente)
+    """
+    cola = list(range(27)) if unidades is None else list(dict.fromkeys(unidades))
+    en_cola = set(cola)
+    cambios = []
+    while cola:
+        u = cola.pop(0)
+        en_cola.discard(u)
+        nuevos, consistente = filtrar_unidad(csp, csp.restricciones[u])
+        cambios.extend(nuevos)
+        if not consistente:
+            return cambios, False
+        for f, c, _ in nuevos:
+            for w in unidades_de_celda(f, c):
+                if w != u and w not in en_cola:
+                    en_cola.add(w)
+                    cola.append(w)
+    return cambios, True
+
+
+def propagar_todos_distintos(csp, fila, columna, valor):
+    """
+    Paso de búsqueda: Forward Checking de la asignación y filtrado
+    todos-distintos de las unidades afectadas hasta el punto fijo.
+
+    Returns:
+        tuple: (cambios, consistente)
+    """
+    from algoritmos import propagar_fc
+
+    cambios, consistente = propagar_fc(csp, fila, columna, valor)
+    if not consistente:
+        return cambios, False
+    unidades = list(unidades_de_celda(fila, columna))
+    for f, c, _ in cambios:
+        unidades.extend(unidades_de_celda(f, c))
+    nuevos, consistente = propagar_unidades(csp, unidades)
+    cambios.extend(nuevos)
+    return cambios, consistente
+
+
+def filtrar_todos_distintos(tablero, dominios=None):
+    """
+    Preprocesado: como ac3, pero filtrando cada unidad como todos-distintos.
+    Las celdas cuyo dominio queda unitario se asignan en `tablero`.
+
+    Args:
+        tablero (Tablero): Tablero inicial (se modifica como en ac3)
+        dominios (list[list[list[str]]] | None): Dominios iniciales opcionales
+
+    Returns:
+        dict: {'consistente', 'dominios_antes', 'dominios_despues', 'resueltas', 'eliminados'}
+    """
+    from algoritmos import _cerrar_ac3
+    from sudoku_csp import SudokuCSP
+
+    csp = SudokuCSP(tablero, dominios=dominios)
+    dominios_antes = csp.estado_dominios()
+    consistente = csp.fijas_consistentes()
+    cambios = []
+    if consistente:
+        cambios, consistente = propagar_unidades(csp)
+    resultado = _cerrar_ac3(csp, tablero, dominios_antes, consistente, verbose=False)
+    resultado['eliminados'] = len(cambios)
+    return resultado
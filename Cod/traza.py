@@ -0,0 +1,373 @@
+"""
+Traza binaria de la búsqueda
+============================
+
+DEBUG_TRAZA_AC3_DOMINIOS imprime por pantalla y solo cubre AC3. Aquí la
+búsqueda (FC, MAC, TD, reglas) y AC3 escriben sus eventos en registros
+binarios de tamaño fijo, sin formatear texto durante la ejecución:
+
+    tipo (B) | fila (B) | columna (B) | valor (B) | profundidad (H) | extra (H)
+
+8 bytes por evento, en little-endian. Eventos:
+- ASIGNAR: se prueba `valor` en (fila, columna) a esa profundidad.
+- PODAR: la propagación de la última asignación quitó `valor` de (fila, columna).
+- VACIO: la propagación dejó sin valores a (fila, columna); extra = valores
+  quitados por ese paso.
+- RETROCEDER: se deshace la asignación de (fila, columna).
+- SOLUCION: tablero completo a esa profundidad.
+- REVISAR: revisión de AC3 que quitó `valor` de (fila, columna); extra =
+  índice fila * 9 + columna del otro extremo del arco.
+Los eventos de AC3 (REVISAR y su VACIO) llevan profundidad FUERA_DE_BUSQUEDA.
+
+GrabadorTraza guarda los registros en un búfer circular de capacidad fija (se
+conservan los últimos eventos y se cuentan los perdidos) o, con `fichero`, los
+vuelca a disco cada vez que el búfer se llena, sin perder ninguno. El coste
+por evento es un `struct.pack_into`; sin grabador, la búsqueda solo comprueba
+`traza is not None`.
+
+leer_traza decodifica un fichero (o unos bytes) y reconstruir_arbol y
+estadisticas_por_profundidad rehacen, sin volver a ejecutar nada, el árbol de
+búsqueda y los contadores por profundidad.
+
+Uso:
+    python traza.py grabar m4.txt traza.bin [--algo fc|mac|ac3+fc] [--capacidad N]
+    python traza.py leer traza.bin [--arbol 40]
+    python traza.py comprobar
+"""
+
+import struct
+from collections import namedtuple
+
+ASIGNAR, PODAR, VACIO, RETROCEDER, SOLUCION, REVISAR = range(1, 7)
+NOMBRES_EVENTO = {ASIGNAR: 'asignar', PODAR: 'podar', VACIO: 'vacio', RETROCEDER: 'retroceder',
+                  SOLUCION: 'solucion', REVISAR: 'revisar'}
+
+REGISTRO = struct.Struct('<BBBBHH')
+# Cabecera: firma, versión, bytes por registro, eventos registrados, eventos perdidos
+CABECERA = struct.Struct('<4sBBxxQQ')
+FIRMA = b'SDTR'
+VERSION = 1
+
+FUERA_DE_BUSQUEDA = 0xFFFF
+
+Evento = namedtuple('Evento', 'tipo fila columna valor profundidad extra')
+
+# Dígito ('0'..'9') -> entero, sin pasar por int() en cada evento
+_DIGITO = {str(v): v for v in range(10)}
+
+
+class GrabadorTraza:
+    """
+    Grabador de eventos de búsqueda en registros binarios de 8 bytes.
+
+    Atributos:
+        capacidad (int): Registros que caben en el búfer
+        total (int): Eventos registrados desde el principio
+        fichero (str|None): Destino de los volcados; None = búfer circular
+    """
+
+    def __init__(self, capacidad=65536, fichero=None):
+        """
+        Args:
+            capacidad (int): Registros del búfer (8 bytes cada uno)
+            fichero (str|None): Si se da, el búfer se vuelca a este fichero
+                al llenarse y al cerrar; si no, se sobrescriben los más antiguos
+        """
+        if capacidad < 1:
+            raise ValueError("La capacidad debe ser positiva")
+        self.capacidad = capacidad
+        self.total = 0
+        self.fichero = fichero
+        self._bufer = bytearray(capacidad * REGISTRO.size)
+        self._pos = 0
+        self._salida = None
+        if fichero is not None:
+            self._salida = open(fichero, 'wb')
+            self._salida.write(CABECERA.pack(FIRMA, VERSION, REGISTRO.size, 0, 0))
+
+    @property
+    def perdidos(self):
+        """Eventos sobrescritos en el búfer circular (0 si se vuelca a fichero)."""
+        return 0 if self.fichero is not None else max(0, self.total - self.capacidad)
+
+    def registrar(self, tipo, fila=0, columna=0, valor=0, profundidad=0, extra=0):
+        REGISTRO.pack_into(self._bufer, self._pos * REGISTRO.size, tipo, fila, columna, valor,
+                           profundidad & 0xFFFF, extra & 0xFFFF)
+        self.total += 1
+        self._pos += 1
+        if self._pos == self.capacidad:
+            if self._salida is not None:
+                self._salida.write(self._bufer)
+            self._pos = 0
+
+    # Atajos usados por la búsqueda (valores como dígitos '1'..'9')
+
+    def asignar(self, fila, columna, valor, profundidad):
+        self.registrar(ASIGNAR, fila, columna, _DIGITO[valor], profundidad)
+
+    def podar(self, cambios, profundidad):
+        # Es el evento más frecuente: se empaqueta aquí sin pasar por registrar
+        empaquetar, tamano, bufer, capacidad, digito = (REGISTRO.pack_into, REGISTRO.size, self._bufer,
+                                                        self.capacidad, _DIGITO)
+        profundidad &= 0xFFFF
+        for f, c, v in cambios:
+            empaquetar(bufer, self._pos * tamano, PODAR, f, c, digito[v], profundidad, 0)
+            self._pos += 1
+            if self._pos == capacidad:
+                if self._salida is not None:
+                    self._salida.write(bufer)
+                self._pos = 0
+        self.total += len(cambios)
+
+    def vacio(self, csp, fila, columna, valor, cambios, profundidad):
+        """Vaciado tras asignar `valor` en (fila, columna): busca la celda que quedó sin valores."""
+        for f, c, _ in reversed(cambios):
+            if not csp.variables[f][c].dominio:
+                fila, columna = f, c
+                break
+        self.registrar(VACIO, fila, columna, _DIGITO[valor], profundidad, len(cambios))
+
+    def retroceder(self, fila, columna, valor, profundidad):
+        self.registrar(RETROCEDER, fila, columna, _DIGITO[valor], profundidad)
+
+    def solucion(self, profundidad):
+        self.registrar(SOLUCION, profundidad=profundidad)
+
+    def revisar(self, xi, xj, valor):
+        self.registrar(REVISAR, xi[0], xi[1], _DIGITO[valor], FUERA_DE_BUSQUEDA, xj[0] * 9 + xj[1])
+
+    def vacio_ac3(self, xi):
+        self.registrar(VACIO, xi[0], xi[1], 0, FUERA_DE_BUSQUEDA)
+
+    def registros(self):
+        """Registros conservados, del más antiguo al más reciente (solo búfer circular)."""
+        if self.fichero is not None:
+            raise ValueError("Con fichero, los registros están en disco: usar leer_traza")
+        corte = self._pos * REGISTRO.size
+        if self.total < self.capacidad:
+            return bytes(self._bufer[:corte])
+        return bytes(self._bufer[corte:] + self._bufer[:corte])
+
+    def volcar(self, ruta):
+        """Escribe la traza del búfer circular en `ruta` (mismo formato que con fichero)."""
+        datos = self.registros()
+        with open(ruta, 'wb') as f:
+            f.write(CABECERA.pack(FIRMA, VERSION, REGISTRO.size, self.total, self.perdidos))
+            f.write(datos)
+
+    def cerrar(self):
+        """Con fichero, vuelca lo pendiente y completa la cabecera."""
+        if self._salida is None:
+            return
+        self._salida.write(self._bufer[:self._pos * REGISTRO.size])
+        self._salida.seek(0)
+        self._salida.write(CABECERA.pack(FIRMA, VERSION, REGISTRO.size, self.total, 0))
+        self._salida.close()
+        self._salida = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def leer_traza(origen):
+    """
+    Decodifica una traza.
+
+    Args:
+        origen (str|bytes): Ruta del fichero o su contenido
+
+    Returns:
+        tuple: (cabecera, eventos); cabecera = {'version', 'total', 'perdidos'},
+            eventos = lista de Evento en orden cronológico
+    """
+    if isinstance(origen, str):
+        with open(origen, 'rb') as f:
+            origen = f.read()
+    if len(origen) < CABECERA.size:
+        raise ValueError("Traza truncada: falta la cabecera")
+    firma, version, tamano, total, perdidos = CABECERA.unpack_from(origen)
+    if firma != FIRMA or tamano != REGISTRO.size:
+        raise ValueError("No es una traza de búsqueda (firma o tamaño de registro incorrectos)")
+    if version != VERSION:
+        raise ValueError(f"Versión de traza no soportada: {version}")
+    cuerpo = memoryview(origen)[CABECERA.size:]
+    cuerpo = cuerpo[:len(cuerpo) - len(cuerpo) % REGISTRO.size]
+    eventos = [Evento(*campos) for campos in REGISTRO.iter_unpack(cuerpo)]
+    return {'version': version, 'total': total, 'perdidos': perdidos}, eventos
+
+
+def comprobar(capacidad=4):
+    """
+    Comprobación de regresión del búfer circular: graba 0..3*capacidad eventos
+    (incluido el caso justo lleno, con la posición de escritura otra vez en 0)
+    y verifica que `registros` y `volcar`/`leer_traza` devuelven los últimos
+    eventos en orden y que la cabecera cuadra con ellos.
+
+    Returns:
+        list: Descripción de cada fallo (vacía si todo es correcto)
+    """
+    import os
+    import tempfile
+    fallos = []
+    for n in range(3 * capacidad + 1):
+        grabador = GrabadorTraza(capacidad)
+        for i in range(n):
+            grabador.asignar(i % 9, 0, '1', i)
+        esperados = list(range(max(0, n - capacidad), n))
+        obtenidos = [e.profundidad for e in
+                     (Evento(*campos) for campos in REGISTRO.iter_unpack(grabador.registros()))]
+        if obtenidos != esperados:
+            fallos.append(f"{n} eventos en capacidad {capacidad}: registros={obtenidos}, esperados={esperados}")
+            continue
+        descriptor, ruta = tempfile.mkstemp(suffix='.bin')
+        os.close(descriptor)
+        try:
+            grabador.volcar(ruta)
+            cabecera, eventos = leer_traza(ruta)
+        finally:
+            os.remove(ruta)
+        if (cabecera['total'] != n or cabecera['perdidos'] != n - len(esperados)
+                or [e.profundidad for e in eventos] != esperados):
+            fallos.append(f"{n} eventos en capacidad {capacidad}: volcado incoherente ({cabecera})")
+    return fallos
+
+
+def reconstruir_arbol(eventos):
+    """
+    Rehace el árbol de búsqueda a partir de los eventos.
+
+    Cada nodo es un dict {'fila', 'columna', 'valor', 'profundidad', 'podas',
+    'resultado' ('solucion', 'vacio', 'agotado' o None si la traza acaba
+    dentro de él), 'hijos'}. Si el búfer circular perdió el principio, los
+    antepasados que faltan aparecen como nodos con fila None.
+
+    Returns:
+        dict: Nodo raíz (profundidad -1)
+    """
+    def nodo(fila, columna, valor, profundidad):
+        return {'fila': fila, 'columna': columna, 'valor': valor, 'profundidad': profundidad,
+                'podas': 0, 'resultado': None, 'hijos': []}
+
+    raiz = nodo(None, None, None, -1)
+    pila = [raiz]
+    for e in eventos:
+        if e.profundidad == FUERA_DE_BUSQUEDA:
+            continue
+        if e.tipo == ASIGNAR:
+            del pila[e.profundidad + 1:]
+            while len(pila) <= e.profundidad:
+                hueco = nodo(None, None, None, len(pila) - 1)
+                pila[-1]['hijos'].append(hueco)
+                pila.append(hueco)
+            hijo = nodo(e.fila, e.columna, e.valor, e.profundidad)
+            pila[-1]['hijos'].append(hijo)
+            pila.append(hijo)
+        elif e.tipo == PODAR:
+            pila[-1]['podas'] += 1
+        elif e.tipo == VACIO:
+            pila[-1]['resultado'] = 'vacio'
+        elif e.tipo == SOLUCION:
+            pila[-1]['resultado'] = 'solucion'
+        elif e.tipo == RETROCEDER:
+            if len(pila) > e.profundidad + 1:
+                actual = pila[e.profundidad + 1]
+                if actual['resultado'] is None:
+                    actual['resultado'] = 'agotado'
+                del pila[e.profundidad + 1:]
+    return raiz
+
+
+def estadisticas_por_profundidad(eventos):
+    """
+    Contadores de eventos por profundidad (los de AC3 van aparte, con
+    profundidad -1).
+
+    Returns:
+        dict: profundidad -> {'asignar', 'podar', 'vacio', 'retroceder', 'solucion', 'revisar'}
+    """
+    estadisticas = {}
+    for e in eventos:
+        profundidad = -1 if e.profundidad == FUERA_DE_BUSQUEDA else e.profundidad
+        fila = estadisticas.get(profundidad)
+        if fila is None:
+            fila = estadisticas[profundidad] = dict.fromkeys(NOMBRES_EVENTO.values(), 0)
+        fila[NOMBRES_EVENTO[e.tipo]] += 1
+    return dict(sorted(estadisticas.items()))
+
+
+def _imprimir_arbol(raiz, limite):
+    """Primeros `limite` nodos del árbol, indentados por profundidad."""
+    pendientes = list(reversed(raiz['hijos']))
+    impresos = 0
+    while pendientes and impresos < limite:
+        n = pendientes.pop()
+        if n['fila'] is None:
+            etiqueta = '(perdido)'
+        else:
+            etiqueta = f"({n['fila']},{n['columna']})={n['valor']}"
+        print(f"{'  ' * n['profundidad']}{etiqueta} podas={n['podas']} {n['resultado'] or ''}".rstrip())
+        impresos += 1
+        pendientes.extend(reversed(n['hijos']))
+
+
+def main():
+    import argparse
+    from tablero import Tablero
+
+    parser = argparse.ArgumentParser(description='Graba o decodifica trazas binarias de la búsqueda')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    grabar = sub.add_parser('grabar', help='Resolver un Sudoku grabando su traza')
+    grabar.add_argument('sudoku')
+    grabar.add_argument('salida')
+    grabar.add_argument('--algo', choices=('fc', 'mac', 'ac3+fc'), default='fc')
+    grabar.add_argument('--capacidad', type=int, default=65536, help='Registros del búfer (8 bytes cada uno)')
+    grabar.add_argument('--max-nodos', type=int, default=None)
+    leer = sub.add_parser('leer', help='Decodificar una traza')
+    leer.add_argument('traza')
+    leer.add_argument('--arbol', type=int, default=0, metavar='N', help='Mostrar los N primeros nodos del árbol')
+    sub.add_parser('comprobar', help='Comprobar el búfer circular (vacío, parcial, justo lleno y con pérdidas)')
+    args = parser.parse_args()
+
+    if args.comando == 'comprobar':
+        fallos = [f for capacidad in (1, 2, 4, 7) for f in comprobar(capacidad)]
+        for fallo in fallos:
+            print(f"FALLO: {fallo}")
+        print("OK" if not fallos else f"{len(fallos)} fallos")
+        raise SystemExit(1 if fallos else 0)
+
+    if args.comando == 'grabar':
+        from algoritmos import forward_checking_stats, generar_soluciones, ac3
+        tablero = Tablero(args.sudoku)
+        with GrabadorTraza(args.capacidad, fichero=args.salida) as traza:
+            if args.algo == 'mac':
+                metricas = {}
+                exito = next(generar_soluciones(tablero, max_nodos=args.max_nodos, metricas=metricas,
+                                                traza=traza), None) is not None
+                nodos = metricas['nodos']
+            else:
+                dominios = None
+                if args.algo == 'ac3+fc':
+                    tablero = tablero.copia()
+                    dominios = ac3(tablero, traza=traza)['dominios_despues']
+                r = forward_checking_stats(tablero, max_nodos=args.max_nodos, dominios=dominios, traza=traza)
+                exito, nodos = r['exito'], r['nodos']
+        print(f"{args.sudoku}: exito={exito} nodos={nodos} eventos={traza.total} -> {args.salida}")
+        return
+
+    cabecera, eventos = leer_traza(args.traza)
+    print(f"{args.traza}: {cabecera['total']} eventos registrados, {len(eventos)} en la traza, "
+          f"{cabecera['perdidos']} perdidos")
+    nombres = list(NOMBRES_EVENTO.values())
+    print(f"{'prof':>4} " + ' '.join(f'{n:>10}' for n in nombres))
+    for profundidad, fila in estadisticas_por_profundidad(eventos).items():
+        etiqueta = 'ac3' if profundidad < 0 else str(profundidad)
+        print(f"{etiqueta:>4} " + ' '.join(f'{fila[n]:>10}' for n in nombres))
+    if args.arbol:
+        _imprimir_arbol(reconstruir_arbol(eventos), args.arbol)
+
+
+if __name__ == '__main__':
+    main()